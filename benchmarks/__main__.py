@@ -0,0 +1,56 @@
+"""
+Runs the benchmark suites and writes a JSON report.
+
+    python -m benchmarks                        # every suite, full sizes
+    python -m benchmarks --quick --only proxy_manager filemanager
+    python -m benchmarks --compare benchmarks/results/previous.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+from dataclasses import asdict
+from datetime import datetime
+
+from .harness import compare, write_report
+from .suites import SUITES, BenchConfig
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Offline performance benchmarks.')
+    parser.add_argument('--only', nargs='+', choices=sorted(SUITES), help='Suites to run, default all.')
+    parser.add_argument('--quick', action='store_true', help='Smaller sizes for a fast smoke run.')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repeats per case, the best one is kept.')
+    parser.add_argument('--proxies', type=int, default=8, help='Local proxies to start.')
+    parser.add_argument('--proxy-latency', type=float, default=0.0, help='Seconds added by every local proxy.')
+    parser.add_argument('--proxy-failure-rate', type=float, default=0.0, help='Probability of a proxy answering 502.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Report path, default benchmarks/results/<timestamp>.json.')
+    parser.add_argument('--compare', metavar='REPORT', help='Previous report to compare throughput with.')
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results', f'{datetime.now():%Y%m%d-%H%M%S}.json'
+    )
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        config = BenchConfig(workdir, args.quick, args.repeat, args.proxies, args.proxy_latency,
+                             args.proxy_failure_rate, args.seed)
+        for name in args.only or list(SUITES):
+            print(f'== {name}', file=sys.stderr)
+            for result in SUITES[name](config):
+                print(f'{result.key}: {result.ops_per_sec:,.1f} ops/s ({result.seconds:.4f}s)', file=sys.stderr)
+                results.append(result)
+    settings = asdict(config)
+    settings.pop('workdir')
+    settings['suites'] = args.only or list(SUITES)
+    write_report(output, results, settings)
+    print(output)
+    if args.compare:
+        for line in compare(args.compare, results):
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Timing of one benchmark case.
+
+    Attributes:
+        name (str): Benchmark name, e.g. ``proxy_manager.generate_proxy``.
+        params (Dict[str, Any]): Parameters of the case; name and params identify it across runs.
+        operations (int): Operations performed per repeat.
+        seconds (float): Best wall time over the repeats.
+        runs (List[float]): Wall time of every repeat.
+        extra (Dict[str, Any]): Case-specific figures such as errors or bytes.
+    """
+    name: str
+    params: Dict[str, Any]
+    operations: int
+    seconds: float
+    runs: List[float] = field(default_factory=list)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.operations / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def key(self) -> str:
+        params = ','.join(f'{name}={value}' for name, value in sorted(self.params.items()))
+        return f'{self.name}[{params}]'
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['ops_per_sec'] = self.ops_per_sec
+        return data
+
+
+def measure(name: str, params: Dict[str, Any], operations: int, run: Callable[[], Any],
+            repeat: int = 3, setup: Optional[Callable[[], None]] = None) -> BenchmarkResult:
+    """
+    Times ``run`` ``repeat`` times and keeps the best run.
+
+    Args:
+        name (str): Benchmark name.
+        params (Dict[str, Any]): Parameters of the case.
+        operations (int): Operations performed by one call of ``run``.
+        run (Callable[[], Any]): The measured code; a returned dict is kept as extra figures.
+        repeat (int): Number of timed calls.
+        setup (Optional[Callable[[], None]]): Untimed code run before every call.
+
+    Returns:
+        BenchmarkResult: The timing.
+    """
+    runs, extra = [], {}
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        outcome = run()
+        runs.append(time.perf_counter() - start)
+        extra = outcome if isinstance(outcome, dict) else {}
+    return BenchmarkResult(name, params, operations, min(runs), runs, extra)
+
+
+def environment() -> Dict[str, Any]:
+    """Describes the machine and revision a run was made on."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+    }
+
+
+def write_report(path: str, results: List[BenchmarkResult], config: Dict[str, Any]) -> None:
+    """
+    Writes a run as JSON: environment, configuration and one entry per case.
+
+    Args:
+        path (str): Destination file.
+        results (List[BenchmarkResult]): The timings.
+        config (Dict[str, Any]): Options the run was made with.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    report = {'environment': environment(), 'config': config, 'results': [result.to_dict() for result in results]}
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+
+
+def compare(baseline_path: str, results: List[BenchmarkResult]) -> List[str]:
+    """
+    Compares a run with a previous report.
+
+    Args:
+        baseline_path (str): A report written by ``write_report``.
+        results (List[BenchmarkResult]): The current timings.
+
+    Returns:
+        List[str]: One line per case present in both runs, with the throughput ratio.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = {
+            BenchmarkResult(item['name'], item['params'], item['operations'], item['seconds']).key: item['ops_per_sec']
+            for item in json.load(file)['results']
+        }
+    lines = []
+    for result in results:
+        before = baseline.get(result.key)
+        if before:
+            lines.append(f'{result.key}: {before:,.1f} -> {result.ops_per_sec:,.1f} ops/s '
+                         f'({result.ops_per_sec / before:.2f}x)')
+    return lines
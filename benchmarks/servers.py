@@ -0,0 +1,194 @@
+import http.client
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+_BYTES_PATH = re.compile(r'^/bytes/(\d+)$')
+_PAGE_PATH = re.compile(r'^/page/(\d+)$')
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse shows up in the numbers
+    disable_nagle_algorithm = True  # headers and body go out as separate writes; avoid delayed-ACK stalls
+
+    def log_message(self, *args):
+        pass
+
+
+class OriginHandler(_QuietHandler):
+    """
+    Serves ``/page/<n>`` (an HTML page with ``n`` list items) and ``/bytes/<n>``
+    (``n`` bytes with Range support and a stable ETag).
+    """
+    _payloads: Dict[int, bytes] = {}
+
+    def do_GET(self):
+        match = _BYTES_PATH.match(self.path)
+        if match:
+            return self._send_bytes(int(match.group(1)))
+        match = _PAGE_PATH.match(self.path)
+        if match:
+            items = ''.join(f'<li><a href="/page/{i}">item {i}</a></li>' for i in range(int(match.group(1))))
+            return self._send(200, f'<html><head><title>page</title></head><body><ul>{items}</ul></body></html>'
+                              .encode('utf-8'), {'Content-Type': 'text/html; charset=utf-8'})
+        self._send(404, b'not found')
+
+    def _send_bytes(self, size: int) -> None:
+        payload = self._payloads.get(size)
+        if payload is None:
+            payload = self._payloads[size] = bytes(range(256)) * (size // 256) + bytes(size % 256)
+        ranges = self.headers.get('Range')
+        headers = {'ETag': f'"{size}"', 'Accept-Ranges': 'bytes', 'Content-Type': 'application/octet-stream'}
+        if ranges is None:
+            return self._send(200, payload, headers)
+        start, _, end = ranges.split('=', 1)[1].partition('-')
+        start, end = int(start), min(int(end) if end else size - 1, size - 1)
+        if start >= size:
+            return self._send(416, b'', {'Content-Range': f'bytes */{size}'})
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        self._send(206, payload[start:end + 1], headers)
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ProxyHandler(_QuietHandler):
+    """
+    Forwarding HTTP proxy for absolute-form requests, with the latency and
+    failure rate configured on its server. Upstream connections are kept
+    alive for as long as the client connection.
+    """
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        if server.failure_rate and server.random.random() < server.failure_rate:
+            self.send_response(502)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        target = urlsplit(self.path)
+        connection = self._upstream(target.netloc)
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() not in ('proxy-authorization', 'proxy-connection', 'connection')}
+        try:
+            connection.request('GET', target.path + (f'?{target.query}' if target.query else ''), headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connections.pop(target.netloc, None)
+            self.send_response(502)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(response.status)
+        for name, value in response.getheaders():
+            if name.lower() not in ('connection', 'keep-alive', 'transfer-encoding', 'content-length'):
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def finish(self):
+        super().finish()
+        for connection in getattr(self, 'connections', {}).values():
+            connection.close()
+
+    def _upstream(self, netloc: str) -> http.client.HTTPConnection:
+        if not hasattr(self, 'connections'):
+            self.connections = {}
+        connection = self.connections.get(netloc)
+        if connection is None:
+            connection = self.connections[netloc] = http.client.HTTPConnection(netloc, timeout=30)
+        return connection
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 drops SYNs under bursts, adding 1s retransmits
+
+
+class _Server:
+    """Runs an HTTP server on a free local port in a daemon thread."""
+
+    def __init__(self, handler) -> None:
+        self.httpd = _HTTPServer(('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class OriginServer(_Server):
+    """
+    Local origin serving HTML pages and byte ranges; see ``OriginHandler``.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(OriginHandler)
+        self.url = f'http://127.0.0.1:{self.port}'
+
+    def __enter__(self) -> 'OriginServer':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class ProxyFarm:
+    """
+    A set of local forwarding proxies standing in for a commercial proxy list.
+
+    Every proxy adds ``latency`` seconds per request and answers 502 with
+    probability ``failure_rate``; ``lines`` renders them in the
+    ``ip:port:username:password`` format read by ``ProxyManager``.
+    """
+
+    def __init__(self, count: int = 8, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0) -> None:
+        """
+        Args:
+            count (int): Number of proxies to start.
+            latency (float): Delay added by each proxy, in seconds.
+            failure_rate (float): Probability of answering 502 instead of forwarding.
+            seed (int): Seed of the failure draws, for reproducible runs.
+        """
+        self.servers: List[_Server] = []
+        for i in range(count):
+            server = _Server(ProxyHandler)
+            server.httpd.latency = latency
+            server.httpd.failure_rate = failure_rate
+            server.httpd.random = random.Random(seed + i)
+            self.servers.append(server)
+
+    def __enter__(self) -> 'ProxyFarm':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def lines(self) -> List[str]:
+        return [f'127.0.0.1:{server.port}:bench:bench' for server in self.servers]
+
+    def write_proxy_file(self, path: str) -> str:
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(self.lines()))
+        return path
+
+    def close(self) -> None:
+        for server in self.servers:
+            server.close()
@@ -0,0 +1,278 @@
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from utils.background_writer import BackgroundWriter
+from utils.downloader import RangeDownloader
+from utils.filemanager import FileManager
+from utils.manager_proxies import ProxyManager
+from utils.requests import RequestHandler
+
+from .harness import BenchmarkResult, measure
+from .servers import OriginServer, ProxyFarm
+
+
+@dataclass
+class BenchConfig:
+    """
+    Options shared by every suite.
+
+    Attributes:
+        workdir (str): Scratch directory for proxy lists, downloads and written files.
+        quick (bool): Smaller sizes, for smoke runs and CI.
+        repeat (int): Timed repeats per case; the best one is reported.
+        proxies (int): Local proxies started for the network suites.
+        proxy_latency (float): Delay added by every local proxy, in seconds.
+        proxy_failure_rate (float): Probability of a local proxy answering 502.
+        seed (int): Seed for generated data and proxy failures.
+    """
+    workdir: str
+    quick: bool = False
+    repeat: int = 3
+    proxies: int = 8
+    proxy_latency: float = 0.0
+    proxy_failure_rate: float = 0.0
+    seed: int = 0
+
+
+def bench_proxy_manager(config: BenchConfig) -> List[BenchmarkResult]:
+    """Loading, selection and marking for 100 to 100k proxies, for both strategies."""
+    sizes = (100, 1000, 10000) if config.quick else (100, 1000, 10000, 100000)
+    operations = 2000 if config.quick else 20000
+    results = []
+    for size in sizes:
+        path = os.path.join(config.workdir, f'proxies-{size}.txt')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(
+                f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}:{8000 + i % 1000}:user{i}:pass{i}' for i in range(size)
+            ))
+        for strategy in ProxyManager.STRATEGIES:
+            params = {'proxies': size, 'strategy': strategy}
+            results.append(measure('proxy_manager.load', params, 1,
+                                   lambda: ProxyManager(path, strategy=strategy), config.repeat))
+            manager = ProxyManager(path, strategy=strategy)
+            random.seed(config.seed)
+
+            def select():
+                for _ in range(operations):
+                    manager.generate_proxy()
+
+            def mark():
+                for _ in range(operations // 2):
+                    proxy = manager.generate_proxy()
+                    manager.mark_proxy_as_failed(proxy)
+                    manager.mark_proxy_as_successful(proxy, latency=0.1)
+
+            results.append(measure('proxy_manager.generate_proxy', params, operations, select, config.repeat))
+            results.append(measure('proxy_manager.mark_cycle', params, operations, mark, config.repeat))
+
+        for shared in (False, True):
+            state_path = os.path.join(config.workdir, f'proxies-{size}.state') if shared else None
+            manager = ProxyManager(path, strategy='weighted', shared_state_path=state_path)
+
+            def mark_threads():
+                def worker():
+                    for _ in range(operations // 16):
+                        proxy = manager.generate_proxy()
+                        manager.mark_proxy_as_failed(proxy)
+                        manager.mark_proxy_as_successful(proxy, latency=0.1)
+
+                threads = [threading.Thread(target=worker) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            results.append(measure('proxy_manager.mark_threads', {'proxies': size, 'threads': 8, 'shared': shared},
+                                   operations, mark_threads, config.repeat))
+            manager.close()
+
+        # swap in a list where half the proxies changed, as a hot reload would
+        with open(path, 'r', encoding='utf-8') as file:
+            original = file.read()
+        swapped = '\n'.join(
+            f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}:{8000 + i % 1000}:user{i}:pass{i}'
+            for i in range(size // 2, size + size // 2)
+        )
+        live = os.path.join(config.workdir, f'proxies-{size}-live.txt')
+        with open(live, 'w', encoding='utf-8') as file:
+            file.write(original)
+        manager = ProxyManager(live, strategy='weighted')
+
+        def setup_reload():
+            for content in (original, swapped):
+                with open(live, 'w', encoding='utf-8') as file:
+                    file.write(content)
+                if content is original:
+                    manager.reload(force=True)
+
+        results.append(measure('proxy_manager.reload', {'proxies': size, 'changed': size // 2}, size,
+                               lambda: manager.reload(force=True), config.repeat, setup_reload))
+    return results
+
+
+def bench_requests(config: BenchConfig) -> List[BenchmarkResult]:
+    """Sequential, pooled and async fetching of small pages, direct and through the proxy farm."""
+    count = 100 if config.quick else 1000
+    results = []
+    with OriginServer() as origin, ProxyFarm(config.proxies, config.proxy_latency, config.proxy_failure_rate,
+                                             config.seed) as farm:
+        proxy_file = farm.write_proxy_file(os.path.join(config.workdir, 'farm.txt'))
+        urls = [f'{origin.url}/page/{i % 50}' for i in range(count)]
+        for proxied in (False, True):
+            def manager():
+                # weighted: failed proxies cool down instead of being retired for the rest of the run
+                return ProxyManager(proxy_file, strategy='weighted') if proxied else None
+
+            for mode in ('sequential', 'pooled'):
+                def run_sequential():
+                    errors = 0
+                    with RequestHandler(manager(), pooled=mode == 'pooled') as handler:
+                        for url in urls:
+                            try:
+                                handler.get(url)
+                            except Exception:
+                                errors += 1
+                    return {'errors': errors}
+
+                results.append(measure('requests.get', {'mode': mode, 'proxied': proxied, 'urls': count},
+                                       count, run_sequential, config.repeat))
+
+            def run_async():
+                async def consume():
+                    errors = 0
+                    with RequestHandler(manager(), pooled=True, pool_maxsize=32) as handler:
+                        async for result in handler.fetch_many(urls, concurrency=32, per_host=32):
+                            errors += not result.ok
+                    return {'errors': errors}
+
+                return asyncio.run(consume())
+
+            results.append(measure('requests.fetch_many', {'proxied': proxied, 'urls': count, 'concurrency': 32},
+                                   count, run_async, config.repeat))
+    return results
+
+
+def bench_download(config: BenchConfig) -> List[BenchmarkResult]:
+    """Single-stream and parallel ranged downloads of one large file."""
+    size = (4 if config.quick else 64) * 1024 * 1024
+    destination = os.path.join(config.workdir, 'download.bin')
+    results = []
+    with OriginServer() as origin:
+        for parts in (1, 4, 8):
+            downloader = RangeDownloader(RequestHandler(pooled=True), parts=parts, min_part_size=256 * 1024)
+
+            def setup():
+                for path in (destination, destination + '.part', destination + '.part.json'):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+            def run():
+                downloader.download(f'{origin.url}/bytes/{size}', destination, expected_size=size)
+                return {'bytes': size}
+
+            result = measure('download', {'parts': parts, 'bytes': size}, 1, run, config.repeat, setup)
+            result.extra['mb_per_sec'] = size / result.seconds / (1024 * 1024)
+            results.append(result)
+    return results
+
+
+def bench_filemanager(config: BenchConfig) -> List[BenchmarkResult]:
+    """Write and read paths of FileManager on small HTML files and a large JSON array."""
+    files = 500 if config.quick else 5000
+    page = ('<html><body>' + '<p>lorem ipsum dolor sit amet</p>' * 200 + '</body></html>').encode('utf-8')
+    directory = os.path.join(config.workdir, 'pages')
+    results = []
+
+    def clean():
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+    def write_sync():
+        manager = FileManager()
+        for i in range(files):
+            manager.save_file(os.path.join(directory, f'{i}.html'), page)
+
+    def write_background():
+        with FileManager(writer=BackgroundWriter(workers=4)) as manager:
+            for i in range(files):
+                manager.save_file(os.path.join(directory, f'{i}.html'), page)
+
+    results.append(measure('filemanager.save_file', {'files': files, 'writer': 'sync'}, files,
+                           write_sync, config.repeat, clean))
+    results.append(measure('filemanager.save_file', {'files': files, 'writer': 'background'}, files,
+                           write_background, config.repeat, clean))
+
+    manager = FileManager()
+    readers: Dict[str, Callable[[], Any]] = {
+        'get_all_html_from_path': lambda: manager.get_all_html_from_path(directory),
+        'iter_html_from_path': lambda: sum(len(html) for _, html in manager.iter_html_from_path(directory)),
+        'iter_html_from_path_mmap': lambda: sum(
+            len(html) for _, html in manager.iter_html_from_path(directory, mmap_threshold=0, decode=False)
+        ),
+    }
+    for name, reader in readers.items():
+        results.append(measure(f'filemanager.{name}', {'files': files}, files, reader, config.repeat))
+
+    items = 20000 if config.quick else 200000
+    data = [{'id': i, 'name': f'item {i}', 'tags': ['a', 'b'], 'price': i * 0.5} for i in range(items)]
+    json_directory = os.path.join(config.workdir, 'json')
+    for compact in (False, True):
+        results.append(measure('filemanager.save_json', {'items': items, 'compact': compact}, items,
+                               lambda: manager.save_json(json_directory, 'data', data, compact=compact),
+                               config.repeat))
+    path = os.path.join(json_directory, 'data.json')
+    results.append(measure('filemanager.open_json', {'items': items}, items,
+                           lambda: manager.open_json(path), config.repeat))
+    results.append(measure('filemanager.iter_json', {'items': items}, items,
+                           lambda: sum(1 for _ in manager.iter_json(path)), config.repeat))
+    with open(os.path.join(json_directory, 'data.jsonl'), 'w', encoding='utf-8') as file:
+        file.writelines(json.dumps(item) + '\n' for item in data)
+    results.append(measure('filemanager.iter_json', {'items': items, 'lines': True}, items,
+                           lambda: sum(1 for _ in manager.iter_json(path + 'l')), config.repeat))
+    return results
+
+
+IMPORT_MODULES = ('utils', 'utils.cli', 'utils.filemanager', 'utils.manager_proxies', 'utils.requests',
+                  'utils.frontier')
+
+
+def bench_imports(config: BenchConfig) -> List[BenchmarkResult]:
+    """Import time of the public modules and startup of the CLI, each in a fresh interpreter."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = []
+    for module in IMPORT_MODULES:
+        runs = [_import_seconds(module, root) for _ in range(config.repeat)]
+        results.append(BenchmarkResult('imports', {'module': module}, 1, min(runs), runs))
+    command = [sys.executable, '-m', 'utils', '--help']
+    results.append(measure('imports.cli_help', {}, 1,
+                           lambda: subprocess.run(command, cwd=root, check=True, stdout=subprocess.DEVNULL),
+                           config.repeat))
+    return results
+
+
+def _import_seconds(module: str, cwd: str) -> float:
+    """Cumulative import time of ``module`` as reported by ``-X importtime``."""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=cwd,
+                               check=True, capture_output=True, text=True)
+    for line in completed.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    raise RuntimeError(f'no import time reported for {module}')
+
+
+SUITES: Dict[str, Callable[[BenchConfig], List[BenchmarkResult]]] = {
+    'proxy_manager': bench_proxy_manager,
+    'requests': bench_requests,
+    'download': bench_download,
+    'filemanager': bench_filemanager,
+    'imports': bench_imports,
+}
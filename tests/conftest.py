@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+import pytest
+from utils.manager_proxies import ProxyManager
+
+PROXY_LINES = ['127.0.0.1:8080:user:pass', '127.0.0.2:8080:user2:pass2', '127.0.0.3:8080:user3:pass3']
+
+
+class FakeClock:
+    """Clock that only moves when a test sets ``now``."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def make_proxy_manager():
+    """Builds ProxyManagers over the first ``count`` entries of PROXY_LINES instead of a proxy file."""
+    def make(count=2, **kwargs):
+        with patch('utils.filemanager.FileManager.iter_lines', return_value=PROXY_LINES[:count]):
+            return ProxyManager(**kwargs)
+    return make
+
+
+@pytest.fixture
+def proxy_manager(make_proxy_manager):
+    return make_proxy_manager()
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import pytest
+from utils.archive import PageArchive
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = PageArchive(str(tmp_path), segment_bytes=2048, commit_every=10)
+    yield archive
+    archive.close()
+
+
+def test_put_and_get(archive):
+    archive.put('http://site.com/a', '<html>á</html>')
+    archive.put('http://site.com/b', b'<html>b</html>')
+    assert archive.get('http://site.com/a') == '<html>á</html>'.encode('utf-8')
+    assert archive.get('http://site.com/b') == b'<html>b</html>'
+    assert archive.get('http://site.com/missing') is None
+    assert 'http://site.com/a' in archive
+    assert len(archive) == 2
+
+
+def test_overwrite_repoints_index(archive):
+    archive.put('page', b'v1')
+    archive.put('page', b'v2')
+    assert archive.get('page') == b'v2'
+    assert list(archive.iter_pages()) == [('page', b'v2')]
+
+
+def test_segments_roll_over(tmp_path, archive):
+    pages = {f'page-{i}': os.urandom(600) for i in range(10)}
+    for key, content in pages.items():
+        archive.put(key, content)
+    segments = [name for name in os.listdir(tmp_path) if name.endswith('.warc.gz')]
+    assert len(segments) > 1
+    assert all(archive.get(key) == content for key, content in pages.items())
+    assert dict(archive.iter_pages()) == pages
+
+
+def test_reopen_recovers_uncommitted_records(tmp_path):
+    archive = PageArchive(str(tmp_path), commit_every=1000)
+    archive.put('committed', b'one')
+    archive.flush()
+    archive.put('pending', b'two')
+    archive._writer.flush()
+    archive._db.close()  # simulate a crash before the index commit
+    archive._writer.close()
+    with open(os.path.join(tmp_path, 'segment-000000.warc.gz'), 'ab') as file:
+        file.write(b'\x1f\x8b torn record')
+
+    reopened = PageArchive(str(tmp_path))
+    assert reopened.get('committed') == b'one'
+    assert reopened.get('pending') == b'two'
+    reopened.put('after', b'three')
+    assert dict(reopened.iter_pages()) == {'committed': b'one', 'pending': b'two', 'after': b'three'}
+    reopened.close()
+
+
+def test_recovery_spans_rolled_over_segments(tmp_path):
+    archive = PageArchive(str(tmp_path), segment_bytes=200, commit_every=1000)
+    pages = {f'page-{i}': os.urandom(100) for i in range(5)}
+    pages['large'] = os.urandom(300 * 1024)  # larger than one recovery chunk
+    for key, content in pages.items():
+        archive.put(key, content)
+    archive._writer.flush()
+    archive._db.close()  # crash before the index commit
+    archive._writer.close()
+    with PageArchive(str(tmp_path), segment_bytes=200) as reopened:
+        assert dict(reopened.iter_pages()) == pages
+
+    # an index that lost the rows of earlier segments is rebuilt from every segment
+    with sqlite3.connect(os.path.join(tmp_path, 'index.sqlite3')) as db:
+        db.execute('DELETE FROM pages WHERE segment < 3')
+    with PageArchive(str(tmp_path), segment_bytes=200) as reopened:
+        assert dict(reopened.iter_pages()) == pages
+
+
+def test_records_are_standard_gzip(tmp_path, archive):
+    import gzip
+    archive.put('http://site.com/a', b'<html></html>')
+    archive.flush()
+    with gzip.open(os.path.join(tmp_path, 'segment-000000.warc.gz'), 'rb') as file:
+        data = file.read()
+    assert data.startswith(b'WARC/1.1\r\nWARC-Type: resource\r\nWARC-Target-URI: http://site.com/a\r\n')
@@ -0,0 +1,78 @@
+import os
+import queue
+import threading
+import pytest
+from unittest.mock import patch
+from utils.background_writer import BackgroundWriter
+
+
+def test_writes_files_and_creates_directories(tmp_path):
+    with BackgroundWriter(workers=2) as writer:
+        for i in range(50):
+            writer.submit(str(tmp_path / f'dir{i % 3}' / f'{i}.html'), f'<p>{i}</p>')
+        writer.flush()
+        assert (tmp_path / 'dir1' / '4.html').read_text(encoding='utf-8') == '<p>4</p>'
+        assert writer.stats['files'] == 50
+    assert not [name for name in os.listdir(tmp_path / 'dir0') if name.endswith('.tmp')]
+
+
+def test_directories_created_once(tmp_path):
+    os.makedirs(tmp_path / 'out')
+    with patch('os.makedirs') as mock_makedirs, BackgroundWriter() as writer:
+        for i in range(10):
+            writer.submit(str(tmp_path / 'out' / f'{i}.bin'), b'x')
+    mock_makedirs.assert_called_once_with(str(tmp_path / 'out'), exist_ok=True)
+
+
+def test_backpressure_when_queue_full(tmp_path):
+    release = threading.Event()
+    writer = BackgroundWriter(max_queue=1)
+    original = writer._write_batch
+
+    def slow_batch(batch):
+        release.wait()
+        original(batch)
+
+    writer._write_batch = slow_batch
+    writer.submit(str(tmp_path / 'a'), b'a')  # taken by the writer thread
+    writer.submit(str(tmp_path / 'b'), b'b')  # fills the queue
+    with pytest.raises(queue.Full):
+        writer.submit(str(tmp_path / 'c'), b'c', timeout=0.05)
+    release.set()
+    writer.close()
+    assert (tmp_path / 'b').read_bytes() == b'b'
+
+
+def test_flush_reports_errors(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_bytes(b'')
+    writer = BackgroundWriter()
+    writer.submit(str(blocker / 'child.txt'), b'x')
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.flush()
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(str(tmp_path / 'late'), b'x')
+
+
+def test_unexpected_errors_do_not_stop_the_writer(tmp_path):
+    writer = BackgroundWriter()
+    with pytest.raises(TypeError):
+        writer.submit(str(tmp_path / 'a.txt'), 12345)
+    write_atomic = writer._write_atomic
+
+    def fail_first(directory, path, data):
+        if path.endswith('bad.txt'):
+            raise ValueError('boom')
+        write_atomic(directory, path, data)
+
+    with patch.object(writer, '_write_atomic', side_effect=fail_first):
+        writer.submit(str(tmp_path / 'bad.txt'), b'x')
+        writer.submit(str(tmp_path / 'good.txt'), b'y')
+        with pytest.raises(OSError, match='bad.txt'):
+            writer.flush()
+    writer.submit(str(tmp_path / 'later.txt'), b'z')
+    writer.close()
+    assert (tmp_path / 'good.txt').read_bytes() == b'y'
+    assert (tmp_path / 'later.txt').read_bytes() == b'z'
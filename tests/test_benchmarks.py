@@ -0,0 +1,35 @@
+import json
+import requests
+from benchmarks.harness import compare, measure, write_report
+from benchmarks.servers import OriginServer, ProxyFarm
+from benchmarks.suites import BenchConfig, bench_download, bench_imports
+
+
+def test_proxy_farm_forwards_and_fails():
+    with OriginServer() as origin, ProxyFarm(2, failure_rate=0.0) as farm, ProxyFarm(1, failure_rate=1.0) as broken:
+        host, port = farm.lines()[0].split(':')[:2]
+        response = requests.get(f'{origin.url}/bytes/1000', proxies={'http': f'http://{host}:{port}'},
+                                headers={'Range': 'bytes=10-19'})
+        assert response.status_code == 206
+        assert response.content == bytes(range(10, 20))
+        host, port = broken.lines()[0].split(':')[:2]
+        assert requests.get(f'{origin.url}/page/3', proxies={'http': f'http://{host}:{port}'}).status_code == 502
+
+
+def test_report_roundtrip(tmp_path):
+    results = bench_download(BenchConfig(str(tmp_path), quick=True, repeat=1))
+    assert [result.params['parts'] for result in results] == [1, 4, 8]
+    assert all(result.extra['mb_per_sec'] > 0 for result in results)
+    report = str(tmp_path / 'results' / 'run.json')
+    write_report(report, results, {'quick': True})
+    with open(report) as file:
+        data = json.load(file)
+    assert data['results'][0]['name'] == 'download'
+    faster = measure('download', results[0].params, 2, lambda: None, repeat=1)
+    assert compare(report, [faster])[0].startswith('download[bytes=4194304,parts=1]:')
+
+
+def test_import_times(tmp_path):
+    results = {result.params.get('module'): result for result in bench_imports(BenchConfig(str(tmp_path), repeat=1))}
+    assert 0 < results['utils.cli'].seconds < results['utils.requests'].seconds
+    assert results[None].name == 'imports.cli_help'
@@ -0,0 +1,93 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from benchmarks.servers import OriginServer, ProxyFarm
+from utils.archive import PageArchive
+from utils.cli import main
+
+ROOT = str(Path(__file__).resolve().parents[1])
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+
+
+def test_help_starts_without_loading_commands():
+    completed = subprocess.run([sys.executable, '-m', 'utils', '--help'], cwd=ROOT, capture_output=True, text=True)
+    assert completed.returncode == 0
+    assert 'check-proxies' in completed.stdout and 'dump-archive' in completed.stdout
+    loaded = run_python('import sys, utils.cli; print(sorted(m for m in sys.modules if m.startswith("utils.")))')
+    assert loaded.strip() == "['utils.cli']"
+
+
+def test_imports_are_light_and_side_effect_free():
+    assert run_python('import sys, utils.filemanager; print("bs4" in sys.modules, "sqlite3" in sys.modules)') \
+        == 'False False\n'
+    assert run_python('import logging, utils.requests; print(logging.getLogger().handlers)') == '[]\n'
+    assert run_python('import sys, utils.requests; print("asyncio" in sys.modules, '
+                      '"concurrent.futures" in sys.modules)') == 'False False\n'
+
+
+def test_check_proxies_without_usable_proxies(tmp_path, capsys):
+    proxies = tmp_path / 'proxies.txt'
+    proxies.write_text('not a proxy\n')
+    assert main(['check-proxies', str(proxies)]) == 1
+    assert 'No usable proxy' in capsys.readouterr().err
+
+
+def test_dump_archive(tmp_path, capsys):
+    with PageArchive(str(tmp_path / 'archive')) as archive:
+        archive.put('http://a.test/1', b'<html>one</html>')
+        archive.put('http://a.test/2', b'<html>two</html>')
+
+    assert main(['dump-archive', str(tmp_path / 'archive')]) == 0
+    assert capsys.readouterr().out.splitlines() == ['http://a.test/1\t16', 'http://a.test/2\t16']
+
+    assert main(['dump-archive', str(tmp_path / 'archive'), '--key', 'http://a.test/missing']) == 1
+    assert main(['dump-archive', str(tmp_path / 'archive'), '--output', str(tmp_path / 'out')]) == 0
+    index = [json.loads(line) for line in (tmp_path / 'out' / 'index.jsonl').read_text().splitlines()]
+    assert [entry['key'] for entry in index] == ['http://a.test/1', 'http://a.test/2']
+    assert (tmp_path / 'out' / index[1]['file']).read_bytes() == b'<html>two</html>'
+
+
+@pytest.mark.parametrize('target', ['--output', '--archive'])
+def test_fetch(tmp_path, target):
+    with OriginServer() as origin:
+        urls = tmp_path / 'urls.txt'
+        urls.write_text(f'# pages\n{origin.url}/page/1\n{origin.url}/page/2\n\n{origin.url}/missing\n')
+        assert main(['fetch', str(urls), target, str(tmp_path / 'out'), '--concurrency', '2']) == 1
+
+    with pytest.raises(FileNotFoundError):
+        main(['fetch', str(tmp_path / 'missing.txt'), target, str(tmp_path / 'out')])
+    if target == '--archive':
+        with PageArchive(str(tmp_path / 'out')) as archive:
+            assert len(archive) == 2
+            assert b'item 1' in archive.get(f'{origin.url}/page/2')
+    else:
+        index = [json.loads(line) for line in (tmp_path / 'out' / 'index.jsonl').read_text().splitlines()]
+        assert sorted(entry['url'] for entry in index) == [f'{origin.url}/page/1', f'{origin.url}/page/2']
+        assert all((tmp_path / 'out' / entry['file']).exists() for entry in index)
+
+
+def test_download_and_check_proxies(tmp_path, capsys):
+    with OriginServer() as origin, ProxyFarm(2) as farm, ProxyFarm(1, failure_rate=1.0) as broken:
+        destination = tmp_path / 'file.bin'
+        assert main(['download', f'{origin.url}/bytes/100000', str(destination), '--parts', '2']) == 0
+        assert destination.read_bytes()[:256] == bytes(range(256))
+        assert destination.stat().st_size == 100000
+
+        proxies = tmp_path / 'proxies.txt'
+        proxies.write_text('\n'.join(farm.lines() + broken.lines()))
+        healthy = tmp_path / 'healthy.txt'
+        assert main(['check-proxies', str(proxies), '--url', f'{origin.url}/page/1', '--timeout', '5',
+                     '--healthy', str(healthy)]) == 1
+        assert healthy.read_text().splitlines() == farm.lines()
+        assert '2/3 proxies healthy' in capsys.readouterr().err
+        assert main(['check-proxies', str(healthy), '--url', f'{origin.url}/page/1', '--timeout', '5']) == 0
+
+        healthy.write_text('\n'.join(farm.lines() + ['socks5://127.0.0.1:1080']))
+        assert main(['check-proxies', str(healthy), '--url', f'{origin.url}/page/1', '--timeout', '5']) == 0
+        assert '2/2 proxies healthy, 1 skipped' in capsys.readouterr().err
@@ -0,0 +1,61 @@
+import time
+import pytest
+from requests.cookies import RequestsCookieJar, create_cookie
+from utils.cookie_store import CookieStore
+
+
+@pytest.fixture
+def store():
+    return CookieStore()
+
+
+def test_get_missing(store):
+    assert store.get('http://site.com/page') is None
+
+
+def test_set_and_reuse_per_domain(store):
+    store.set('http://site.com/a', {'session': 'abc'})
+    jar = store.get('http://site.com/b')
+    assert jar.get('session') == 'abc'
+    assert store.get('http://other.com/') is None
+    assert store.stats == {'reused': 1, 'primed': 1, 'rejected': 0, 'expired': 0}
+
+
+def test_expired_cookies_trigger_priming(store):
+    jar = RequestsCookieJar()
+    jar.set_cookie(create_cookie('session', 'abc', domain='site.com', expires=int(time.time()) - 10))
+    store.set('http://site.com/', jar)
+    assert store.get('http://site.com/') is None
+    assert store.stats['expired'] == 1
+
+
+def test_max_age(store):
+    store.max_age = 0
+    store.set('http://site.com/', {'session': 'abc'})
+    time.sleep(0.01)
+    assert store.get('http://site.com/') is None
+
+
+def test_per_proxy_jars():
+    store = CookieStore(per_proxy=True)
+    proxy_a, proxy_b = {'http': 'http://a:1'}, {'http': 'http://b:1'}
+    store.set('http://site.com/', {'session': 'a'}, proxy_a)
+    assert store.get('http://site.com/', proxy_a).get('session') == 'a'
+    assert store.get('http://site.com/', proxy_b) is None
+
+
+def test_update_and_invalidate(store):
+    store.set('http://site.com/', {'session': 'abc'})
+    store.update('http://site.com/', {'tracking': 'xyz'})
+    assert store.get('http://site.com/').get('tracking') == 'xyz'
+    store.invalidate('http://site.com/')
+    assert store.get('http://site.com/') is None
+    assert store.stats['rejected'] == 1
+
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / 'cookies.json')
+    store = CookieStore(path=path)
+    store.set('http://site.com/', {'session': 'abc'})
+    store.save()
+    assert CookieStore(path=path).get('http://site.com/').get('session') == 'abc'
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import random
+
+from unittest.mock import patch
+
+import pytest
+
+from utils.dedup import EXACT, NEAR, ContentDeduplicator, simhash64
+
+WORDS = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliet',
+         'kilo', 'lima', 'mike', 'november', 'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango']
+
+
+def _page(seed, session='abc'):
+    rng = random.Random(seed)
+    text = ' '.join(rng.choice(WORDS) for _ in range(400))
+    return (f'<html><head><script>var s="{session}";</script></head>'
+            f'<body><p>{text}</p><a href="?sid={session}">next</a></body></html>').encode('utf-8')
+
+
+def test_simhash_matches_column_majority():
+    features = [str(i).encode() for i in range(101)]
+    hashes = [int.from_bytes(hashlib.blake2b(feature, digest_size=8).digest(), 'little') for feature in features]
+    expected = sum(1 << bit for bit in range(64) if sum(h >> bit & 1 for h in hashes) * 2 > len(hashes))
+    assert simhash64(features) == expected
+    assert simhash64([]) == 0
+
+
+def test_exact_duplicates():
+    dedup = ContentDeduplicator()
+    assert not dedup.observe('a.html', b'<p>same</p>').duplicate
+    result = dedup.observe('b.html', b'<p>same</p>')
+    assert (result.kind, result.original, result.distance) == (EXACT, 'a.html', 0)
+    assert json.loads(result.pointer())['duplicate_of'] == 'a.html'
+    assert dedup.stats['bytes_saved'] == len(b'<p>same</p>')
+
+
+def test_near_duplicates_are_found_through_the_band_index():
+    dedup = ContentDeduplicator(near_duplicates=True, max_distance=6)
+    assert not dedup.observe('page-1.html', _page(1, 'session-one')).duplicate
+    assert not dedup.observe('page-2.html', _page(2)).duplicate
+    result = dedup.observe('page-1b.html', _page(1, 'session-two'))
+    assert result.kind == NEAR
+    assert result.original == 'page-1.html'
+    report = dedup.report()
+    assert report['near'] == 1 and report['unique'] == 2
+    assert report['duplicate_ratio'] == pytest.approx(1 / 3)
+
+
+def test_near_detection_can_be_skipped_for_binary_content():
+    dedup = ContentDeduplicator(near_duplicates=True, max_distance=6)
+    dedup.observe('page-1.html', _page(1, 'one'))
+    assert not dedup.observe('page-1.bin', _page(1, 'two'), near=False).duplicate
+
+
+def test_single_band_holds_hashes_with_the_top_bit_set():
+    dedup = ContentDeduplicator(near_duplicates=True, max_distance=0)
+    with patch('utils.dedup.simhash64', return_value=(1 << 63) | 5):
+        assert not dedup.observe('a.html', _page(5, 'one')).duplicate
+        result = dedup.observe('b.html', _page(5, 'two'))
+    assert (result.kind, result.original, result.distance) == (NEAR, 'a.html', 0)
+
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / 'dedup.sqlite3')
+    dedup = ContentDeduplicator(path, near_duplicates=True)
+    dedup.observe('a.html', _page(3))
+    dedup.close()
+    dedup = ContentDeduplicator(path, near_duplicates=True)
+    assert dedup.observe('b.html', _page(3)).original == 'a.html'
+    dedup.close()
+
+
+def test_rewritten_paths_release_their_content():
+    dedup = ContentDeduplicator(near_duplicates=True, max_distance=6)
+    dedup.observe('a.html', _page(4, 'one'))
+    assert not dedup.observe('a.html', _page(4, 'two')).duplicate  # an update, not a copy of itself
+
+    dedup.observe('x.bin', b'AAAA')
+    dedup.observe('y.bin', b'AAAA')
+    dedup.observe('z.bin', b'AAAA')
+    result = dedup.observe('x.bin', b'BBBB')
+    assert (result.duplicate, result.relocated, result.repointed) == (False, 'y.bin', ['z.bin'])
+    assert dedup.observe('w.bin', b'AAAA').original == 'y.bin'
+    result = dedup.observe('y.bin', b'BBBB')
+    assert (result.original, result.relocated, result.repointed) == ('x.bin', 'z.bin', ['w.bin'])
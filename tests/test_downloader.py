@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from utils.downloader import DownloadError, RangeDownloader
+from utils.requests import RequestHandler
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MiB
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with Range support unless the path says otherwise."""
+    requested_ranges = []
+
+    def do_GET(self):
+        ranges = self.headers.get('Range')
+        if self.path == '/gzip' and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(PAYLOAD)
+            self.send_response(200)
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path in ('/plain', '/chunked', '/gzip') or ranges is None:
+            self.send_response(200)
+            if self.path != '/chunked':
+                self.send_header('Content-Length', str(len(PAYLOAD)))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+            return
+        start, end = (int(value) for value in ranges.split('=')[1].split('-'))
+        self.requested_ranges.append((start, end))
+        body = PAYLOAD[start:end + 1]
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{end}/{len(PAYLOAD)}')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FileHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def downloader():
+    return RangeDownloader(RequestHandler(), parts=4, min_part_size=64 * 1024, buffer_size=64 * 1024)
+
+
+def test_parallel_range_download(server, downloader, tmp_path):
+    FileHandler.requested_ranges.clear()
+    destination = str(tmp_path / 'file.bin')
+    checksum = 'sha256:' + hashlib.sha256(PAYLOAD).hexdigest()
+
+    downloader.download(f'{server}/file', destination, checksum=checksum)
+
+    with open(destination, 'rb') as file:
+        assert file.read() == PAYLOAD
+    assert len(FileHandler.requested_ranges) == 5  # probe + 4 parts
+    assert not os.path.exists(destination + '.part.json')
+
+
+def test_resume_from_sidecar(server, downloader, tmp_path):
+    destination = str(tmp_path / 'file.bin')
+    half = len(PAYLOAD) // 2
+    with open(destination + '.part', 'wb') as file:
+        file.write(PAYLOAD[:half])
+        file.truncate(len(PAYLOAD))
+    with open(destination + '.part.json', 'w') as file:
+        json.dump({'url': f'{server}/file', 'total': len(PAYLOAD), 'etag': '"v1"',
+                   'ranges': [[0, len(PAYLOAD) - 1, half]]}, file)
+    FileHandler.requested_ranges.clear()
+
+    downloader.download(f'{server}/file', destination)
+
+    assert FileHandler.requested_ranges == [(half, len(PAYLOAD) - 1)]
+    with open(destination, 'rb') as file:
+        assert file.read() == PAYLOAD
+
+
+@pytest.mark.parametrize('path', ['/plain', '/chunked', '/gzip'])
+def test_single_stream_fallback(server, downloader, tmp_path, path):
+    destination = str(tmp_path / 'file.bin')
+    progress = []
+    downloader.progress_callback = progress.append
+
+    downloader.download(f'{server}{path}', destination)
+
+    assert os.path.getsize(destination) == len(PAYLOAD)
+    assert progress[-1].downloaded == len(PAYLOAD)
+
+
+def test_checksum_mismatch(server, downloader, tmp_path):
+    with pytest.raises(DownloadError):
+        downloader.download(f'{server}/file', str(tmp_path / 'file.bin'), checksum='md5:00')
+    assert not os.path.exists(tmp_path / 'file.bin')
+
+
+def test_progress_is_rate_limited(server, tmp_path):
+    progress = []
+    downloader = RangeDownloader(RequestHandler(), parts=2, min_part_size=1, buffer_size=1024,
+                                 progress_callback=progress.append, progress_interval=60)
+    downloader.download(f'{server}/file', str(tmp_path / 'file.bin'))
+    assert len(progress) <= 2
+    assert progress[-1].percent == 100
+
+
+def test_request_handler_download_without_content_length(server, tmp_path, capsys):
+    destination = str(tmp_path / 'file.bin')
+    RequestHandler().download_large_file_with_progress(f'{server}/chunked', destination)
+    assert 'Download completed' in capsys.readouterr().out
+    assert os.path.getsize(destination) == len(PAYLOAD)
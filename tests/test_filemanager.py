@@ -4,6 +4,7 @@ import pytest
 import csv
 from unittest.mock import patch, mock_open, MagicMock
 from utils.filemanager import FileManager
+from utils.background_writer import BackgroundWriter
 from bs4 import BeautifulSoup
 
 @pytest.fixture
@@ -84,3 +85,134 @@ def test_get_files_from_path(file_manager):
     with patch('os.listdir', return_value=files):
         result = file_manager.get_files_from_path('fake_path', endwith='.txt')
         assert result == ['file1.txt', 'file2.txt']
+
+def test_save_with_background_writer(tmp_path):
+    soup = BeautifulSoup('<html></html>', 'html.parser')
+    with FileManager(writer=BackgroundWriter()) as manager:
+        manager.save_soup(str(tmp_path), 'page', soup)
+        manager.save_json(str(tmp_path / 'json'), 'data', {'key': 'value'})
+        manager.save_pdf(str(tmp_path), 'doc', b'%PDF-1.4')
+        manager.save_file(str(tmp_path / 'raw.bin'), b'binary data')
+        manager.flush()
+        assert (tmp_path / 'page.html').read_text(encoding='utf-8') == soup.prettify()
+    assert json.loads((tmp_path / 'json' / 'data.json').read_text()) == {'key': 'value'}
+    assert (tmp_path / 'doc.pdf').read_bytes() == b'%PDF-1.4'
+    assert (tmp_path / 'raw.bin').read_bytes() == b'binary data'
+
+def test_iter_html_from_path(file_manager, tmp_path):
+    for i in range(20):
+        (tmp_path / f'page{i}.html').write_text(f'<p>{i}</p>', encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('skip')
+    (tmp_path / 'sub.html').mkdir()
+
+    pages = dict(file_manager.iter_html_from_path(str(tmp_path)))
+    assert len(pages) == 20
+    assert pages['page7'] == '<p>7</p>'
+
+    filtered = dict(file_manager.iter_html_from_path(str(tmp_path), name_filter=lambda name: name.endswith('1')))
+    assert sorted(filtered) == ['page1', 'page11']
+
+
+def test_iter_html_from_path_shards_do_not_overlap(file_manager, tmp_path):
+    for i in range(30):
+        (tmp_path / f'page{i}.html').write_text('x')
+    shards = [{name for name, _ in file_manager.iter_html_from_path(str(tmp_path), shard=(i, 3))} for i in range(3)]
+    assert set.union(*shards) == {f'page{i}' for i in range(30)}
+    assert sum(len(shard) for shard in shards) == 30
+    with pytest.raises(ValueError):
+        list(file_manager.iter_html_from_path(str(tmp_path), shard=(3, 3)))
+
+
+def test_iter_html_from_path_mmap(file_manager, tmp_path):
+    (tmp_path / 'big.html').write_text('<p>' + 'á' * 1000 + '</p>', encoding='utf-8')
+    (tmp_path / 'empty.html').write_text('')
+    pages = dict(file_manager.iter_html_from_path(str(tmp_path), mmap_threshold=100))
+    assert pages['big'] == '<p>' + 'á' * 1000 + '</p>'
+    assert pages['empty'] == ''
+    for name, content in file_manager.iter_html_from_path(str(tmp_path), mmap_threshold=100, decode=False):
+        if name == 'big':
+            assert content[:3] == b'<p>'
+
+
+def test_iter_html_from_path_keeps_line_endings_on_both_paths(file_manager, tmp_path):
+    (tmp_path / 'crlf.html').write_bytes(b'<html>\r\nA</html>')
+    for threshold in (None, 1):
+        assert dict(file_manager.iter_html_from_path(str(tmp_path), mmap_threshold=threshold)) == \
+            {'crlf': '<html>\r\nA</html>'}
+
+
+def test_iter_json(file_manager, tmp_path):
+    (tmp_path / 'items.json').write_text(json.dumps([{'id': i} for i in range(100)]), encoding='utf-8')
+    (tmp_path / 'items.jsonl').write_text('{"id": 1}\n{"id": 2}\n', encoding='utf-8')
+    assert list(file_manager.iter_json(str(tmp_path / 'items.json'), chunk_size=16)) == [{'id': i} for i in range(100)]
+    assert list(file_manager.iter_json(str(tmp_path / 'items.jsonl'))) == [{'id': 1}, {'id': 2}]
+
+
+def test_save_json_compact(file_manager, tmp_path):
+    file_manager.save_json(str(tmp_path / 'out'), 'data', {'key': [1, 2]}, compact=True)
+    assert (tmp_path / 'out' / 'data.json').read_text() == '{"key":[1,2]}'
+
+
+def test_save_file_writes_pointer_for_duplicates(tmp_path):
+    from utils.dedup import ContentDeduplicator
+    from utils.metrics import Metrics
+
+    metrics = Metrics()
+    manager = FileManager(metrics=metrics, dedup=ContentDeduplicator())
+    first, second = str(tmp_path / 'a.html'), str(tmp_path / 'b.html')
+    manager.save_file(first, b'<p>same</p>')
+    manager.save_file(second, b'<p>same</p>')
+    assert not os.path.exists(second)
+    assert manager.resolve_path(second) == first
+    assert manager.resolve_path(first) == first
+    assert 'scraper_file_duplicates_total{kind="file",match="exact"} 1' in metrics.to_prometheus()
+
+    manager.save_file(second, b'<p>different</p>')
+    assert not os.path.exists(second + '.ref')
+    assert manager.resolve_path(second) == second
+
+
+def test_duplicate_replaces_a_queued_write_of_the_same_path(tmp_path):
+    import time
+    from utils.dedup import ContentDeduplicator
+
+    write_atomic = BackgroundWriter._write_atomic
+
+    def slow_write_atomic(self, directory, path, data):
+        time.sleep(0.1)
+        write_atomic(self, directory, path, data)
+
+    with patch.object(BackgroundWriter, '_write_atomic', slow_write_atomic), \
+            FileManager(writer=BackgroundWriter(), dedup=ContentDeduplicator()) as manager:
+        manager.save_file(str(tmp_path / 'b.bin'), b'BBBB')
+        manager.save_file(str(tmp_path / 'a.bin'), b'AAAA')
+        manager.save_file(str(tmp_path / 'b.bin'), b'AAAA')
+    assert not (tmp_path / 'b.bin').exists()
+    assert manager.resolve_path(str(tmp_path / 'b.bin')) == str(tmp_path / 'a.bin')
+
+
+def test_overwriting_deduplicated_files_keeps_every_path_readable(tmp_path):
+    from utils.dedup import ContentDeduplicator
+
+    manager = FileManager(dedup=ContentDeduplicator(near_duplicates=True))
+    page = '<html><body>' + ' '.join(f'word{i}' for i in range(300)) + ' price {}</body></html>'
+    manager.save_file(str(tmp_path / 'a.html'), page.format(10))
+    manager.save_file(str(tmp_path / 'a.html'), page.format(99))
+    assert (tmp_path / 'a.html').read_text() == page.format(99)
+
+    def read(name):
+        with open(manager.resolve_path(str(tmp_path / name)), 'rb') as file:
+            return file.read()
+
+    manager.save_file(str(tmp_path / 'x.bin'), b'AAAA')
+    manager.save_file(str(tmp_path / 'x.bin'), b'BBBB')
+    manager.save_file(str(tmp_path / 'y.bin'), b'AAAA')
+    assert (tmp_path / 'y.bin').read_bytes() == b'AAAA'
+
+    for name in ('p.bin', 'q.bin'):
+        manager.save_file(str(tmp_path / name), b'AAAA')
+    manager.save_file(str(tmp_path / 'y.bin'), b'BBBB')  # the stored copy becomes a pointer itself
+    assert [read(name) for name in ('x.bin', 'y.bin', 'p.bin', 'q.bin')] == [b'BBBB', b'BBBB', b'AAAA', b'AAAA']
+    assert (tmp_path / 'p.bin').exists() and (tmp_path / 'q.bin.ref').exists()
+    manager.save_file(str(tmp_path / 'r.bin'), b'AAAA')
+    assert manager.resolve_path(str(tmp_path / 'r.bin')) == str(tmp_path / 'p.bin')
@@ -0,0 +1,130 @@
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.frontier import BloomFilter, Frontier, normalize_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTP://Example.COM:80/a/./b/../c?b=2&a=1#top', 'http://example.com/a/c?a=1&b=2'),
+    ('https://example.com:443', 'https://example.com/'),
+    ('http://example.com:8080/x?utm_source=mail&id=3', 'http://example.com:8080/x?id=3'),
+    ('http://example.com/%7euser/a%2fb?q=%c3%a9', 'http://example.com/~user/a%2Fb?q=%C3%A9'),
+    ('http://münchen.de/', 'http://xn--mnchen-3ya.de/'),
+    ('http://[::1]:8080/', 'http://[::1]:8080/'),
+    ('mailto:someone@example.com', None),
+    ('http://example.com:99999/', None),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_url_resolves_relative_links():
+    assert normalize_url('../other?x=1', base='http://example.com/dir/page.html') == 'http://example.com/other?x=1'
+
+
+def test_bloom_filter_persists(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    bloom = BloomFilter(path, capacity=1000)
+    assert bloom.add('a')
+    assert not bloom.add('a')
+    assert 'a' in bloom
+    bloom.close()
+    bloom = BloomFilter(path, capacity=1)
+    assert 'a' in bloom
+    false_positives = sum(f'missing-{i}' in bloom for i in range(1000))
+    assert false_positives < 50
+    bloom.close()
+
+
+@pytest.fixture
+def frontier(tmp_path):
+    frontier = Frontier(str(tmp_path / 'crawl'), capacity=1000, delay=1.0, clock=MagicMock(return_value=0.0))
+    yield frontier
+    frontier.close()
+
+
+def test_add_deduplicates(frontier):
+    assert frontier.add('http://example.com/a?b=1&a=2')
+    assert not frontier.add('http://EXAMPLE.com/a?a=2&b=1#x')
+    assert not frontier.add('ftp://example.com/')
+    assert frontier.seen('http://example.com/a?a=2&b=1')
+    assert not frontier.seen('http://example.com/b')
+    assert len(frontier) == 1
+    assert frontier.stats['duplicates'] == 1
+    assert frontier.stats['invalid'] == 1
+
+
+def test_pop_respects_priority_and_politeness(frontier):
+    frontier.add('http://a.com/low', priority=5)
+    frontier.add('http://a.com/high', priority=1)
+    frontier.add('http://b.com/1')
+    first, second = frontier.pop(), frontier.pop()
+    assert {first.host, second.host} == {'a.com', 'b.com'}
+    assert (first if first.host == 'a.com' else second).url == 'http://a.com/high'
+    assert frontier.pop() is None
+    assert frontier.wait_time() == 1.0
+    frontier.clock.return_value = 1.0
+    assert frontier.pop().url == 'http://a.com/low'
+    assert frontier.pop() is None
+    assert frontier.wait_time() is None
+
+
+def test_release_and_defer_host(frontier):
+    frontier.add('http://a.com/1')
+    item = frontier.pop()
+    frontier.release(item, delay=30.0)
+    frontier.clock.return_value = 10.0
+    assert frontier.pop() is None
+    frontier.clock.return_value = 30.0
+    assert frontier.pop().url == item.url
+
+
+
+def test_shorter_deferral_does_not_cut_a_longer_one(frontier):
+    frontier.add('http://a.com/1')
+    frontier.add('http://a.com/2')
+    frontier.release(frontier.pop(), delay=10.0)
+    frontier.defer_host('a.com', 1.0)
+    frontier.clock.return_value = 2.0
+    assert frontier.pop() is None
+    assert frontier.wait_time() == 8.0
+    frontier.clock.return_value = 10.0
+    assert frontier.pop() is not None
+
+def test_resumes_after_crash(tmp_path):
+    directory = str(tmp_path / 'crawl')
+    frontier = Frontier(directory, capacity=1000, delay=0.0)
+    for i in range(5):
+        frontier.add(f'http://example.com/{i}')
+    done = frontier.pop()
+    frontier.complete(done)
+    in_flight = frontier.pop()
+    frontier.checkpoint()
+    frontier.add('http://example.com/lost')
+    frontier._db.close()  # crash: the last add was never committed
+    frontier._bloom.close()
+
+    frontier = Frontier(directory, capacity=1000, delay=0.0)
+    assert len(frontier) == 4
+    assert frontier.seen(in_flight.url)
+    assert not frontier.seen('http://example.com/lost')
+    assert frontier.add('http://example.com/lost')
+    assert not frontier.add(done.url)
+    urls = set()
+    while (item := frontier.pop()) is not None:
+        urls.add(item.url)
+    assert in_flight.url in urls and done.url not in urls
+    frontier.close()
+    assert os.path.exists(os.path.join(directory, 'seen.bloom'))
+
+
+def test_checkpoint_flushes_bloom_filter_before_commit(frontier):
+    frontier.add('http://example.com/a')
+    flushed_in_transaction = []
+    flush = frontier._bloom.flush
+    frontier._bloom.flush = lambda: (flushed_in_transaction.append(frontier._db.in_transaction), flush())
+    frontier.checkpoint()
+    assert flushed_in_transaction == [True]
+    assert not frontier._db.in_transaction
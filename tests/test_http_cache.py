@@ -0,0 +1,93 @@
+import time
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from utils.http_cache import ResponseCache
+
+
+def make_response(body=b'<html>page</html>', status=200, headers=None, url='http://site.com/page'):
+    response = requests.Response()
+    response._content = body
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.url = url
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=100, default_ttl=60)
+    yield cache
+    cache.close()
+
+
+def test_store_and_hit(cache):
+    assert cache.lookup('GET', 'http://site.com/page') is None
+    assert cache.store('GET', 'http://site.com/page', {}, make_response(headers={'Content-Type': 'text/html; charset=utf-8'}))
+
+    entry = cache.lookup('GET', 'http://site.com/page')
+    assert entry.fresh
+    response = cache.hit(entry)
+    assert response.content == b'<html>page</html>'
+    assert response.text == '<html>page</html>'
+    assert response.from_cache is True
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+    assert cache.stats['bytes_saved'] == 17
+
+
+def test_vary_headers_change_key(tmp_path):
+    cache = ResponseCache(str(tmp_path), vary_headers=['Accept-Language'])
+    assert cache.key_for('GET', 'http://a/', {'accept-language': 'pt'}) != cache.key_for('GET', 'http://a/', {'Accept-Language': 'en'})
+    assert cache.key_for('GET', 'http://a/', {'User-Agent': 'x'}) == cache.key_for('GET', 'http://a/', {'User-Agent': 'y'})
+    cache.close()
+
+
+def test_identical_bodies_stored_once(cache):
+    cache.store('GET', 'http://site.com/a', {}, make_response(body=b'x' * 40))
+    cache.store('GET', 'http://site.com/b', {}, make_response(body=b'x' * 40))
+    assert cache.total_bytes == 40
+
+
+def test_lru_eviction_under_budget(cache):
+    cache.store('GET', 'http://site.com/a', {}, make_response(body=b'a' * 40))
+    cache.store('GET', 'http://site.com/b', {}, make_response(body=b'b' * 40))
+    cache.hit(cache.lookup('GET', 'http://site.com/a'))
+    cache.store('GET', 'http://site.com/c', {}, make_response(body=b'c' * 40))
+
+    assert cache.total_bytes == 80
+    assert cache.lookup('GET', 'http://site.com/b') is None
+    assert cache.lookup('GET', 'http://site.com/a') is not None
+    assert cache.stats['evicted'] == 1
+
+
+def test_revalidation(cache):
+    cache.store('GET', 'http://site.com/page', {}, make_response(headers={'ETag': '"v1"', 'Cache-Control': 'max-age=0'}))
+    entry = cache.lookup('GET', 'http://site.com/page')
+    assert not entry.fresh
+    assert cache.conditional_headers(entry) == {'If-None-Match': '"v1"'}
+
+    response = cache.revalidated(entry, make_response(body=b'', status=304, headers={'Cache-Control': 'max-age=600'}))
+    assert response.status_code == 200
+    assert response.content == b'<html>page</html>'
+    assert cache.lookup('GET', 'http://site.com/page').expires_at > time.time() + 500
+    assert cache.stats['revalidated'] == 1
+
+
+def test_ttl_rules_and_no_store(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl_rules=[(r'/static/', 86400)], default_ttl=10)
+    cache.store('GET', 'http://site.com/static/app.js', {}, make_response())
+    assert cache.lookup('GET', 'http://site.com/static/app.js').expires_at > time.time() + 80000
+    assert not cache.store('GET', 'http://site.com/private', {}, make_response(headers={'Cache-Control': 'no-store'}))
+    assert not cache.store('GET', 'http://site.com/missing', {}, make_response(status=404))
+    cache.close()
+
+
+def test_index_survives_reopen(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store('GET', 'http://site.com/page', {}, make_response())
+    cache.close()
+    reopened = ResponseCache(str(tmp_path))
+    assert reopened.total_bytes == 17
+    assert reopened.lookup('GET', 'http://site.com/page') is not None
+    reopened.close()
@@ -0,0 +1,41 @@
+import io
+import json
+import pytest
+from unittest.mock import patch
+from utils import json_stream
+from utils.json_stream import dumps_compact, iter_json_array, iter_json_lines
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 1 << 16])
+def test_iter_json_array_across_chunk_boundaries(chunk_size):
+    data = [1234567, -0.5e10, 'a "quoted" ]', {'nested': [1, 2, {'x': None}]}, True, False, None, [], {}]
+    text = '  ' + json.dumps(data, indent=2) + '\n'
+    assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == data
+
+
+def test_iter_json_array_empty_and_non_array():
+    assert list(iter_json_array(io.StringIO(' [ ] '))) == []
+    assert list(iter_json_array(io.StringIO(''))) == []
+    assert list(iter_json_array(io.StringIO('{"a": 1} {"b": 2}'), chunk_size=2)) == [{'a': 1}, {'b': 2}]
+
+
+@pytest.mark.parametrize('text', ['[1, 2', '[1 2]', '[1, {"a": ]'])
+def test_iter_json_array_invalid(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(text), chunk_size=2))
+
+
+def test_iter_json_array_is_lazy():
+    stream = io.StringIO('[' + ','.join(['{"i": 0}'] * 10000) + ']')
+    items = iter_json_array(stream, chunk_size=64)
+    assert next(items) == {'i': 0}
+    assert stream.tell() < 1024
+
+
+@pytest.mark.parametrize('backend', [None, json_stream.orjson])
+def test_iter_json_lines_and_compact_dump(backend):
+    with patch.object(json_stream, 'orjson', backend):
+        records = list(iter_json_lines(io.StringIO('{"a": 1}\n\n[2, 3]\n')))
+        assert records == [{'a': 1}, [2, 3]]
+        assert dumps_compact({'a': [1, 2], 'b': 'ç'}) == '{"a":[1,2],"b":"ç"}'.encode('utf-8')
+        assert json.loads(dumps_compact({1: 'non-string key'})) == {'1': 'non-string key'}
@@ -0,0 +1,61 @@
+import csv
+import json
+import pytest
+from utils.parse_pipeline import ParsePipeline, resolve_parser
+
+
+def extract_title(name, soup):
+    if name == 'broken':
+        raise ValueError('cannot parse')
+    if name == 'empty':
+        return None
+    return {'name': name, 'title': soup.title.string}
+
+
+def extract_links(name, soup):
+    return [[name, link['href']] for link in soup.find_all('a')]
+
+
+def make_pages(count):
+    return [(f'page{i}', f'<html><head><title>T{i}</title></head><body><a href="/{i}">x</a></body></html>') for i in range(count)]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_iter_rows(workers):
+    pipeline = ParsePipeline(extract_title, workers=workers, chunk_size=3, max_in_flight=2)
+    pages = make_pages(10) + [('broken', '<html></html>'), ('empty', '<html></html>')]
+    rows = list(pipeline.iter_rows(iter(pages)))
+    assert sorted(row['title'] for row in rows) == sorted(f'T{i}' for i in range(10))
+    assert pipeline.stats.pages == 12
+    assert pipeline.stats.rows == 10
+    assert pipeline.stats.errors == 1
+    assert pipeline.stats.pages_per_sec > 0
+
+
+def test_run_writes_csv(tmp_path):
+    output = str(tmp_path / 'titles.csv')
+    stats = ParsePipeline(extract_title, workers=2, chunk_size=2).run(make_pages(5), output)
+    with open(output, newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    assert stats.rows == 5
+    assert sorted(row['title'] for row in rows) == [f'T{i}' for i in range(5)]
+
+
+def test_run_writes_jsonl_with_list_rows(tmp_path):
+    output = str(tmp_path / 'links.jsonl')
+    ParsePipeline(extract_links, workers=1).run(make_pages(3), output)
+    with open(output, encoding='utf-8') as file:
+        rows = [json.loads(line) for line in file]
+    assert sorted(rows) == [['page0', '/0'], ['page1', '/1'], ['page2', '/2']]
+
+
+def test_progress_callback():
+    reports = []
+    pipeline = ParsePipeline(extract_title, workers=1, chunk_size=1, progress_callback=reports.append, progress_interval=0)
+    list(pipeline.iter_rows(make_pages(3)))
+    assert len(reports) == 3
+
+
+def test_resolve_parser():
+    assert resolve_parser('html.parser') == 'html.parser'
+    assert resolve_parser('auto') in ('lxml', 'html.parser')
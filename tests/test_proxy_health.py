@@ -0,0 +1,119 @@
+import asyncio
+import base64
+from unittest.mock import MagicMock
+from utils.proxy_health import ProxyHealthChecker, ProxyCheckResult
+
+
+async def _origin_handler(reader, writer):
+    await reader.readuntil(b'\r\n\r\n')
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok')
+    await writer.drain()
+    writer.close()
+
+
+async def _pipe(reader, writer):
+    try:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def _proxy_handler(origin_port, credentials='user:pass', hang=False):
+    """Minimal forward proxy: absolute-form GET and CONNECT towards the local origin."""
+    expected_auth = f'Basic {base64.b64encode(credentials.encode()).decode()}'.encode()
+
+    async def handler(reader, writer):
+        head = await reader.readuntil(b'\r\n\r\n')
+        if hang:
+            await asyncio.sleep(10)
+        if expected_auth not in head:
+            writer.write(b'HTTP/1.1 407 Proxy Authentication Required\r\nContent-Length: 0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+            return
+        origin_reader, origin_writer = await asyncio.open_connection('127.0.0.1', origin_port)
+        if head.startswith(b'CONNECT'):
+            writer.write(b'HTTP/1.1 200 Connection established\r\n\r\n')
+            await writer.drain()
+        else:
+            origin_writer.write(head)
+            await origin_writer.drain()
+        await asyncio.gather(_pipe(reader, origin_writer), _pipe(origin_reader, writer))
+
+    return handler
+
+
+def _proxy(port, username='user', password='pass'):
+    return {
+        'server': f'http://127.0.0.1:{port}',
+        'ip': '127.0.0.1',
+        'port': str(port),
+        'username': username,
+        'password': password,
+    }
+
+
+async def _run_checks(checker_kwargs, proxy_specs):
+    origin = await asyncio.start_server(_origin_handler, '127.0.0.1', 0)
+    origin_port = origin.sockets[0].getsockname()[1]
+    servers, proxies = [origin], []
+    for credentials, hang in proxy_specs:
+        server = await asyncio.start_server(_proxy_handler(origin_port, hang=hang), '127.0.0.1', 0)
+        servers.append(server)
+        username, password = credentials.split(':')
+        proxies.append(_proxy(server.sockets[0].getsockname()[1], username, password))
+    checker = ProxyHealthChecker(check_url=f'http://127.0.0.1:{origin_port}/ip', **checker_kwargs)
+    try:
+        return await checker.check_all(proxies)
+    finally:
+        for server in servers:
+            server.close()
+
+
+def test_check_all_forward_proxy():
+    results = asyncio.run(_run_checks({}, [('user:pass', False), ('bad:creds', False)]))
+    assert results[0].ok is True
+    assert results[0].status_code == 200
+    assert results[0].connect_latency is not None
+    assert results[0].ttfb >= results[0].connect_latency
+    assert results[1].ok is False
+    assert results[1].status_code == 407
+
+
+def test_check_all_connect_tunnel():
+    results = asyncio.run(_run_checks({'tunnel': True}, [('user:pass', False), ('bad:creds', False)]))
+    assert results[0].ok is True
+    assert results[1].ok is False
+    assert results[1].error == 'CONNECT refused with status 407'
+
+
+def test_check_all_timeout_and_refused():
+    results = asyncio.run(_run_checks({'timeout': 0.2, 'concurrency': 1}, [('user:pass', True)]))
+    assert results[0].ok is False
+    assert results[0].error == 'timeout'
+
+    refused = ProxyHealthChecker(check_url='http://127.0.0.1/', timeout=1).run([_proxy(1)])
+    assert refused[0].ok is False
+    assert refused[0].error.startswith('ConnectionRefusedError')
+
+
+def test_seed_marks_proxy_manager():
+    manager = MagicMock()
+    good, bad = _proxy(1), _proxy(2)
+    ProxyHealthChecker.seed(manager, [
+        ProxyCheckResult(proxy=good, ok=True, ttfb=0.25),
+        ProxyCheckResult(proxy=bad, ok=False, error='timeout'),
+    ])
+    manager.mark_proxy_as_successful.assert_called_once_with(good, latency=0.25)
+    manager.mark_proxy_as_failed.assert_called_once_with(bad)
+
+
+def test_unsupported_schemes_are_skipped():
+    manager = MagicMock()
+    manager.proxy_list = [dict(_proxy(1), scheme='socks5')]
+    results = ProxyHealthChecker(check_url='http://127.0.0.1/', timeout=1).check_manager(manager)
+    assert results[0].skipped is True and results[0].ok is False
+    assert results[0].error == "unsupported proxy scheme 'socks5'"
+    manager.mark_proxy_as_failed.assert_not_called()
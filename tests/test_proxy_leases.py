@@ -0,0 +1,109 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.manager_proxies import ProxyPoolExhaustedError
+from utils.proxy_leases import LeaseManager, LeaseTimeoutError
+
+
+@pytest.fixture
+def leases(make_proxy_manager):
+    return LeaseManager(make_proxy_manager(3), ttl=10.0, clock=MagicMock(return_value=0.0))
+
+
+def test_exclusive_leases_use_distinct_proxies(leases):
+    held = [leases.acquire() for _ in range(3)]
+    assert len({lease.slot for lease in held}) == 3
+    with pytest.raises(LeaseTimeoutError):
+        leases.acquire(timeout=0)
+    leases.release(held[1])
+    assert leases.acquire(timeout=0).slot == held[1].slot
+
+
+def test_max_concurrent_spreads_load(leases):
+    leases.max_concurrent = 2
+    held = [leases.acquire() for _ in range(6)]
+    assert all(leases.load(slot) == 2 for slot in range(3))
+    assert leases.held() == 6
+    for lease in held:
+        assert leases.release(lease)
+    assert not leases.release(held[0])
+    assert leases.held() == 0
+
+
+def test_expired_lease_is_reclaimed(leases):
+    first = leases.acquire()
+    leases.acquire()
+    leases.acquire()
+    leases.clock.return_value = 5.0
+    assert leases.renew(first)
+    leases.clock.return_value = 12.0
+    lease = leases.acquire(timeout=0)
+    assert lease.slot != first.slot
+    assert not first.released
+    leases.clock.return_value = 16.0
+    assert leases.held() == 1
+    assert not leases.renew(first)
+
+
+def test_sticky_key_keeps_its_proxy(leases):
+    lease = leases.acquire(key='shop.example')
+    leases.release(lease)
+    for _ in range(5):
+        other = leases.acquire()
+        leases.release(other)
+        again = leases.acquire(key='shop.example')
+        assert again.slot == lease.slot
+        leases.release(again)
+
+
+def test_sticky_key_rebinds_after_failure(leases):
+    lease = leases.acquire(key='session-1')
+    leases.release(lease, success=False)
+    again = leases.acquire(key='session-1')
+    assert again.rebound
+    assert again.slot != lease.slot
+
+
+def test_sticky_key_waits_for_its_busy_proxy(leases):
+    lease = leases.acquire(key='session-1')
+    with pytest.raises(LeaseTimeoutError):
+        leases.acquire(key='session-1', timeout=0)
+    leases.release(lease)
+    assert leases.acquire(key='session-1', timeout=0).slot == lease.slot
+
+
+def test_release_reports_outcome(leases):
+    lease = leases.acquire()
+    leases.release(lease, success=False)
+    assert leases.manager.proxy_list[lease.slot]['Status'] == 0
+    leases.acquire()
+    leases.acquire()
+    with pytest.raises(LeaseTimeoutError):
+        leases.acquire(timeout=0)
+
+
+def test_lease_context_releases(leases):
+    with leases.lease(key='a') as lease:
+        assert leases.load(lease.slot) == 1
+    assert leases.load(lease.slot) == 0
+
+
+def test_exhausted_pool_raises(leases):
+    for proxy in leases.manager.proxy_list:
+        leases.manager.mark_proxy_as_failed(proxy)
+    with pytest.raises(ProxyPoolExhaustedError):
+        leases.acquire()
+
+
+def test_waiting_worker_gets_released_proxy(leases):
+    leases.clock = time.monotonic
+    held = [leases.acquire() for _ in range(3)]
+    acquired = []
+    worker = threading.Thread(target=lambda: acquired.append(leases.acquire(timeout=5)))
+    worker.start()
+    leases.release(held[0])
+    worker.join(5)
+    assert acquired and acquired[0].slot == held[0].slot
@@ -0,0 +1,47 @@
+import pytest
+from utils.proxy_scoring import ProxyScore, ProxyScorer, WeightedSampler
+
+
+@pytest.fixture
+def scorer(clock):
+    return ProxyScorer(alpha=0.5, base_cooldown=10, max_cooldown=40, clock=clock)
+
+
+def test_record_success_updates_ewma(scorer):
+    score = ProxyScore()
+    scorer.record_success(score, latency=2.0)
+    assert score.latency == 2.0
+    scorer.record_success(score, latency=1.0)
+    assert score.latency == pytest.approx(1.5)
+    assert score.success_rate == 1.0
+
+
+def test_record_failure_backs_off_exponentially(scorer):
+    score = ProxyScore()
+    assert scorer.record_failure(score) == 10
+    assert scorer.record_failure(score) == 20
+    assert scorer.record_failure(score) == 40
+    assert scorer.record_failure(score) == 40
+    assert score.success_rate == pytest.approx(1 / 16)
+    scorer.record_success(score)
+    assert score.failures == 0
+    assert score.cooldown_until == 0.0
+
+
+def test_weight_prefers_fast_healthy_proxies(scorer):
+    fast, slow, flaky = ProxyScore(latency=0.1), ProxyScore(latency=2.0), ProxyScore(latency=0.1, success_rate=0.1)
+    assert scorer.weight(fast) > scorer.weight(flaky) > scorer.weight(slow)
+
+
+def test_weighted_sampler_respects_weights():
+    sampler = WeightedSampler(3)
+    sampler.set(0, 1.0)
+    sampler.set(2, 3.0)
+    assert sampler.total == 4.0
+    assert sampler.sample(lambda: 0.0) == 0
+    assert sampler.sample(lambda: 0.24) == 0
+    assert sampler.sample(lambda: 0.26) == 2
+    assert sampler.sample(lambda: 0.999) == 2
+    sampler.set(0, 0.0)
+    sampler.set(2, 0.0)
+    assert sampler.sample() is None
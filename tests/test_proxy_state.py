@@ -0,0 +1,101 @@
+import multiprocessing
+import threading
+import time
+
+from utils.proxy_state import STATUS_ACTIVE, STATUS_FAILED, STATUS_UNTOUCHED, SharedProxyState
+
+SERVERS = ['http://127.0.0.1:8080', 'http://127.0.0.2:8080', 'http://127.0.0.3:8080']
+
+
+def _fail(status, score):
+    score.failures += 1
+    return STATUS_FAILED
+
+
+def _hammer(path, slot, count):
+    with SharedProxyState(path, SERVERS) as state:
+        for _ in range(count):
+            state.update(slot, _fail)
+
+
+def test_new_table_is_untouched(tmp_path):
+    with SharedProxyState(str(tmp_path / 'state'), SERVERS) as state:
+        status, score = state.read(1)
+    assert status == STATUS_UNTOUCHED
+    assert score.latency is None
+    assert score.failures == 0
+
+
+def test_update_is_seen_by_another_mapping(tmp_path):
+    path = str(tmp_path / 'state')
+    with SharedProxyState(path, SERVERS) as writer, SharedProxyState(path, SERVERS) as reader:
+        cursor = reader.counter
+
+        def succeed(status, score):
+            score.latency = 0.5
+            return STATUS_ACTIVE
+
+        writer.update(2, succeed)
+        writer.update(0, _fail)
+        writer.update(2, succeed)
+        cursor, slots = reader.changes_since(cursor)
+        assert slots == [0, 2]
+        assert reader.changes_since(cursor) == (cursor, [])
+        status, score = reader.read(2)
+        assert status == STATUS_ACTIVE
+        assert score.latency == 0.5
+
+
+def test_changes_since_reports_ring_overflow(tmp_path):
+    with SharedProxyState(str(tmp_path / 'state'), SERVERS) as state:
+        for _ in range(5000):
+            state.update(0, _fail)
+        assert state.changes_since(0) == (5000, None)
+
+
+def test_different_proxy_list_resets_table(tmp_path):
+    path = str(tmp_path / 'state')
+    with SharedProxyState(path, SERVERS) as state:
+        state.update(0, _fail)
+    with SharedProxyState(path, SERVERS[::-1]) as state:
+        assert state.read(0)[0] == STATUS_UNTOUCHED
+        assert state.counter == 0
+
+
+def test_updates_from_processes_are_not_lost(tmp_path):
+    processes = 4
+    path = str(tmp_path / 'state')
+    SharedProxyState(path, SERVERS).close()
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_hammer, args=(path, 1, 200)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    with SharedProxyState(path, SERVERS) as state:
+        assert state.read(1)[1].failures == processes * 200
+        assert state.counter == processes * 200
+
+
+def test_instances_in_one_process_exclude_each_other(tmp_path):
+    path = str(tmp_path / 'state')
+    first, second = SharedProxyState(path, SERVERS), SharedProxyState(path, SERVERS)
+
+    def slow_fail(status, score):
+        failures = score.failures
+        time.sleep(0)  # let other threads run inside the read-modify-write
+        score.failures = failures + 1
+        return STATUS_FAILED
+
+    threads = [threading.Thread(target=lambda state=state: [state.update(0, slow_fail) for _ in range(2000)])
+               for state in (first, second) * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert first.read(0)[1].failures == 8000
+    assert second.counter == 8000
+    first.close()
+    second.update(1, _fail)
+    assert second.read(1)[1].failures == 1
+    second.close()
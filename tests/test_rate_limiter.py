@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from email.utils import formatdate
+from unittest.mock import MagicMock
+from utils.rate_limiter import RateLimiter, TokenBucket, parse_retry_after
+
+
+def test_token_bucket_burst_then_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now += 10
+    assert bucket.reserve() == 0
+
+
+def test_token_bucket_pause(clock):
+    bucket = TokenBucket(rate=1, clock=clock)
+    bucket.pause_until(clock.now + 30)
+    assert bucket.reserve() == pytest.approx(31)
+
+
+def test_domain_rates_apply_to_subdomains(clock):
+    limiter = RateLimiter(default_rate=100, domain_rates={'example.com': (1, 1)}, clock=clock)
+    assert limiter.reserve('http://www.example.com/a') == 0
+    assert limiter.reserve('http://shop.example.com/b') == 0
+    assert limiter.reserve('http://www.example.com/c') == pytest.approx(1)
+    assert limiter.reserve('http://other.org/') == 0
+
+
+def test_per_proxy_limit(clock):
+    limiter = RateLimiter(default_rate=100, per_proxy_rate=1, per_proxy_burst=1, clock=clock)
+    proxy_a, proxy_b = {'http': 'http://a:1'}, {'http': 'http://b:1'}
+    assert limiter.reserve('http://site.com/', proxy_a) == 0
+    assert limiter.reserve('http://site.com/', proxy_b) == 0
+    assert limiter.reserve('http://site.com/', proxy_a) == pytest.approx(1)
+
+
+def test_observe_retry_after(clock):
+    limiter = RateLimiter(default_rate=10, max_retry_after=60, clock=clock)
+    assert limiter.observe('http://site.com/', MagicMock(status_code=200, headers={})) is None
+    assert limiter.observe('http://site.com/', MagicMock(status_code=429, headers={'Retry-After': '120'})) == 60
+    assert limiter.reserve('http://site.com/') == pytest.approx(60.1)
+
+    dated = MagicMock(status_code=503, headers={'Retry-After': formatdate(usegmt=True)})
+    assert limiter.observe('http://other.com/', dated) == pytest.approx(0, abs=1)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(' 30 ') == 30.0
+    assert parse_retry_after(formatdate(usegmt=True)) == pytest.approx(0, abs=1)
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+
+
+def test_acquire_async_waits():
+    limiter = RateLimiter(default_rate=50, default_burst=1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await limiter.acquire_async('http://site.com/')
+        await limiter.acquire_async('http://site.com/')
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.015
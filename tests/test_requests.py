@@ -1,7 +1,11 @@
+import asyncio
+import threading
+import time
 import pytest
 import requests
 from unittest.mock import patch, MagicMock
 from utils.requests import RequestHandler
+from utils.retry import RetryPolicy
 
 class TestRequestHandler:
 
@@ -64,3 +68,273 @@ class TestRequestHandler:
         mock_response_final.status_code = 404
         mock_response_final.raise_for_status.side_effect = requests.exceptions.HTTPError
         mock_get.side_effect = [mock_response_initial, mock_response_final]
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            request_handler.get_with_cookies('http://testurl.com')
+
+
+class TestPooledRequestHandler:
+
+    PROXY_A = {'http': 'http://u:p@10.0.0.1:80', 'https': 'http://u:p@10.0.0.1:80'}
+    PROXY_B = {'http': 'http://u:p@10.0.0.2:80', 'https': 'http://u:p@10.0.0.2:80'}
+
+    @pytest.fixture
+    def proxy_manager(self):
+        return MagicMock()
+
+    @patch('requests.get')
+    def test_get_applies_proxy_without_pooling(self, mock_get, proxy_manager):
+        """Test that non-pooled requests still go through the generated proxy."""
+        proxy_manager.generate_proxy.return_value = self.PROXY_A
+        handler = RequestHandler(proxy_manager=proxy_manager)
+        handler.get('http://testurl.com')
+        mock_get.assert_called_once_with('http://testurl.com', headers=handler.headers, proxies=self.PROXY_A)
+
+    @patch('utils.requests.requests.Session')
+    def test_session_reused_per_proxy(self, mock_session_cls, proxy_manager):
+        """Test that each proxy gets one session which is reused."""
+        mock_session_cls.side_effect = lambda: MagicMock()
+        proxy_manager.generate_proxy.side_effect = [self.PROXY_A, self.PROXY_B, self.PROXY_A]
+        handler = RequestHandler(proxy_manager=proxy_manager, pooled=True)
+
+        handler.get('http://testurl.com/1')
+        handler.get('http://testurl.com/2')
+        handler.get('http://testurl.com/3')
+
+        assert mock_session_cls.call_count == 2
+        session_a = handler._sessions[self.PROXY_A['http']][0]
+        assert session_a.get.call_count == 2
+        session_a.proxies.update.assert_called_once_with(self.PROXY_A)
+
+    @patch('utils.requests.requests.Session')
+    def test_pools_are_bounded(self, mock_session_cls, proxy_manager):
+        """Test that the least recently used session is evicted and closed."""
+        mock_session_cls.side_effect = lambda: MagicMock()
+        proxy_manager.generate_proxy.side_effect = [self.PROXY_A, self.PROXY_B]
+        handler = RequestHandler(proxy_manager=proxy_manager, pooled=True, max_pools=1)
+
+        handler.get('http://testurl.com')
+        session_a = handler._sessions[self.PROXY_A['http']][0]
+        handler.get('http://testurl.com')
+
+        assert list(handler._sessions) == [self.PROXY_B['http']]
+        session_a.close.assert_called_once()
+
+    @patch('utils.requests.requests.Session')
+    def test_idle_pools_are_evicted(self, mock_session_cls):
+        """Test that sessions idle for longer than the timeout are closed."""
+        mock_session_cls.side_effect = lambda: MagicMock()
+        handler = RequestHandler(pooled=True, pool_idle_timeout=0)
+        handler._sessions['stale'] = (MagicMock(), time.monotonic() - 1)
+        stale = handler._sessions['stale'][0]
+
+        handler.get('http://testurl.com')
+
+        assert list(handler._sessions) == [None]
+        stale.close.assert_called_once()
+        handler.close()
+        assert not handler._sessions
+
+
+class TestFetchMany:
+
+    @staticmethod
+    def _collect(handler, urls, **kwargs):
+        async def run():
+            return [result async for result in handler.fetch_many(urls, **kwargs)]
+        return asyncio.run(run())
+
+    def test_results_stream_in_completion_order(self):
+        """Test that slow URLs do not hold back fast ones."""
+        handler = RequestHandler()
+        delays = {'http://a.com/slow': 0.3, 'http://b.com/fast': 0.0}
+
+        def fake_send(url, proxies, **kwargs):
+            time.sleep(delays[url])
+            return MagicMock(status_code=200)
+
+        with patch.object(RequestHandler, '_send', side_effect=fake_send):
+            results = self._collect(handler, list(delays))
+
+        assert [result.url for result in results] == ['http://b.com/fast', 'http://a.com/slow']
+        assert all(result.ok for result in results)
+
+    def test_per_host_cap(self):
+        """Test that no more than per_host requests hit one host at once."""
+        handler = RequestHandler()
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'max': 0}
+
+        def fake_send(url, proxies, **kwargs):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            time.sleep(0.02)
+            with lock:
+                in_flight['now'] -= 1
+            return MagicMock(status_code=200)
+
+        urls = [f'http://same.com/{i}' for i in range(12)]
+        with patch.object(RequestHandler, '_send', side_effect=fake_send):
+            results = self._collect(handler, urls, concurrency=8, per_host=2)
+
+        assert len(results) == 12
+        assert in_flight['max'] == 2
+
+    def test_reports_proxy_outcomes(self):
+        """Test that proxies are marked failed or successful from the result."""
+        proxy_manager = MagicMock()
+        good = {'http': 'http://u:p@10.0.0.1:80', 'https': 'http://u:p@10.0.0.1:80'}
+        bad = {'http': 'http://u:p@10.0.0.2:80', 'https': 'http://u:p@10.0.0.2:80'}
+        proxy_manager.generate_proxy.side_effect = [good, bad]
+        handler = RequestHandler(proxy_manager=proxy_manager)
+
+        def fake_send(url, proxies, **kwargs):
+            if proxies is bad:
+                raise requests.exceptions.ProxyError('tunnel failed')
+            return MagicMock(status_code=200)
+
+        with patch.object(RequestHandler, '_send', side_effect=fake_send):
+            results = self._collect(handler, ['http://a.com/1', 'http://a.com/2'], concurrency=1)
+
+        assert [result.ok for result in results] == [True, False]
+        assert isinstance(results[1].error, requests.exceptions.ProxyError)
+        proxy_manager.mark_proxy_as_successful.assert_called_once_with(good, latency=results[0].elapsed)
+        proxy_manager.mark_proxy_as_failed.assert_called_once_with(bad)
+
+    def test_blocked_status_blames_proxy(self):
+        """Test that a 429 through a proxy is reported as a proxy failure."""
+        proxy_manager = MagicMock()
+        proxy_manager.generate_proxy.return_value = {'http': 'http://p:1', 'https': 'http://p:1'}
+        handler = RequestHandler(proxy_manager=proxy_manager)
+        response = MagicMock(status_code=429)
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError
+
+        with patch.object(RequestHandler, '_send', return_value=response):
+            results = self._collect(handler, ['http://a.com/'])
+
+        assert results[0].response is response
+        proxy_manager.mark_proxy_as_failed.assert_called_once()
+
+    def test_retry_policy_fails_over_to_new_proxy(self):
+        """Test that fetch_many retries proxy failures through a newly drawn proxy."""
+        proxy_manager = MagicMock()
+        bad = {'http': 'http://u:p@10.0.0.2:80', 'https': 'http://u:p@10.0.0.2:80'}
+        good = {'http': 'http://u:p@10.0.0.1:80', 'https': 'http://u:p@10.0.0.1:80'}
+        proxy_manager.generate_proxy.side_effect = [bad, good]
+        handler = RequestHandler(proxy_manager=proxy_manager, retry_policy=RetryPolicy(sleep=MagicMock()))
+
+        def fake_send(url, proxies, **kwargs):
+            if proxies is bad:
+                raise requests.exceptions.ProxyError('tunnel failed')
+            return MagicMock(status_code=200)
+
+        with patch.object(RequestHandler, '_send', side_effect=fake_send):
+            results = self._collect(handler, ['http://a.com/1'])
+
+        assert results[0].ok
+        assert results[0].proxies is good
+        proxy_manager.mark_proxy_as_successful.assert_called_once()
+        proxy_manager.mark_proxy_as_failed.assert_not_called()  # one failure does not open its circuit
+
+
+class TestRateLimitedRequestHandler:
+
+    @patch('requests.get')
+    def test_get_waits_for_limiter_and_reports_response(self, mock_get):
+        """Test that get acquires a token and lets the limiter observe the response."""
+        limiter = MagicMock()
+        handler = RequestHandler(rate_limiter=limiter)
+
+        response = handler.get('http://testurl.com')
+
+        limiter.acquire.assert_called_once_with('http://testurl.com', None)
+        limiter.observe.assert_called_once_with('http://testurl.com', response, None)
+
+
+class TestCachedRequestHandler:
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        from utils.http_cache import ResponseCache
+        cache = ResponseCache(str(tmp_path))
+        yield cache
+        cache.close()
+
+    @staticmethod
+    def _response(status, body=b'', headers=None):
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        response.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        return response
+
+    @patch('requests.get')
+    def test_fresh_entry_skips_network(self, mock_get, cache):
+        """Test that a fresh cached page is served without a request."""
+        mock_get.return_value = self._response(200, b'page', {'Cache-Control': 'max-age=60'})
+        handler = RequestHandler(cache=cache)
+
+        handler.get('http://testurl.com')
+        response = handler.get('http://testurl.com')
+
+        assert response.content == b'page'
+        assert mock_get.call_count == 1
+        assert cache.stats['hits'] == 1
+
+    @patch('requests.get')
+    def test_stale_entry_revalidates(self, mock_get, cache):
+        """Test that a stale page is revalidated and a 304 serves the stored body."""
+        mock_get.side_effect = [
+            self._response(200, b'page', {'Cache-Control': 'max-age=0', 'ETag': '"abc"'}),
+            self._response(304),
+        ]
+        handler = RequestHandler(cache=cache)
+
+        handler.get('http://testurl.com')
+        response = handler.get('http://testurl.com')
+
+        assert response.content == b'page'
+        assert mock_get.call_args.kwargs['headers']['If-None-Match'] == '"abc"'
+        assert cache.stats['revalidated'] == 1
+
+
+class TestCookieReuse:
+
+    @staticmethod
+    def _response(status=200, cookies=None):
+        response = MagicMock(status_code=status)
+        response.cookies = cookies or {}
+        if status >= 400:
+            response.raise_for_status.side_effect = requests.exceptions.HTTPError
+        return response
+
+    @patch('requests.get')
+    def test_cookies_reused_across_calls(self, mock_get):
+        """Test that a second call for the same domain skips the priming request."""
+        mock_get.side_effect = [self._response(cookies={'session': 'abc'}), self._response(), self._response()]
+        handler = RequestHandler()
+
+        handler.get_with_cookies('http://testurl.com/a')
+        handler.get_with_cookies('http://testurl.com/b')
+
+        assert mock_get.call_count == 3
+        assert mock_get.call_args.kwargs['cookies'].get('session') == 'abc'
+        assert handler.cookie_store.stats['reused'] == 1
+
+    @patch('requests.get')
+    def test_rejected_cookies_are_primed_again(self, mock_get):
+        """Test that a 403 with stored cookies re-runs the priming request."""
+        mock_get.side_effect = [
+            self._response(cookies={'session': 'old'}), self._response(),
+            self._response(status=403),
+            self._response(cookies={'session': 'new'}), self._response(),
+        ]
+        handler = RequestHandler()
+
+        handler.get_with_cookies('http://testurl.com/a')
+        response = handler.get_with_cookies('http://testurl.com/b')
+
+        assert response.status_code == 200
+        assert mock_get.call_count == 5
+        assert handler.cookie_store.get('http://testurl.com/').get('session') == 'new'
@@ -0,0 +1,255 @@
+import gzip
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+_SEGMENT_NAME = re.compile(r'segment-(\d{6})\.warc\.gz$')
+# Compressed bytes fed to the decompressor at a time while recovering unindexed records.
+_RECOVER_CHUNK = 64 * 1024
+
+
+class PageArchive:
+    """
+    Append-only store of raw pages in compressed, WARC-style segment files.
+
+    Every page is written as its own gzip member (a WARC ``resource`` record)
+    appended to the current segment; segments roll over once they reach
+    ``segment_bytes``. A SQLite index maps each key to ``(segment, offset,
+    length)`` so a page is read back with one seek and one read. Writing the
+    same key again appends a new record and repoints the index.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 1 << 30, compresslevel: int = 6,
+                 commit_every: int = 1000, max_open_segments: int = 16) -> None:
+        """
+        Args:
+            directory (str): Directory holding the segments and the index.
+            segment_bytes (int): Size at which a new segment is started.
+            compresslevel (int): gzip level for each record.
+            commit_every (int): Index entries buffered before a commit; ``flush`` commits immediately.
+            max_open_segments (int): Segment files kept open for reads.
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compresslevel = compresslevel
+        self.commit_every = commit_every
+        self.max_open_segments = max_open_segments
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._readers: 'OrderedDict[int, BinaryIO]' = OrderedDict()
+        self._uncommitted = 0
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'key TEXT PRIMARY KEY, segment INTEGER, offset INTEGER, length INTEGER, size INTEGER, stored_at REAL)'
+        )
+        self._db.commit()
+        segments = self._segments()
+        self._segment = segments[-1] if segments else 0
+        self._writer = open(self._segment_path(self._segment), 'ab')
+        self._recover()
+
+    def __enter__(self) -> 'PageArchive':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __contains__(self, key: str) -> bool:
+        return self._locate(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def put(self, key: str, content: Union[bytes, str], content_type: str = 'text/html') -> None:
+        """
+        Appends a page to the archive.
+
+        Args:
+            key (str): Page key, typically its URL or file name.
+            content (Union[bytes, str]): Raw page bytes; strings are encoded as UTF-8.
+            content_type (str): MIME type stored in the record header.
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        header = (
+            'WARC/1.1\r\n'
+            'WARC-Type: resource\r\n'
+            f'WARC-Target-URI: {key}\r\n'
+            f'WARC-Date: {datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(content)}\r\n\r\n'
+        ).encode('utf-8')
+        record = gzip.compress(header + content + b'\r\n\r\n', compresslevel=self.compresslevel)
+        with self._lock:
+            if self._writer.tell() >= self.segment_bytes:
+                self._roll_over()
+            offset = self._writer.tell()
+            self._writer.write(record)
+            self._db.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                (key, self._segment, offset, len(record), len(content), time.time()),
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self._commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Reads a page by key.
+
+        Args:
+            key (str): Page key.
+
+        Returns:
+            Optional[bytes]: The raw page bytes, or None if the key is unknown.
+        """
+        location = self._locate(key)
+        if location is None:
+            return None
+        segment, offset, length = location
+        with self._lock:
+            if segment == self._segment:
+                self._writer.flush()
+            reader = self._reader(segment)
+            reader.seek(offset)
+            record = reader.read(length)
+        return self._parse(record)[1]
+
+    def iter_pages(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Yields every live page in storage order, reading each segment sequentially.
+
+        Yields:
+            Tuple[str, bytes]: ``(key, content)`` pairs.
+        """
+        with self._lock:
+            self._writer.flush()
+            self._commit()
+        cursor = self._db.cursor()
+        rows = cursor.execute('SELECT key, segment, offset, length FROM pages ORDER BY segment, offset')
+        current, file = None, None
+        try:
+            for key, segment, offset, length in rows:
+                if segment != current:
+                    if file is not None:
+                        file.close()
+                    file, current = open(self._segment_path(segment), 'rb'), segment
+                file.seek(offset)
+                yield key, self._parse(file.read(length))[1]
+        finally:
+            if file is not None:
+                file.close()
+            cursor.close()
+
+    def flush(self) -> None:
+        """Writes buffered records to disk and commits the index."""
+        with self._lock:
+            self._writer.flush()
+            self._commit()
+
+    def close(self) -> None:
+        """Flushes and closes every file."""
+        with self._lock:
+            self.flush()
+            self._writer.close()
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            self._db.close()
+
+    def _locate(self, key: str) -> Optional[Tuple[int, int, int]]:
+        with self._lock:
+            return self._db.execute('SELECT segment, offset, length FROM pages WHERE key = ?', (key,)).fetchone()
+
+    def _commit(self) -> None:
+        if self._uncommitted:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def _roll_over(self) -> None:
+        self._writer.close()
+        self._commit()  # _recover only rescans past the indexed end, so the old segment must be fully indexed
+        self._segment += 1
+        self._writer = open(self._segment_path(self._segment), 'ab')
+
+    def _reader(self, segment: int) -> BinaryIO:
+        reader = self._readers.pop(segment, None)
+        if reader is None:
+            reader = open(self._segment_path(segment), 'rb')
+            if len(self._readers) >= self.max_open_segments:
+                self._readers.popitem(last=False)[1].close()
+        self._readers[segment] = reader
+        return reader
+
+    def _segments(self):
+        return sorted(int(match.group(1)) for match in map(_SEGMENT_NAME.match, os.listdir(self.directory)) if match)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f'segment-{segment:06d}.warc.gz')
+
+    def _recover(self) -> None:
+        """Re-indexes records appended after the last index commit and drops a torn tail."""
+        for segment in self._segments():
+            row = self._db.execute('SELECT MAX(offset + length) FROM pages WHERE segment = ?', (segment,)).fetchone()
+            indexed_end = row[0] or 0
+            size = os.path.getsize(self._segment_path(segment))
+            if size <= indexed_end:
+                continue
+            end = self._reindex(segment, indexed_end)
+            if segment == self._segment and end < size:
+                self._writer.truncate(end)
+                self._writer.seek(0, os.SEEK_END)
+        self._db.commit()
+
+    def _reindex(self, segment: int, start: int) -> int:
+        """Indexes the complete records of ``segment`` from ``start`` on and returns where they end."""
+        with open(self._segment_path(segment), 'rb') as file:
+            file.seek(start)
+            tail = memoryview(file.read())
+        position = 0
+        while position < len(tail):
+            # feed bounded chunks so each record costs its own size, not the size of the rest of the tail
+            decompressor = zlib.decompressobj(wbits=31)
+            parts, fed = [], position
+            try:
+                while not decompressor.eof and fed < len(tail):
+                    chunk = tail[fed:fed + _RECOVER_CHUNK]
+                    parts.append(decompressor.decompress(chunk))
+                    fed += len(chunk)
+            except zlib.error:
+                break
+            if not decompressor.eof:
+                break
+            length = fed - position - len(decompressor.unused_data)
+            key, content = self._parse_payload(b''.join(parts))
+            self._db.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                (key, segment, start + position, length, len(content), time.time()),
+            )
+            position += length
+        return start + position
+
+    @classmethod
+    def _parse(cls, record: bytes) -> Tuple[str, bytes]:
+        return cls._parse_payload(gzip.decompress(record))
+
+    @staticmethod
+    def _parse_payload(payload: bytes) -> Tuple[str, bytes]:
+        head, _, body = payload.partition(b'\r\n\r\n')
+        key, length = '', len(body)
+        for line in head.split(b'\r\n'):
+            name, _, value = line.partition(b':')
+            if name == b'WARC-Target-URI':
+                key = value.strip().decode('utf-8')
+            elif name == b'Content-Length':
+                length = int(value)
+        return key, body[:length]
@@ -0,0 +1,174 @@
+import os
+import queue
+import threading
+from typing import List, Optional, Set, Tuple, Union
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    Writes files on background threads so callers do not block on disk I/O.
+
+    Writes go through a bounded queue: ``submit`` blocks when it is full, which
+    applies backpressure to producers that outrun the disk. Writer threads drain
+    the queue in batches, create each directory once, and write every file to a
+    temporary name in its directory before renaming it into place, so readers
+    never see partial files.
+    """
+
+    def __init__(self, max_queue: int = 1024, workers: int = 1, batch_size: int = 64, fsync: bool = False) -> None:
+        """
+        Args:
+            max_queue (int): Maximum pending writes before ``submit`` blocks.
+            workers (int): Number of writer threads.
+            batch_size (int): Maximum writes taken from the queue at once.
+            fsync (bool): Fsync each file, and its directory once per batch, before reporting it done.
+        """
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.stats = {'files': 0, 'bytes': 0, 'batches': 0}
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_queue)
+        self._created_dirs: Set[str] = set()
+        self._errors: List[Tuple[str, BaseException]] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f'BackgroundWriter-{i}', daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, path: str, data: Union[bytes, str], timeout: Optional[float] = None) -> None:
+        """
+        Queues a file write, blocking while the queue is full.
+
+        Args:
+            path (str): Destination path; missing directories are created.
+            data (Union[bytes, str]): Content; strings are encoded as UTF-8.
+            timeout (Optional[float]): Seconds to wait for queue space, None to wait forever.
+
+        Raises:
+            RuntimeError: If the writer is closed.
+            TypeError: If ``data`` is neither bytes-like nor a string.
+            queue.Full: If ``timeout`` expires.
+        """
+        if self._closed:
+            raise RuntimeError('BackgroundWriter is closed')
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        elif not isinstance(data, (bytes, bytearray, memoryview)):
+            raise TypeError(f'data must be bytes or str, not {type(data).__name__}')
+        self._queue.put((path, data), timeout=timeout)
+
+    def flush(self) -> None:
+        """
+        Waits until every submitted write is on disk.
+
+        Raises:
+            OSError: The first error raised by a background write since the last flush.
+        """
+        self._queue.join()
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            path, error = errors[0]
+            raise OSError(f'{len(errors)} background write(s) failed, first for {path!r}: {error}') from error
+
+    def close(self) -> None:
+        """Flushes pending writes and stops the writer threads."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            for _ in self._threads:
+                self._queue.put(_STOP)
+            for thread in self._threads:
+                thread.join()
+
+    def _run(self) -> None:
+        """Writer thread loop: take a batch, write it, mark it done."""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(item)
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[Tuple[str, bytes]]) -> None:
+        directories = set()
+        files = written = 0
+        for path, data in batch:
+            try:
+                directory = os.path.dirname(path) or '.'
+                self._ensure_directory(directory)
+                self._write_atomic(directory, path, data)
+                directories.add(directory)
+                files += 1
+                written += len(data)
+            except Exception as error:
+                # anything escaping here would kill the thread and leave flush() waiting forever
+                with self._lock:
+                    self._errors.append((path, error))
+        if self.fsync:
+            for directory in directories:
+                self._fsync_directory(directory)
+        with self._lock:
+            self.stats['files'] += files
+            self.stats['bytes'] += written
+            self.stats['batches'] += 1
+
+    def _ensure_directory(self, directory: str) -> None:
+        if directory not in self._created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._created_dirs.add(directory)
+
+    def _write_atomic(self, directory: str, path: str, data: bytes) -> None:
+        tmp_path = os.path.join(directory, f'.{os.path.basename(path)}.{os.urandom(16).hex()}.tmp')
+        try:
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+                if self.fsync:
+                    file.flush()
+                    os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _fsync_directory(directory: str) -> None:
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return  # not supported on this platform
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
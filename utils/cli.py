@@ -0,0 +1,205 @@
+"""
+Command line entry point: ``python -m utils <command> ...``.
+
+Only ``argparse`` is imported up front; every command imports what it needs
+when it runs, so ``--help`` and argument errors answer in milliseconds and
+one command never pays for the dependencies of another.
+"""
+import argparse
+import sys
+from typing import List, Optional, Sequence
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the parser of every command."""
+    parser = argparse.ArgumentParser(prog='python -m utils', description='Web scraping utilities.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log progress and debug details')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    check = commands.add_parser('check-proxies', help='probe every proxy of a list')
+    check.add_argument('proxy_file', help='proxy list, one proxy per line')
+    check.add_argument('--url', default='http://httpbin.org/ip', help='URL fetched through each proxy')
+    check.add_argument('--timeout', type=float, default=10.0, help='seconds per probe')
+    check.add_argument('--concurrency', type=int, default=500, help='probes in flight')
+    check.add_argument('--healthy', metavar='PATH', help='write the proxies that passed to this file')
+    check.set_defaults(handler=check_proxies)
+
+    fetch = commands.add_parser('fetch', help='fetch a list of URLs')
+    fetch.add_argument('url_file', help="file with one URL per line, '-' for stdin")
+    target = fetch.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output', metavar='DIR', help='save each page as a file, indexed in DIR/index.jsonl')
+    target.add_argument('--archive', metavar='DIR', help='store the pages in a PageArchive')
+    fetch.add_argument('--proxies', metavar='PATH', help='proxy list to rotate through')
+    fetch.add_argument('--concurrency', type=int, default=16, help='requests in flight')
+    fetch.add_argument('--per-host', type=int, default=4, help='requests in flight per host')
+    fetch.add_argument('--timeout', type=float, default=30.0, help='seconds per request')
+    fetch.add_argument('--retries', type=int, default=0, help='retries of retryable failures')
+    fetch.set_defaults(handler=fetch_urls)
+
+    download = commands.add_parser('download', help='download a large file with parallel ranges')
+    download.add_argument('url')
+    download.add_argument('destination')
+    download.add_argument('--parts', type=int, default=4, help='ranges fetched in parallel')
+    download.add_argument('--checksum', help="expected digest as '<algorithm>:<hex>'")
+    download.add_argument('--proxies', metavar='PATH', help='proxy list to rotate through')
+    download.set_defaults(handler=download_file)
+
+    dump = commands.add_parser('dump-archive', help='list or extract the pages of a PageArchive')
+    dump.add_argument('archive', help='archive directory')
+    action = dump.add_mutually_exclusive_group()
+    action.add_argument('--output', metavar='DIR', help='extract every page to DIR, indexed in DIR/index.jsonl')
+    action.add_argument('--key', help='write one page to stdout')
+    dump.set_defaults(handler=dump_archive)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Runs a command.
+
+    Args:
+        argv (Optional[Sequence[str]]): Arguments without the program name, ``sys.argv[1:]`` by default.
+
+    Returns:
+        int: Exit status: 0 on success, 1 when some items failed.
+    """
+    args = build_parser().parse_args(argv)
+    import logging
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format='%(message)s')
+    return args.handler(args)
+
+
+def check_proxies(args: argparse.Namespace) -> int:
+    from .manager_proxies import ProxyManager
+    from .proxy_health import ProxyHealthChecker
+
+    try:
+        manager = ProxyManager(args.proxy_file)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+    checker = ProxyHealthChecker(args.url, concurrency=args.concurrency, timeout=args.timeout)
+    results = checker.check_manager(manager)
+    healthy = [result for result in results if result.ok]
+    checked = [result for result in results if not result.skipped]
+    for result in results:
+        ttfb = f'{result.ttfb:.3f}' if result.ttfb is not None else '-'
+        state = 'ok' if result.ok else 'skipped' if result.skipped else 'failed'
+        print(f"{result.proxy['server']}\t{state}\t{result.status_code or '-'}\t{ttfb}\t{result.error or ''}")
+    if args.healthy:
+        with open(args.healthy, 'w', encoding='utf-8') as file:
+            file.writelines(_proxy_line(result.proxy) + '\n' for result in healthy)
+    skipped = len(results) - len(checked)
+    print(f'{len(healthy)}/{len(checked)} proxies healthy' + (f', {skipped} skipped' if skipped else ''),
+          file=sys.stderr)
+    return 1 if len(healthy) < len(checked) else 0
+
+
+def fetch_urls(args: argparse.Namespace) -> int:
+    import asyncio
+    import hashlib
+    import logging
+    import os
+    from contextlib import ExitStack
+
+    from .requests import RequestHandler
+    from .retry import RetryPolicy
+
+    async def consume(handler, urls, store, index) -> List[int]:
+        counts = [0, 0]
+        async for result in handler.fetch_many(urls, concurrency=args.concurrency, per_host=args.per_host,
+                                               timeout=args.timeout):
+            if not result.ok or result.response.status_code >= 400:
+                counts[1] += 1
+                logging.warning('%s: %s', result.url, result.error or f'HTTP {result.response.status_code}')
+                continue
+            counts[0] += 1
+            if index is None:
+                store.put(result.url, result.response.content,
+                          result.response.headers.get('Content-Type', 'text/html'))
+            else:
+                name = hashlib.sha1(result.url.encode('utf-8')).hexdigest() + '.html'
+                store.save_file(os.path.join(args.output, name), result.response.content)
+                index.write({'url': result.url, 'file': name, 'status': result.response.status_code})
+        return counts
+
+    with ExitStack() as stack:
+        lines = sys.stdin if args.url_file == '-' else stack.enter_context(open(args.url_file, 'r', encoding='utf-8'))
+        urls = (line.strip() for line in lines if line.strip() and not line.startswith('#'))
+        retry_policy = RetryPolicy(max_attempts=args.retries + 1) if args.retries else None
+        handler = stack.enter_context(RequestHandler(_proxy_manager(args.proxies), pooled=True,
+                                                     pool_maxsize=args.concurrency, retry_policy=retry_policy))
+        if args.archive:
+            from .archive import PageArchive
+            store, index = stack.enter_context(PageArchive(args.archive)), None
+        else:
+            from .filemanager import FileManager
+            from .sinks import JsonlSink
+            os.makedirs(args.output, exist_ok=True)
+            store = stack.enter_context(FileManager())
+            index = stack.enter_context(JsonlSink(os.path.join(args.output, 'index.jsonl')))
+        fetched, failed = asyncio.run(consume(handler, urls, store, index))
+    print(f'{fetched} fetched, {failed} failed', file=sys.stderr)
+    return 1 if failed else 0
+
+
+def download_file(args: argparse.Namespace) -> int:
+    from requests.exceptions import RequestException
+
+    from .downloader import DownloadError, RangeDownloader
+    from .requests import RequestHandler
+
+    with RequestHandler(_proxy_manager(args.proxies), pooled=True) as handler:
+        try:
+            RangeDownloader(handler, parts=args.parts).download(args.url, args.destination, checksum=args.checksum)
+        except (RequestException, DownloadError) as error:
+            print(f'download failed: {error}', file=sys.stderr)
+            return 1
+    return 0
+
+
+def dump_archive(args: argparse.Namespace) -> int:
+    import hashlib
+    import json
+    import os
+
+    from .archive import PageArchive
+
+    with PageArchive(args.archive) as archive:
+        if args.key is not None:
+            content = archive.get(args.key)
+            if content is None:
+                print(f'{args.key!r} is not in the archive', file=sys.stderr)
+                return 1
+            sys.stdout.buffer.write(content)
+            return 0
+        if args.output is None:
+            for key, content in archive.iter_pages():
+                print(f'{key}\t{len(content)}')
+            return 0
+        os.makedirs(args.output, exist_ok=True)
+        with open(os.path.join(args.output, 'index.jsonl'), 'w', encoding='utf-8') as index:
+            for key, content in archive.iter_pages():
+                name = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.html'
+                with open(os.path.join(args.output, name), 'wb') as file:
+                    file.write(content)
+                index.write(json.dumps({'key': key, 'file': name, 'bytes': len(content)}) + '\n')
+    return 0
+
+
+def _proxy_manager(path: Optional[str]):
+    if path is None:
+        return None
+    from .manager_proxies import ProxyManager
+    return ProxyManager(path, strategy='weighted')
+
+
+def _proxy_line(proxy: dict) -> str:
+    """Writes a proxy back in the format it is read in."""
+    address = f"{proxy['ip']}:{proxy['port']}"
+    if proxy.get('scheme', 'http') != 'http':
+        credentials = f"{proxy['username']}:{proxy['password']}@" if proxy.get('username') is not None else ''
+        return f"{proxy['scheme']}://{credentials}{address}"
+    if proxy.get('username') is None:
+        return address
+    return f"{address}:{proxy['username']}:{proxy['password']}"
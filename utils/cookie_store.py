@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+import time
+from http.cookiejar import Cookie, CookieJar
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from requests.cookies import RequestsCookieJar, create_cookie
+
+CookiesLike = Union[CookieJar, Mapping[str, str]]
+
+
+class CookieStore:
+    """
+    Keeps cookie jars per domain (and optionally per proxy) so cookie-gated
+    pages only need a priming request when cookies are missing, expired or
+    rejected.
+
+    Jars can be persisted to a JSON file with ``save`` and are loaded from it
+    on construction, letting warm runs skip priming entirely.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        per_proxy: bool = False,
+        max_age: Optional[float] = None,
+        rejected_statuses: Iterable[int] = (401, 403),
+    ) -> None:
+        """
+        Args:
+            path (Optional[str]): JSON file used for persistence, None to keep cookies in memory only.
+            per_proxy (bool): Keep separate jars per proxy, for sites that bind sessions to an IP.
+            max_age (Optional[float]): Seconds after which a jar is primed again regardless of cookie expiry.
+            rejected_statuses (Iterable[int]): Statuses meaning the stored cookies were not accepted.
+        """
+        self.path = path
+        self.per_proxy = per_proxy
+        self.max_age = max_age
+        self.rejected_statuses = frozenset(rejected_statuses)
+        self.stats = {'reused': 0, 'primed': 0, 'rejected': 0, 'expired': 0}
+        self._jars: Dict[Tuple[str, Optional[str]], Tuple[RequestsCookieJar, float]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def get(self, url: str, proxies: Optional[dict] = None) -> Optional[RequestsCookieJar]:
+        """
+        Returns the stored cookies for the URL's domain, dropping expired ones.
+
+        Args:
+            url (str): The request URL.
+            proxies (Optional[dict]): The proxy in use, in requests format.
+
+        Returns:
+            Optional[RequestsCookieJar]: The jar, or None when priming is needed.
+        """
+        key = self._key(url, proxies)
+        with self._lock:
+            entry = self._jars.get(key)
+            if entry is None:
+                return None
+            jar, stored_at = entry
+            now = time.time()
+            if self.max_age is not None and now - stored_at > self.max_age:
+                del self._jars[key]
+                self.stats['expired'] += 1
+                return None
+            jar.clear_expired_cookies()
+            if not len(jar):
+                del self._jars[key]
+                self.stats['expired'] += 1
+                return None
+            self.stats['reused'] += 1
+            return jar
+
+    def set(self, url: str, cookies: CookiesLike, proxies: Optional[dict] = None) -> None:
+        """
+        Replaces the jar of the URL's domain after a priming request.
+
+        Args:
+            url (str): The request URL.
+            cookies (CookiesLike): Cookies received, as a jar or a name/value mapping.
+            proxies (Optional[dict]): The proxy in use, in requests format.
+        """
+        jar = self._to_jar(cookies, urlsplit(url).hostname or '')
+        with self._lock:
+            self._jars[self._key(url, proxies)] = (jar, time.time())
+            self.stats['primed'] += 1
+
+    def update(self, url: str, cookies: CookiesLike, proxies: Optional[dict] = None) -> None:
+        """
+        Merges cookies set by a later response into the stored jar.
+
+        Args:
+            url (str): The request URL.
+            cookies (CookiesLike): Cookies received.
+            proxies (Optional[dict]): The proxy in use, in requests format.
+        """
+        if not cookies:
+            return
+        with self._lock:
+            entry = self._jars.get(self._key(url, proxies))
+            if entry is not None:
+                entry[0].update(self._to_jar(cookies, urlsplit(url).hostname or ''))
+
+    def invalidate(self, url: str, proxies: Optional[dict] = None) -> None:
+        """
+        Forgets the jar of the URL's domain after the site rejected it.
+
+        Args:
+            url (str): The request URL.
+            proxies (Optional[dict]): The proxy in use, in requests format.
+        """
+        with self._lock:
+            if self._jars.pop(self._key(url, proxies), None) is not None:
+                self.stats['rejected'] += 1
+
+    def save(self) -> None:
+        """Writes every jar to ``path`` atomically."""
+        if not self.path:
+            return
+        with self._lock:
+            data = [
+                {
+                    'domain': domain,
+                    'proxy': proxy,
+                    'stored_at': stored_at,
+                    'cookies': [self._cookie_to_dict(cookie) for cookie in jar],
+                }
+                for (domain, proxy), (jar, stored_at) in self._jars.items()
+            ]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        """Reads jars previously written by ``save``."""
+        with open(self.path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        with self._lock:
+            for item in data:
+                jar = RequestsCookieJar()
+                for cookie in item['cookies']:
+                    jar.set_cookie(create_cookie(**cookie))
+                self._jars[(item['domain'], item['proxy'])] = (jar, item['stored_at'])
+
+    def _key(self, url: str, proxies: Optional[dict]) -> Tuple[str, Optional[str]]:
+        domain = (urlsplit(url).hostname or '').lower()
+        if not self.per_proxy or not proxies:
+            return domain, None
+        return domain, proxies.get('https') or proxies.get('http')
+
+    @staticmethod
+    def _to_jar(cookies: CookiesLike, domain: str) -> RequestsCookieJar:
+        """Copies cookies into a new jar; plain mappings are scoped to ``domain``."""
+        jar = RequestsCookieJar()
+        if isinstance(cookies, CookieJar):
+            for cookie in cookies:
+                jar.set_cookie(cookie)
+        else:
+            for name, value in cookies.items():
+                jar.set_cookie(create_cookie(name, value, domain=domain))
+        return jar
+
+    @staticmethod
+    def _cookie_to_dict(cookie: Cookie) -> dict:
+        return {
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure,
+        }
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .frontier import _signed
+
+EXACT = 'exact'
+NEAR = 'near'
+
+_BITS = 64
+_SCRIPTS = re.compile(rb'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(rb'<[^>]*>')
+_WORDS = re.compile(r'\w+')
+
+
+@dataclass
+class DedupResult:
+    """
+    Outcome of checking one piece of content.
+
+    Attributes:
+        digest (str): Hex content hash.
+        simhash (Optional[int]): 64-bit SimHash, None when near-duplicate detection is off.
+        kind (Optional[str]): ``EXACT`` or ``NEAR`` for duplicates, None for new content.
+        original (Optional[str]): Path of the stored copy this content duplicates.
+        distance (int): Hamming distance between the SimHashes, 0 for exact duplicates.
+        relocated (Optional[str]): Pointer path that now owns the content previously stored at this path;
+            the caller must move that file there before overwriting it.
+        repointed (List[str]): Other pointer paths whose pointers must be rewritten to ``relocated``.
+    """
+    digest: str
+    simhash: Optional[int] = None
+    kind: Optional[str] = None
+    original: Optional[str] = None
+    distance: int = 0
+    relocated: Optional[str] = None
+    repointed: List[str] = field(default_factory=list)
+
+    @property
+    def duplicate(self) -> bool:
+        return self.kind is not None
+
+    def pointer(self) -> str:
+        """Content of the pointer file written instead of a duplicate."""
+        return json.dumps({'duplicate_of': self.original, 'kind': self.kind,
+                           'distance': self.distance, 'digest': self.digest})
+
+
+class ContentDeduplicator:
+    """
+    Detects pages already stored, exactly or nearly.
+
+    Exact duplicates are found by a BLAKE2b content hash. Near duplicates
+    (pagination shells, pages differing by a session ID or a timestamp) are
+    found by a 64-bit SimHash over word shingles of the visible text: two
+    pages are near duplicates when their SimHashes differ in at most
+    ``max_distance`` bits. The SimHash is split into ``max_distance + 1``
+    bands and indexed by band, so by the pigeonhole principle any match
+    shares at least one band exactly and a lookup only compares the pages
+    in the same buckets instead of the whole corpus.
+
+    The index lives in SQLite, in memory by default or in ``index_path`` so
+    it survives restarts. It also records which paths were stored as
+    pointers, so that when a stored copy is overwritten its previous content
+    is handed to one of the pointers instead of being lost to all of them.
+    """
+
+    def __init__(self, index_path: str = ':memory:', near_duplicates: bool = False, max_distance: int = 3,
+                 shingle_size: int = 4) -> None:
+        """
+        Args:
+            index_path (str): SQLite database holding the hashes, ``:memory:`` to keep them in memory.
+            near_duplicates (bool): Also detect near duplicates with SimHash.
+            max_distance (int): Largest SimHash Hamming distance still considered a near duplicate.
+            shingle_size (int): Words per shingle fed to SimHash.
+        """
+        if not 0 <= max_distance < _BITS // 2:
+            raise ValueError(f'max_distance must be between 0 and {_BITS // 2 - 1}')
+        self.near_duplicates = near_duplicates
+        self.max_distance = max_distance
+        self.shingle_size = shingle_size
+        self.stats = {'unique': 0, 'exact': 0, 'near': 0, 'bytes_seen': 0, 'bytes_saved': 0}
+        bands = max_distance + 1
+        self._band_bits = [_BITS * i // bands for i in range(bands + 1)]
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        if index_path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS contents (digest TEXT PRIMARY KEY, path TEXT, simhash INTEGER)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS bands (band INTEGER, value INTEGER, digest TEXT)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS bands_value ON bands (band, value)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS bands_digest ON bands (digest)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS contents_path ON contents (path)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS pointers (path TEXT PRIMARY KEY, digest TEXT)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS pointers_digest ON pointers (digest)')
+        self._db.commit()
+
+    def close(self) -> None:
+        """Closes the index."""
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def observe(self, path: str, data: bytes, near: bool = True) -> DedupResult:
+        """
+        Checks content about to be stored at ``path`` and records it.
+
+        Whatever was stored at ``path`` before is replaced: its own earlier
+        content is never reported as the match, and when other pointers
+        still refer to that content the result says where it must be moved.
+
+        Args:
+            path (str): Where the content will be stored.
+            data (bytes): The content.
+            near (bool): Look for near duplicates too (when enabled); turn off for binary content.
+
+        Returns:
+            DedupResult: Whether the content is a duplicate, and of which stored copy.
+        """
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        with self._lock:
+            self.stats['bytes_seen'] += len(data)
+            row = self._db.execute('SELECT path FROM contents WHERE digest = ?', (digest,)).fetchone()
+        # SimHash is only needed for new content and is computed outside the lock
+        simhash = simhash64(_shingles(_visible_text(data), self.shingle_size)) \
+            if self.near_duplicates and near and row is None else None
+        with self._lock:
+            result, target = DedupResult(digest, simhash), None
+            row = self._db.execute('SELECT path FROM contents WHERE digest = ?', (digest,)).fetchone()
+            if row is not None and row[0] == path:
+                # the same content saved again at the same place
+                self.stats['exact'] += 1
+                return DedupResult(digest, kind=EXACT, original=path)
+            if row is not None:
+                result, target = DedupResult(digest, kind=EXACT, original=row[0]), digest
+            elif simhash is not None:
+                match = self._nearest(simhash, path)
+                if match is not None:
+                    original, target, distance = match
+                    result = DedupResult(digest, simhash, NEAR, original, distance)
+            result.relocated, result.repointed = self._release(path)
+            if target is not None:
+                self.stats[result.kind] += 1
+                self.stats['bytes_saved'] += len(data)
+                self._db.execute('INSERT OR REPLACE INTO pointers (path, digest) VALUES (?, ?)', (path, target))
+            else:
+                self.stats['unique'] += 1
+                self._db.execute('INSERT OR IGNORE INTO contents (digest, path, simhash) VALUES (?, ?, ?)',
+                                 (digest, path, _signed(simhash) if simhash is not None else None))
+                if simhash is not None:
+                    self._db.executemany('INSERT INTO bands (band, value, digest) VALUES (?, ?, ?)',
+                                         [(band, value, digest) for band, value in enumerate(self._bands(simhash))])
+            self._db.commit()
+            return result
+
+    def report(self) -> Dict[str, float]:
+        """Returns the counters plus the duplicate ratio and the share of bytes not written."""
+        with self._lock:
+            stats: Dict[str, float] = dict(self.stats)
+        total = stats['unique'] + stats['exact'] + stats['near']
+        stats['duplicate_ratio'] = (stats['exact'] + stats['near']) / total if total else 0.0
+        stats['bytes_saved_ratio'] = stats['bytes_saved'] / stats['bytes_seen'] if stats['bytes_seen'] else 0.0
+        return stats
+
+    def _bands(self, simhash: int) -> List[int]:
+        bounds = self._band_bits
+        # signed: with max_distance=0 the single band is the whole 64-bit SimHash
+        return [_signed((simhash >> bounds[i]) & ((1 << (bounds[i + 1] - bounds[i])) - 1))
+                for i in range(len(bounds) - 1)]
+
+    def _nearest(self, simhash: int, exclude: str) -> Optional[Tuple[str, str, int]]:
+        """
+        Finds the closest stored SimHash within ``max_distance``, ignoring the content stored at ``exclude``.
+
+        Returns ``(path, digest, distance)``; the caller holds the lock.
+        """
+        best = None
+        checked = {exclude}
+        for band, value in enumerate(self._bands(simhash)):
+            for path, digest, other in self._db.execute(
+                'SELECT c.path, c.digest, c.simhash FROM bands b JOIN contents c ON c.digest = b.digest '
+                'WHERE b.band = ? AND b.value = ?', (band, value)
+            ):
+                if path in checked:
+                    continue
+                checked.add(path)
+                distance = (simhash ^ (other & (1 << _BITS) - 1)).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[2]):
+                    best = (path, digest, distance)
+        return best
+
+    def _release(self, path: str) -> Tuple[Optional[str], List[str]]:
+        """
+        Forgets what was stored at ``path``, which is about to be overwritten; the caller holds the lock.
+
+        Content that other pointers still refer to is handed to the oldest of them.
+
+        Returns:
+            Tuple[Optional[str], List[str]]: The pointer path that inherits the content, if any,
+            and the remaining pointers that must now point to it.
+        """
+        self._db.execute('DELETE FROM pointers WHERE path = ?', (path,))
+        heir, repointed = None, []
+        for (digest,) in self._db.execute('SELECT digest FROM contents WHERE path = ?', (path,)).fetchall():
+            dependents = [row[0] for row in self._db.execute(
+                'SELECT path FROM pointers WHERE digest = ? ORDER BY rowid', (digest,)
+            )]
+            if not dependents:
+                self._db.execute('DELETE FROM contents WHERE digest = ?', (digest,))
+                self._db.execute('DELETE FROM bands WHERE digest = ?', (digest,))
+                continue
+            heir, repointed = dependents[0], dependents[1:]
+            self._db.execute('UPDATE contents SET path = ? WHERE digest = ?', (heir, digest))
+            self._db.execute('DELETE FROM pointers WHERE path = ?', (heir,))
+        return heir, repointed
+
+
+def simhash64(features: Iterable[bytes]) -> int:
+    """
+    Computes the 64-bit SimHash of a sequence of features, all weighted equally.
+
+    Bit ``i`` of the result is set when most feature hashes have bit ``i``
+    set. Rather than counting each of the 64 columns separately, the
+    column counts are kept bit-sliced (one integer per bit of the count)
+    and updated with a ripple-carry add, a handful of integer operations
+    per feature.
+
+    Args:
+        features (Iterable[bytes]): The features, e.g. word shingles.
+
+    Returns:
+        int: The fingerprint; 0 when there are no features.
+    """
+    counters: List[int] = []
+    count = 0
+    for feature in features:
+        count += 1
+        carry = int.from_bytes(hashlib.blake2b(feature, digest_size=8).digest(), 'little')
+        for level, counter in enumerate(counters):
+            counters[level] = counter ^ carry
+            carry &= counter
+            if not carry:
+                break
+        else:
+            if carry:
+                counters.append(carry)
+    # columns whose count exceeds count // 2, compared slice by slice from the most significant
+    threshold = count // 2
+    greater, equal = 0, (1 << _BITS) - 1
+    for level in reversed(range(max(len(counters), threshold.bit_length()))):
+        counter = counters[level] if level < len(counters) else 0
+        if threshold >> level & 1:
+            equal &= counter
+        else:
+            greater |= equal & counter
+            equal &= ~counter
+    return greater
+
+
+def _visible_text(data: bytes) -> str:
+    """Drops scripts, styles and tags, leaving the text SimHash is computed on."""
+    return _TAGS.sub(b' ', _SCRIPTS.sub(b' ', data)).decode('utf-8', errors='ignore').lower()
+
+
+def _shingles(text: str, size: int) -> Iterable[bytes]:
+    words = _WORDS.findall(text)
+    if len(words) <= size:
+        return [' '.join(words).encode('utf-8')] if words else []
+    return (' '.join(words[i:i + size]).encode('utf-8') for i in range(len(words) - size + 1))
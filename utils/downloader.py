@@ -0,0 +1,352 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import requests
+
+_CONTENT_RANGE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot complete or fails verification."""
+
+
+class RemoteFileChangedError(DownloadError):
+    """Raised when the file changed on the server while resuming; the partial state is discarded."""
+
+
+@dataclass
+class DownloadProgress:
+    """
+    Snapshot passed to progress callbacks.
+
+    Attributes:
+        downloaded (int): Bytes written so far, including bytes resumed from a previous run.
+        total (Optional[int]): Expected size in bytes, None when the server does not announce it.
+        elapsed (float): Seconds since this run started.
+        speed (float): Bytes per second transferred during this run.
+    """
+    downloaded: int
+    total: Optional[int]
+    elapsed: float
+    speed: float
+
+    @property
+    def percent(self) -> Optional[float]:
+        return self.downloaded / self.total * 100 if self.total else None
+
+    @property
+    def eta(self) -> Optional[float]:
+        if not self.total or self.speed <= 0:
+            return None
+        return (self.total - self.downloaded) / self.speed
+
+
+class RangeDownloader:
+    """
+    Downloads large files as parallel byte ranges with resume support.
+
+    Data goes to ``<destination>.part`` and per-range progress to the sidecar
+    ``<destination>.part.json``; an interrupted download picks up from the
+    sidecar on the next call. The file is renamed into place only after its
+    size (and optional checksum) has been verified. Servers without range
+    support fall back to a single stream.
+    """
+
+    def __init__(
+        self,
+        request_handler=None,
+        parts: int = 4,
+        min_part_size: int = 8 * 1024 * 1024,
+        buffer_size: int = 1024 * 1024,
+        chunk_size: int = 256 * 1024,
+        timeout: float = 30,
+        retries: int = 3,
+        proxy_per_part: bool = False,
+        progress_callback: Optional[Callable[[DownloadProgress], None]] = None,
+        progress_interval: float = 0.5,
+        state_interval: float = 1.0,
+    ) -> None:
+        """
+        Args:
+            request_handler (Optional[RequestHandler]): Handler used for requests (pooling, proxies, rate limits).
+            parts (int): Number of ranges fetched in parallel.
+            min_part_size (int): Files smaller than ``parts * min_part_size`` use fewer ranges.
+            buffer_size (int): Bytes buffered per range before each write.
+            chunk_size (int): Bytes read from the socket at a time.
+            timeout (float): Per-request timeout in seconds.
+            retries (int): Attempts per range before the download fails.
+            proxy_per_part (bool): Draw a separate proxy for every range.
+            progress_callback (Optional[Callable[[DownloadProgress], None]]): Called at most every ``progress_interval`` seconds and once at the end.
+            progress_interval (float): Minimum seconds between progress callbacks.
+            state_interval (float): Minimum seconds between sidecar state writes.
+        """
+        if request_handler is None:
+            from .requests import RequestHandler
+            request_handler = RequestHandler()
+        self.request_handler = request_handler
+        self.parts = max(1, parts)
+        self.min_part_size = min_part_size
+        self.buffer_size = buffer_size
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.retries = retries
+        self.proxy_per_part = proxy_per_part
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.state_interval = state_interval
+
+    def download(self, url: str, destination: str, checksum: Optional[str] = None,
+                 expected_size: Optional[int] = None) -> str:
+        """
+        Downloads ``url`` to ``destination``, resuming a previous attempt when possible.
+
+        Args:
+            url (str): The file URL.
+            destination (str): Final path of the file.
+            checksum (Optional[str]): Expected digest as ``'<algorithm>:<hex>'``, e.g. ``'sha256:ab12...'``.
+            expected_size (Optional[int]): Expected size in bytes, checked in addition to ``Content-Length``.
+
+        Returns:
+            str: The destination path.
+
+        Raises:
+            DownloadError: If the transfer fails after retries or verification fails.
+        """
+        run = _DownloadRun(self, url, destination)
+        try:
+            run.execute()
+        finally:
+            run.close()
+        self._verify(run.part_path, run.total if run.total is not None else expected_size, checksum)
+        if expected_size is not None and run.total is not None and run.total != expected_size:
+            raise DownloadError(f'Server announced {run.total} bytes but {expected_size} were expected')
+        os.replace(run.part_path, destination)
+        run.remove_state()
+        return destination
+
+    @staticmethod
+    def _verify(path: str, size: Optional[int], checksum: Optional[str]) -> None:
+        """Checks the downloaded size and checksum."""
+        actual = os.path.getsize(path)
+        if size is not None and actual != size:
+            raise DownloadError(f'Downloaded {actual} bytes, expected {size}')
+        if checksum:
+            algorithm, _, expected = checksum.partition(':')
+            digest = hashlib.new(algorithm)
+            with open(path, 'rb') as file:
+                for block in iter(lambda: file.read(1024 * 1024), b''):
+                    digest.update(block)
+            if digest.hexdigest().lower() != expected.lower():
+                raise DownloadError(f'{algorithm} mismatch: got {digest.hexdigest()}, expected {expected}')
+
+
+class _DownloadRun:
+    """State of one ``RangeDownloader.download`` call."""
+
+    def __init__(self, downloader: RangeDownloader, url: str, destination: str) -> None:
+        self.downloader = downloader
+        self.handler = downloader.request_handler
+        self.url = url
+        self.part_path = f'{destination}.part'
+        self.state_path = f'{destination}.part.json'
+        self.total: Optional[int] = None
+        self.etag: Optional[str] = None
+        self.ranges: List[List[int]] = []  # [start, end (inclusive), bytes done]
+        self.proxies = None
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._resumed_bytes = 0
+        self._single_bytes = 0
+        self._last_progress = 0.0
+        self._last_state = 0.0
+        self._probe_response = None
+
+    def execute(self) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.proxies = self.handler._next_proxies()
+        if not self._load_state():
+            self._probe()
+        if self.ranges:
+            self._resumed_bytes = self._downloaded()
+            todo = [part for part in self.ranges if part[0] + part[2] <= part[1]]
+            with ThreadPoolExecutor(max_workers=len(todo) or 1, thread_name_prefix='download') as executor:
+                for future in [executor.submit(self._fetch_range, part) for part in todo]:
+                    future.result()
+            self._save_state(force=True)
+        else:
+            self._fetch_single()
+        self._report(force=True)
+
+    def close(self) -> None:
+        if self._probe_response is not None:
+            self._probe_response.close()
+
+    def remove_state(self) -> None:
+        try:
+            os.remove(self.state_path)
+        except FileNotFoundError:
+            pass
+
+    def _probe(self) -> None:
+        """Asks for the first byte to learn the size and whether ranges are supported."""
+        try:
+            response = self._get({'Range': 'bytes=0-0'})
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code != 416:
+                raise
+            response = self._get({})  # empty file: nothing to split
+        match = _CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+        if response.status_code == 206 and match and match.group(3) != '*':
+            response.close()
+            self.total = int(match.group(3))
+            self.etag = response.headers.get('ETag')
+            self._plan_ranges()
+            with open(self.part_path, 'wb') as file:
+                file.truncate(self.total)
+            self._save_state(force=True)
+        else:
+            # No range support: reuse this full response as the single stream.
+            length = response.headers.get('Content-Length')
+            self.total = int(length) if length and length.isdigit() else None
+            self._probe_response = response
+
+    def _plan_ranges(self) -> None:
+        """Splits the file into at most ``parts`` contiguous ranges."""
+        downloader = self.downloader
+        count = max(1, min(downloader.parts, self.total // max(1, downloader.min_part_size)))
+        size = -(-self.total // count) if self.total else 0
+        self.ranges = [
+            [start, min(start + size, self.total) - 1, 0] for start in range(0, self.total, size or 1)
+        ]
+
+    def _fetch_range(self, part: List[int]) -> None:
+        """Fetches the remainder of one range, retrying with a fresh proxy on failure."""
+        downloader = self.downloader
+        proxies = self.handler._next_proxies() if downloader.proxy_per_part else self.proxies
+        for attempt in range(1, downloader.retries + 1):
+            start = part[0] + part[2]
+            headers = {'Range': f'bytes={start}-{part[1]}'}
+            if self.etag:
+                headers['If-Range'] = self.etag
+            try:
+                response = self._get(headers, proxies)
+                if response.status_code == 200 and self.etag:
+                    response.close()
+                    self.remove_state()
+                    raise RemoteFileChangedError(f'{self.url} changed on the server since the download started')
+                if response.status_code != 206:
+                    response.close()
+                    raise DownloadError(f'Expected 206 for range {start}-{part[1]}, got {response.status_code}')
+                with response, open(self.part_path, 'r+b') as file:
+                    file.seek(start)
+                    self._copy(response, file, part)
+                if part[0] + part[2] <= part[1]:
+                    raise DownloadError(f'Range {part[0]}-{part[1]} ended early at {part[0] + part[2]}')
+                return
+            except RemoteFileChangedError:
+                raise
+            except (requests.exceptions.RequestException, DownloadError):
+                self._save_state(force=True)
+                if attempt == downloader.retries:
+                    raise
+                if self.handler.proxy_manager is not None:
+                    proxies = self.handler._next_proxies()
+
+    def _fetch_single(self) -> None:
+        """Streams the whole file when ranges are unavailable."""
+        response = self._probe_response
+        response.raise_for_status()
+        with open(self.part_path, 'wb') as file:
+            self._copy(response, file, None)
+
+    def _copy(self, response, file, part: Optional[List[int]]) -> None:
+        """Copies a response body into a file through a large write buffer."""
+        buffer = bytearray()
+        for chunk in response.iter_content(self.downloader.chunk_size):
+            buffer += chunk
+            if len(buffer) >= self.downloader.buffer_size:
+                self._flush(file, buffer, part)
+        if buffer:
+            self._flush(file, buffer, part)
+
+    def _flush(self, file, buffer: bytearray, part: Optional[List[int]]) -> None:
+        if part is not None:
+            remaining = part[1] - (part[0] + part[2]) + 1
+            del buffer[remaining:]
+        file.write(buffer)
+        with self._lock:
+            if part is not None:
+                part[2] += len(buffer)
+            else:
+                self._single_bytes += len(buffer)
+        buffer.clear()
+        if part is not None:
+            file.flush()
+            self._save_state()
+        self._report()
+
+    def _get(self, headers: dict, proxies=None):
+        # Ranges, Content-Length and checksums all refer to the bytes as sent, so ask for them unencoded;
+        # otherwise iter_content would write decompressed data against compressed offsets.
+        response = self.handler._request(
+            self.url, proxies if proxies is not None else self.proxies,
+            headers={'Accept-Encoding': 'identity', **headers}, stream=True, timeout=self.downloader.timeout,
+        )
+        if response.status_code >= 400:
+            response.close()
+            response.raise_for_status()
+        return response
+
+    def _downloaded(self) -> int:
+        if self.ranges:
+            return sum(part[2] for part in self.ranges)
+        return self._single_bytes
+
+    def _report(self, force: bool = False) -> None:
+        callback = self.downloader.progress_callback
+        if callback is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_progress < self.downloader.progress_interval:
+                return
+            self._last_progress = now
+            downloaded = self._downloaded()
+        elapsed = now - self._started
+        speed = (downloaded - self._resumed_bytes) / elapsed if elapsed > 0 else 0.0
+        callback(DownloadProgress(downloaded, self.total, elapsed, speed))
+
+    def _load_state(self) -> bool:
+        """Restores ranges from the sidecar if it matches this URL and the partial file exists."""
+        if not (os.path.exists(self.state_path) and os.path.exists(self.part_path)):
+            return False
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if state.get('url') != self.url or os.path.getsize(self.part_path) != state.get('total'):
+            return False
+        self.total, self.etag, self.ranges = state['total'], state.get('etag'), state['ranges']
+        return True
+
+    def _save_state(self, force: bool = False) -> None:
+        """Writes the sidecar atomically, at most every ``state_interval`` seconds unless forced."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_state < self.downloader.state_interval:
+                return
+            self._last_state = now
+            state = {'url': self.url, 'total': self.total, 'etag': self.etag,
+                     'ranges': [list(part) for part in self.ranges]}
+            tmp_path = f'{self.state_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(state, file)
+            os.replace(tmp_path, self.state_path)
@@ -1,14 +1,64 @@
 import os
 import csv
 import json
-from typing import Any, Dict, List, Optional
-from bs4 import BeautifulSoup  # Assuming BeautifulSoup is used for 'soup' objects
+import mmap
+import time
+import zlib
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .background_writer import BackgroundWriter
+from .json_stream import dumps_compact, iter_json_array, iter_json_lines
+from .metrics import Metrics
+
+if TYPE_CHECKING:
+    # only needed for annotations; keeps bs4 and sqlite3 out of the import path
+    from bs4 import BeautifulSoup
+    from .dedup import ContentDeduplicator, DedupResult
+
+# Suffix of the pointer files written in place of duplicate content.
+POINTER_SUFFIX = '.ref'
 
 
 class FileManager:
     """
     A utility class for managing file operations such as reading, writing, and ensuring directory existence.
+
+    When a ``BackgroundWriter`` is given, ``save_pdf``, ``save_json``, ``save_soup`` and
+    ``save_file`` queue their writes instead of blocking; call ``flush`` (or use the
+    manager as a context manager) to wait for them. When a ``Metrics`` instance
+    is given, every save records its size and duration.
+
+    When a ``ContentDeduplicator`` is given, ``save_soup`` and ``save_file`` skip
+    content that is already stored (or, with near-duplicate detection, nearly
+    so) and write a small ``<path>.ref`` JSON pointer to the stored copy
+    instead; ``resolve_path`` follows such pointers.
     """
+    DEDUP_KINDS = ('html', 'file')
+
+    def __init__(self, writer: Optional[BackgroundWriter] = None, metrics: Optional[Metrics] = None,
+                 dedup: Optional['ContentDeduplicator'] = None) -> None:
+        """
+        Args:
+            writer (Optional[BackgroundWriter]): Background writer for the save_* methods, None to write synchronously.
+            metrics (Optional[Metrics]): Registry receiving file write counters, None to disable.
+            dedup (Optional[ContentDeduplicator]): Duplicate detector for HTML and raw files, None to write everything.
+        """
+        self.writer = writer
+        self.metrics = metrics
+        self.dedup = dedup
+
+    def __enter__(self) -> 'FileManager':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+    def flush(self) -> None:
+        """
+        Waits until every queued background write is on disk.
+        """
+        if self.writer is not None:
+            self.writer.flush()
 
     def open_json(self, path: str) -> Any:
         """
@@ -23,6 +73,30 @@ class FileManager:
         with open(path, 'r', encoding='utf-8') as file:
             return json.load(file)
 
+    def iter_json(self, path: str, lines: Optional[bool] = None, chunk_size: int = 1 << 16) -> Iterator[Any]:
+        """
+        Streams a large JSON file item by item instead of loading it whole.
+
+        A top-level array yields its items; JSON Lines files yield one record per line,
+        parsed with orjson when it is installed.
+
+        Args:
+            path (str): The path to the JSON or JSON Lines file.
+            lines (Optional[bool]): Force JSON Lines parsing; by default files ending in
+                ``.jsonl`` or ``.ndjson`` are read as JSON Lines.
+            chunk_size (int): Characters read at a time for JSON arrays.
+
+        Yields:
+            Any: The array items or JSON Lines records.
+        """
+        if lines is None:
+            lines = path.endswith(('.jsonl', '.ndjson'))
+        with open(path, 'r', encoding='utf-8') as file:
+            if lines:
+                yield from iter_json_lines(file)
+            else:
+                yield from iter_json_array(file, chunk_size)
+
     def save_pdf(self, path: str, file_name: str, pdf: bytes) -> None:
         """
         Saves a PDF file to the specified path.
@@ -32,12 +106,10 @@ class FileManager:
             file_name (str): The name of the PDF file.
             pdf (bytes): The PDF content in bytes.
         """
-        self._ensure_directory_exists(path)
         path_pdf = os.path.join(path, f'{file_name}.pdf')
-        with open(path_pdf, 'wb') as file:
-            file.write(pdf)
+        self._write('pdf', path_pdf, pdf, directory=path)
 
-    def save_json(self, path: str, file_name: str, json_data: Any) -> None:
+    def save_json(self, path: str, file_name: str, json_data: Any, compact: bool = False) -> None:
         """
         Saves JSON data to a file.
 
@@ -45,13 +117,13 @@ class FileManager:
             path (str): The directory path where the JSON file will be saved.
             file_name (str): The name of the JSON file.
             json_data (Any): The JSON data to be saved.
+            compact (bool): Write without indentation, using orjson when it is installed.
         """
-        self._ensure_directory_exists(path)
         path_json = os.path.join(path, f'{file_name}.json')
-        with open(path_json, 'w', encoding='utf-8') as json_file:
-            json.dump(json_data, json_file, indent=4)
+        data = dumps_compact(json_data) if compact else json.dumps(json_data, indent=4)
+        self._write('json', path_json, data, directory=path)
 
-    def save_soup(self, path: str, file_name: str, soup: BeautifulSoup) -> None:
+    def save_soup(self, path: str, file_name: str, soup: 'BeautifulSoup') -> None:
         """
         Saves BeautifulSoup object as an HTML file.
 
@@ -60,10 +132,117 @@ class FileManager:
             file_name (str): The name of the HTML file.
             soup (BeautifulSoup): The BeautifulSoup object to be saved.
         """
-        self._ensure_directory_exists(path)
         path_soup = os.path.join(path, f'{file_name}.html')
-        with open(path_soup, 'w', encoding='utf-8') as file:
-            file.write(soup.prettify())
+        self._write('html', path_soup, soup.prettify(), directory=path)
+
+    def _write(self, kind: str, file_path: str, data: Union[bytes, str], directory: Optional[str] = None) -> None:
+        """
+        Writes a file, or queues it on the background writer, and records it in the metrics.
+
+        Args:
+            kind (str): Kind of file, used as the metrics label.
+            file_path (str): The destination path.
+            data (Union[bytes, str]): The content; strings are written as UTF-8.
+            directory (Optional[str]): Directory to create first on synchronous writes.
+        """
+        start = time.perf_counter() if self.metrics is not None else 0.0
+        if self.dedup is not None and kind in self.DEDUP_KINDS:
+            payload = data if isinstance(data, bytes) else data.encode('utf-8')
+            near = kind == 'html' or file_path.endswith(('.html', '.htm'))
+            result = self.dedup.observe(file_path, payload, near=near)
+            if result.relocated is not None:
+                self._relocate(file_path, result)
+            if result.duplicate and (result.original != file_path or os.path.exists(file_path)):
+                self._write_pointer(kind, file_path, result, len(payload), directory)
+                return
+            if os.path.exists(file_path + POINTER_SUFFIX):
+                os.remove(file_path + POINTER_SUFFIX)
+            data = payload
+        if self.writer is not None:
+            self.writer.submit(file_path, data)
+        else:
+            if directory is not None:
+                self._ensure_directory_exists(directory)
+            if isinstance(data, bytes):
+                with open(file_path, 'wb') as file:
+                    file.write(data)
+            else:
+                with open(file_path, 'w', encoding='utf-8') as file:
+                    file.write(data)
+        if self.metrics is not None:
+            size = len(data) if isinstance(data, bytes) else len(data.encode('utf-8'))
+            self.metrics.record_write(kind, size, time.perf_counter() - start)
+
+    def _write_pointer(self, kind: str, file_path: str, result: 'DedupResult', size: int,
+                       directory: Optional[str]) -> None:
+        """
+        Stores a duplicate as a pointer to its stored copy.
+
+        Args:
+            kind (str): Kind of file, used as the metrics label.
+            file_path (str): The destination path of the duplicate.
+            result (DedupResult): The match found by the deduplicator.
+            size (int): Bytes of the duplicate content.
+            directory (Optional[str]): Directory to create first on synchronous writes.
+        """
+        if self.metrics is not None:
+            self.metrics.record_duplicate(kind, result.kind, size)
+        if result.original == file_path:
+            return  # the same content saved again at the same place
+        if self.writer is not None:
+            self.writer.flush()  # an earlier save of this path may still be queued
+        if os.path.exists(file_path):
+            os.remove(file_path)  # stale copy from an earlier save
+        pointer_path = file_path + POINTER_SUFFIX
+        if self.writer is not None:
+            self.writer.submit(pointer_path, result.pointer())
+            return
+        if directory is not None:
+            self._ensure_directory_exists(directory)
+        with open(pointer_path, 'w', encoding='utf-8') as file:
+            file.write(result.pointer())
+
+    def _relocate(self, file_path: str, result: 'DedupResult') -> None:
+        """
+        Hands the content stored at ``file_path``, about to be overwritten, to the pointers that still use it.
+
+        The file is moved to ``result.relocated``, replacing its pointer, and the other pointers
+        listed in ``result.repointed`` are rewritten to point there.
+
+        Args:
+            file_path (str): The path about to be overwritten.
+            result (DedupResult): The deduplicator's decision for the new content.
+        """
+        if self.writer is not None:
+            self.writer.flush()  # the stored copy or the pointers may still be queued
+        heir = result.relocated
+        if os.path.exists(file_path):
+            os.replace(file_path, heir)
+        if os.path.exists(heir + POINTER_SUFFIX):
+            os.remove(heir + POINTER_SUFFIX)
+        for path in result.repointed:
+            pointer_path = path + POINTER_SUFFIX
+            with open(pointer_path, 'r', encoding='utf-8') as file:
+                pointer = json.load(file)
+            pointer['duplicate_of'] = heir
+            with open(pointer_path, 'w', encoding='utf-8') as file:
+                file.write(json.dumps(pointer))
+
+    def resolve_path(self, file_path: str) -> str:
+        """
+        Returns where the content saved at ``file_path`` actually lives, following dedup pointers.
+
+        Args:
+            file_path (str): The path the content was saved to.
+
+        Returns:
+            str: ``file_path`` itself, or the stored copy it duplicates.
+        """
+        pointer_path = file_path + POINTER_SUFFIX
+        if not os.path.exists(file_path) and os.path.exists(pointer_path):
+            with open(pointer_path, 'r', encoding='utf-8') as file:
+                return json.load(file)['duplicate_of']
+        return file_path
 
     def _ensure_directory_exists(self, directory: str) -> None:
         """
@@ -116,6 +295,57 @@ class FileManager:
                 html_files[file_name[:-5]] = html
         return html_files
 
+    def iter_html_from_path(
+        self,
+        path: str,
+        suffix: str = '.html',
+        name_filter: Optional[Callable[[str], bool]] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        mmap_threshold: Optional[int] = None,
+        decode: bool = True,
+    ) -> Iterator[Tuple[str, Union[str, bytes, mmap.mmap]]]:
+        """
+        Lazily yields the HTML files of a directory, one at a time.
+
+        Unlike ``get_all_html_from_path`` nothing is accumulated, so memory stays flat
+        regardless of the corpus size. Sharding is stable across processes: worker
+        ``i`` of ``n`` gets the files whose name hashes to ``i``.
+
+        Args:
+            path (str): The directory path to scan.
+            suffix (str): Only files ending with this suffix are yielded.
+            name_filter (Optional[Callable[[str], bool]]): Predicate on the name (without suffix).
+            shard (Optional[Tuple[int, int]]): ``(index, count)`` selecting this worker's share of the files.
+            mmap_threshold (Optional[int]): Files of at least this many bytes are memory-mapped instead of read.
+            decode (bool): Yield UTF-8 strings, with line endings as stored; when False yield bytes, or the
+                ``mmap`` itself for mapped files, which is only valid until the iterator advances. Decoding
+                copies the whole mapping, so mapping only saves memory with ``decode=False``.
+
+        Yields:
+            Tuple[str, Union[str, bytes, mmap.mmap]]: File name without suffix and its content.
+        """
+        if shard is not None and not 0 <= shard[0] < shard[1]:
+            raise ValueError(f'Invalid shard {shard!r}, expected (index, count) with 0 <= index < count')
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(suffix) or not entry.is_file():
+                    continue
+                name = entry.name[:-len(suffix)] if suffix else entry.name
+                if shard is not None and zlib.crc32(name.encode('utf-8')) % shard[1] != shard[0]:
+                    continue
+                if name_filter is not None and not name_filter(name):
+                    continue
+                if mmap_threshold is not None and entry.stat().st_size >= max(mmap_threshold, 1):
+                    with open(entry.path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        yield name, str(mapped, 'utf-8') if decode else mapped
+                elif decode:
+                    # newline='' keeps '\r\n' as the mapped branch does
+                    with open(entry.path, 'r', encoding='utf-8', newline='') as file:
+                        yield name, file.read()
+                else:
+                    with open(entry.path, 'rb') as file:
+                        yield name, file.read()
+
     def read_file(self, path: str) -> str:
         """
         Reads the content of a file and returns it as a string.
@@ -129,6 +359,20 @@ class FileManager:
         with open(path, 'r', encoding='utf-8') as file:
             return file.read()
 
+    def iter_lines(self, path: str) -> Iterator[str]:
+        """
+        Streams a text file line by line, without line endings.
+
+        Args:
+            path (str): The path to the file.
+
+        Yields:
+            str: The lines.
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                yield line.rstrip('\r\n')
+
     def create_and_write_csv(self, path: str, file_name: str, columns: List[str], data: List[List[Any]]) -> None:
         """
         Creates a CSV file and writes data to it.
@@ -178,8 +422,7 @@ class FileManager:
             path (str): The path where the file will be saved.
             file_content (bytes): The binary content to be saved.
         """
-        with open(path, 'wb') as file:
-            file.write(file_content)
+        self._write('file', path, file_content)
 
     def get_proxies_list(self) -> List[str]:
         """
@@ -0,0 +1,451 @@
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote, urljoin, urlsplit, urlunsplit
+
+TRACKING_PARAMS = frozenset({
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'utm_id',
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', 'yclid',
+})
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+# characters kept as-is in paths and queries; everything else is percent-encoded
+_PATH_SAFE = "/:@!$&'()*+,;=%"
+_QUERY_SAFE = "/:@!$'()*+,;=?%"
+_ESCAPE = re.compile('%([0-9A-Fa-f]{2})')
+_UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+
+
+def normalize_url(url: str, base: Optional[str] = None,
+                  drop_params: FrozenSet[str] = TRACKING_PARAMS) -> Optional[str]:
+    """
+    Puts a URL in canonical form so equivalent spellings dedup to the same string.
+
+    Relative URLs are resolved against ``base``; scheme and host are
+    lowercased, default ports, fragments and tracking parameters dropped,
+    dot segments resolved, percent-encoding made uniform and query
+    parameters sorted.
+
+    Args:
+        url (str): The URL, absolute or relative to ``base``.
+        base (Optional[str]): Page the URL was found on.
+        drop_params (FrozenSet[str]): Query parameters removed from the URL.
+
+    Returns:
+        Optional[str]: The canonical URL, or None for non-HTTP(S) or malformed URLs.
+    """
+    normalized = _normalize(url, base, drop_params)
+    return normalized[0] if normalized is not None else None
+
+
+def _normalize(url: str, base: Optional[str], drop_params: FrozenSet[str]) -> Optional[Tuple[str, str]]:
+    """``normalize_url`` that also returns the host, saving callers a second parse."""
+    url = url.strip()
+    if base is not None:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = parts.hostname
+    if scheme not in _DEFAULT_PORTS or not host:
+        return None
+    if ':' in host:
+        netloc_host = f'[{host}]'  # IPv6 literal
+    elif host.isascii():
+        netloc_host = host = host.rstrip('.')
+    else:
+        try:
+            netloc_host = host = host.rstrip('.').encode('idna').decode('ascii')
+        except UnicodeError:
+            return None
+    netloc = netloc_host if port is None or port == _DEFAULT_PORTS[scheme] else f'{netloc_host}:{port}'
+    if parts.username is not None:
+        credentials = parts.username + (f':{parts.password}' if parts.password is not None else '')
+        netloc = f'{credentials}@{netloc}'
+    path = quote(_normalize_escapes(_remove_dot_segments(parts.path or '/')), safe=_PATH_SAFE)
+    params = []
+    for param in parts.query.split('&'):
+        if not param:
+            continue
+        name = param.split('=', 1)[0]
+        if unquote(name.replace('+', ' ')).lower() not in drop_params:
+            params.append(quote(_normalize_escapes(param), safe=_QUERY_SAFE + '&'))
+    return urlunsplit((scheme, netloc, path, '&'.join(sorted(params)), '')), host
+
+
+def _normalize_escapes(text: str) -> str:
+    """Decodes percent-escapes of unreserved characters and uppercases the others."""
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        return char if char in _UNRESERVED else match.group(0).upper()
+    return _ESCAPE.sub(replace, text)
+
+
+def _remove_dot_segments(path: str) -> str:
+    """Resolves ``.`` and ``..`` segments as described in RFC 3986, section 5.2.4."""
+    output: List[str] = []
+    for segment in path.split('/')[1:]:
+        if segment == '..':
+            if output:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    resolved = '/' + '/'.join(output)
+    if path.endswith(('/.', '/..')) and not resolved.endswith('/'):
+        resolved += '/'
+    return resolved
+
+
+def _url_hash(url: str) -> Tuple[int, int]:
+    """Two independent 64-bit hashes of a URL."""
+    return struct.unpack('<QQ', hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest())
+
+
+class BloomFilter:
+    """
+    Bloom filter over a memory-mapped bit array, so it survives restarts and
+    only the pages in use stay resident.
+
+    Sized for ``capacity`` items at ``error_rate`` false positives: about
+    9.6 bits (1.2 bytes) per item at 1%, i.e. 120 MB for 100M URLs.
+    """
+    _HEADER = struct.Struct('<4sIQ')
+    _MAGIC = b'BLMF'
+
+    def __init__(self, path: str, capacity: int, error_rate: float = 0.01) -> None:
+        """
+        Args:
+            path (str): Bit array file; an existing file is reused with its own sizing.
+            capacity (int): Expected number of items.
+            error_rate (float): Target false positive rate at ``capacity`` items.
+        """
+        self.path = path
+        bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        exists = os.path.exists(path) and os.path.getsize(path) > self._HEADER.size
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        if exists:
+            magic, hashes, bits = self._HEADER.unpack(self._file.read(self._HEADER.size))
+            if magic != self._MAGIC:
+                self._file.close()
+                raise ValueError(f'{path!r} is not a Bloom filter file')
+        else:
+            self._file.write(self._HEADER.pack(self._MAGIC, hashes, bits))
+            self._file.truncate(self._HEADER.size + (bits + 7) // 8)
+        self.bits = bits
+        self.hashes = hashes
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _positions(self, h1: int, h2: int) -> Iterable[int]:
+        # double hashing (Kirsch-Mitzenmacher): k positions from two hashes
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add_hash(self, h1: int, h2: int) -> bool:
+        """
+        Adds an item given by its two hashes.
+
+        Returns:
+            bool: True when the item was certainly absent before.
+        """
+        added = False
+        data = self._map
+        offset = self._HEADER.size
+        for position in self._positions(h1, h2):
+            index = offset + (position >> 3)
+            mask = 1 << (position & 7)
+            byte = data[index]
+            if not byte & mask:
+                data[index] = byte | mask
+                added = True
+        return added
+
+    def contains_hash(self, h1: int, h2: int) -> bool:
+        data = self._map
+        offset = self._HEADER.size
+        return all(data[offset + (position >> 3)] & (1 << (position & 7)) for position in self._positions(h1, h2))
+
+    def add(self, item: str) -> bool:
+        """Adds an item; returns True when it was certainly absent before."""
+        return self.add_hash(*_url_hash(item))
+
+    def __contains__(self, item: str) -> bool:
+        return self.contains_hash(*_url_hash(item))
+
+    def flush(self) -> None:
+        """Writes dirty pages to disk."""
+        self._map.flush()
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+@dataclass
+class FrontierItem:
+    """
+    A URL handed out by the frontier, to be completed or released.
+
+    Attributes:
+        id (int): Queue row identifier.
+        url (str): Normalised URL.
+        host (str): Host the URL belongs to, the politeness unit.
+        priority (float): Scheduling priority; lower values are fetched first.
+        depth (int): Link depth from the seeds.
+    """
+    id: int
+    url: str
+    host: str
+    priority: float
+    depth: int
+
+
+class Frontier:
+    """
+    Persistent crawl frontier: deduplicates URLs and schedules them per host.
+
+    Seen URLs are tracked by a ``BloomFilter`` backed by an exact set of
+    64-bit URL hashes in SQLite, so a Bloom hit (seen or false positive)
+    costs one indexed lookup and a miss costs none. Queued URLs live in
+    SQLite as well; only one scheduling entry per host with pending URLs is
+    kept in memory, which keeps the footprint to the Bloom filter's pages
+    plus the SQLite cache even with 100M+ URLs.
+
+    A host is not handed out again before its politeness delay has passed
+    since its previous URL. Progress is committed every ``checkpoint_every``
+    operations (and by ``checkpoint``/``close``); after a crash the frontier
+    resumes from the last checkpoint and URLs that were in flight are
+    queued again.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        capacity: int = 10_000_000,
+        error_rate: float = 0.01,
+        delay: float = 1.0,
+        host_delays: Optional[Dict[str, float]] = None,
+        checkpoint_every: int = 10_000,
+        drop_params: FrozenSet[str] = TRACKING_PARAMS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            directory (str): Directory holding the Bloom filter and the SQLite database.
+            capacity (int): Expected number of distinct URLs, used to size the Bloom filter.
+            error_rate (float): Bloom filter false positive rate at ``capacity``.
+            delay (float): Default seconds between two URLs of the same host.
+            host_delays (Optional[Dict[str, float]]): Per-host delays, e.g. from robots.txt ``Crawl-delay``.
+            checkpoint_every (int): Operations between automatic commits.
+            drop_params (FrozenSet[str]): Query parameters removed during normalisation.
+            clock (Callable[[], float]): Monotonic time source.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.delay = delay
+        self.host_delays = {host.lower(): value for host, value in (host_delays or {}).items()}
+        self.checkpoint_every = checkpoint_every
+        self.drop_params = drop_params
+        self.clock = clock
+        self.stats = {'added': 0, 'duplicates': 0, 'false_positives': 0, 'invalid': 0}
+        self._lock = threading.RLock()
+        self._bloom = BloomFilter(os.path.join(directory, 'seen.bloom'), capacity, error_rate)
+        self._db = sqlite3.connect(os.path.join(directory, 'frontier.sqlite3'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS seen (hash INTEGER PRIMARY KEY)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS queue (id INTEGER PRIMARY KEY, host TEXT NOT NULL, priority REAL NOT NULL, '
+            'depth INTEGER NOT NULL, url TEXT NOT NULL, leased INTEGER NOT NULL DEFAULT 0)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS queue_next ON queue (host, leased, priority, id)')
+        # URLs handed out before a crash were never completed: fetch them again
+        self._db.execute('UPDATE queue SET leased = 0 WHERE leased = 1')
+        self._db.commit()
+        self._pending: Dict[str, int] = {}
+        self._next_allowed: Dict[str, float] = {}
+        self._ready: List[Tuple[float, str]] = []
+        self._uncommitted = 0
+        now = clock()
+        for host, count in self._db.execute('SELECT host, COUNT(*) FROM queue GROUP BY host'):
+            self._pending[host] = count
+            heapq.heappush(self._ready, (now, host))
+
+    def __enter__(self) -> 'Frontier':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of queued URLs not yet handed out."""
+        with self._lock:
+            return sum(self._pending.values())
+
+    def add(self, url: str, priority: float = 0.0, depth: int = 0, base: Optional[str] = None) -> bool:
+        """
+        Queues a URL unless it was seen before.
+
+        Args:
+            url (str): The URL, absolute or relative to ``base``.
+            priority (float): Lower values are fetched first within the host.
+            depth (int): Link depth from the seeds.
+            base (Optional[str]): Page the URL was found on.
+
+        Returns:
+            bool: True when the URL was new and queued.
+        """
+        normalized = _normalize(url, base, self.drop_params)
+        with self._lock:
+            if normalized is None:
+                self.stats['invalid'] += 1
+                return False
+            normalized, host = normalized
+            if not self._mark_seen(normalized):
+                self.stats['duplicates'] += 1
+                return False
+            self._db.execute('INSERT INTO queue (host, priority, depth, url) VALUES (?, ?, ?, ?)',
+                             (host, priority, depth, normalized))
+            if not self._pending.get(host):
+                heapq.heappush(self._ready, (max(self.clock(), self._next_allowed.get(host, 0.0)), host))
+            self._pending[host] = self._pending.get(host, 0) + 1
+            self.stats['added'] += 1
+            self._count_operation()
+            return True
+
+    def add_many(self, urls: Iterable[str], priority: float = 0.0, depth: int = 0,
+                 base: Optional[str] = None) -> int:
+        """Queues several URLs found on the same page; returns how many were new."""
+        return sum(self.add(url, priority, depth, base) for url in urls)
+
+    def seen(self, url: str, base: Optional[str] = None) -> bool:
+        """Tells whether a URL was already added."""
+        normalized = normalize_url(url, base, self.drop_params)
+        if normalized is None:
+            return False
+        h1, h2 = _url_hash(normalized)
+        with self._lock:
+            if not self._bloom.contains_hash(h1, h2):
+                return False
+            return self._db.execute('SELECT 1 FROM seen WHERE hash = ?', (_signed(h1),)).fetchone() is not None
+
+    def pop(self) -> Optional[FrontierItem]:
+        """
+        Hands out the best URL of the host that has waited its politeness delay the longest.
+
+        Returns:
+            Optional[FrontierItem]: The URL, or None when no host is ready (see ``wait_time``).
+        """
+        with self._lock:
+            now = self.clock()
+            while self._ready and self._ready[0][0] <= now:
+                _, host = heapq.heappop(self._ready)
+                row = self._db.execute(
+                    'SELECT id, url, priority, depth FROM queue WHERE host = ? AND leased = 0 '
+                    'ORDER BY priority, id LIMIT 1', (host,)
+                ).fetchone()
+                if row is None:
+                    self._pending.pop(host, None)
+                    continue
+                self._db.execute('UPDATE queue SET leased = 1 WHERE id = ?', (row[0],))
+                next_allowed = now + self.host_delays.get(host, self.delay)
+                self._next_allowed[host] = next_allowed
+                remaining = self._pending[host] - 1
+                if remaining:
+                    self._pending[host] = remaining
+                    heapq.heappush(self._ready, (next_allowed, host))
+                else:
+                    del self._pending[host]
+                self._count_operation()
+                return FrontierItem(row[0], row[1], host, row[2], row[3])
+            return None
+
+    def wait_time(self) -> Optional[float]:
+        """Seconds until ``pop`` can return a URL, or None when nothing is queued."""
+        with self._lock:
+            if not self._ready:
+                return None
+            return max(self._ready[0][0] - self.clock(), 0.0)
+
+    def complete(self, item: FrontierItem) -> None:
+        """Removes a fetched URL from the queue."""
+        with self._lock:
+            self._db.execute('DELETE FROM queue WHERE id = ?', (item.id,))
+            self._count_operation()
+
+    def release(self, item: FrontierItem, delay: Optional[float] = None) -> None:
+        """
+        Puts a URL that could not be fetched back in the queue.
+
+        Args:
+            item (FrontierItem): The URL.
+            delay (Optional[float]): Extra seconds before its host is contacted again, e.g. from ``Retry-After``.
+        """
+        with self._lock:
+            self._db.execute('UPDATE queue SET leased = 0 WHERE id = ?', (item.id,))
+            if delay is not None:
+                self.defer_host(item.host, delay)
+            if not self._pending.get(item.host):
+                heapq.heappush(self._ready, (max(self.clock(), self._next_allowed.get(item.host, 0.0)), item.host))
+            self._pending[item.host] = self._pending.get(item.host, 0) + 1
+            self._count_operation()
+
+    def defer_host(self, host: str, delay: float) -> None:
+        """Keeps a host from being handed out for ``delay`` seconds."""
+        with self._lock:
+            host = host.lower()
+            until = self.clock() + delay
+            self._next_allowed[host] = max(self._next_allowed.get(host, 0.0), until)
+            if self._pending.get(host):
+                # move the host's scheduling entry to the new time
+                self._ready = [(max(ready, until) if name == host else ready, name) for ready, name in self._ready]
+                heapq.heapify(self._ready)
+
+    def checkpoint(self) -> None:
+        """Makes every change so far durable."""
+        with self._lock:
+            # Bloom filter first: a filter ahead of the seen table only costs an exact lookup, but one
+            # behind it would let adds skip the lookup and queue duplicates.
+            self._bloom.flush()
+            self._db.commit()
+            self._uncommitted = 0
+
+    def close(self) -> None:
+        """Checkpoints and closes the frontier."""
+        with self._lock:
+            self.checkpoint()
+            self._db.close()
+            self._bloom.close()
+
+    def _mark_seen(self, url: str) -> bool:
+        """Adds a URL to the seen set; returns False when it was already there."""
+        h1, h2 = _url_hash(url)
+        maybe_seen = not self._bloom.add_hash(h1, h2)
+        key = _signed(h1)
+        if maybe_seen and self._db.execute('SELECT 1 FROM seen WHERE hash = ?', (key,)).fetchone() is not None:
+            return False
+        if maybe_seen:
+            self.stats['false_positives'] += 1
+        self._db.execute('INSERT OR IGNORE INTO seen (hash) VALUES (?)', (key,))
+        return True
+
+    def _count_operation(self) -> None:
+        self._uncommitted += 1
+        if self._uncommitted >= self.checkpoint_every:
+            self.checkpoint()
+
+
+def _signed(value: int) -> int:
+    """Maps an unsigned 64-bit hash to SQLite's signed INTEGER range."""
+    return value - (1 << 64) if value >= 1 << 63 else value
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+_MAX_AGE = re.compile(r'max-age\s*=\s*(\d+)', re.IGNORECASE)
+# Headers describing the wire encoding, which no longer match the decoded body on disk.
+_BODY_HEADERS = ('content-length', 'content-encoding', 'transfer-encoding')
+
+
+@dataclass
+class CacheEntry:
+    """
+    Metadata of one cached response.
+
+    Attributes:
+        key (str): Cache key derived from method, URL and the selected request headers.
+        url (str): The cached URL.
+        status_code (int): Status of the stored response.
+        headers (Dict[str, str]): Stored response headers.
+        digest (str): SHA-256 of the body, naming its file in the object store.
+        size (int): Body size in bytes.
+        expires_at (float): Wall-clock time after which the entry must be revalidated.
+        etag (Optional[str]): ``ETag`` validator, if any.
+        last_modified (Optional[str]): ``Last-Modified`` validator, if any.
+    """
+    key: str
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    digest: str
+    size: int
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache with content-addressed bodies and an LRU byte budget.
+
+    Bodies live in ``objects/<aa>/<sha256>`` so identical pages are stored once;
+    metadata lives in a SQLite index. Stale entries with validators are
+    revalidated with ``If-None-Match``/``If-Modified-Since`` so a 304 only costs
+    the headers.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 1 << 30,
+        default_ttl: float = 3600.0,
+        ttl_rules: Optional[Iterable[Tuple[str, float]]] = None,
+        vary_headers: Iterable[str] = (),
+        respect_cache_control: bool = True,
+    ) -> None:
+        """
+        Args:
+            directory (str): Directory holding the index and the object store.
+            max_bytes (int): Byte budget for stored bodies; least recently used entries are evicted beyond it.
+            default_ttl (float): Freshness lifetime in seconds when no rule or header applies.
+            ttl_rules (Optional[Iterable[Tuple[str, float]]]): ``(regex, ttl)`` pairs matched against the URL, first match wins.
+            vary_headers (Iterable[str]): Request headers that take part in the cache key.
+            respect_cache_control (bool): Honour ``Cache-Control`` ``max-age``/``no-store`` from responses.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in (ttl_rules or [])]
+        self.vary_headers = [header.lower() for header in vary_headers]
+        self.respect_cache_control = respect_cache_control
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0, 'bytes_saved': 0}
+
+        self._objects = os.path.join(directory, 'objects')
+        os.makedirs(self._objects, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, digest TEXT, size INTEGER, '
+            'expires_at REAL, etag TEXT, last_modified TEXT, last_access REAL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self._db.commit()
+        row = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)').fetchone()
+        self.total_bytes = row[0]
+
+    def close(self) -> None:
+        """Closes the index."""
+        with self._lock:
+            self._db.close()
+
+    def key_for(self, method: str, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        Builds the cache key of a request.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            headers (Optional[Dict[str, str]]): Request headers; only ``vary_headers`` are used.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        lowered = {name.lower(): value for name, value in (headers or {}).items()}
+        parts = [method.upper(), url] + [f'{name}:{lowered.get(name, "")}' for name in self.vary_headers]
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def lookup(self, method: str, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[CacheEntry]:
+        """
+        Finds the cached entry of a request, fresh or stale (counted as a miss or stale lookup).
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            headers (Optional[Dict[str, str]]): Request headers.
+
+        Returns:
+            Optional[CacheEntry]: The entry, or None on a miss.
+        """
+        key = self.key_for(method, url, headers)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT key, url, status, headers, digest, size, expires_at, etag, last_modified '
+                'FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None or not os.path.exists(self._object_path(row[4])):
+            self.stats['misses'] += 1
+            return None
+        entry = CacheEntry(row[0], row[1], row[2], json.loads(row[3]), *row[4:])
+        if not entry.fresh:
+            self.stats['stale'] += 1
+        return entry
+
+    def conditional_headers(self, entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """
+        Returns the validators to send when revalidating an entry.
+
+        Args:
+            entry (Optional[CacheEntry]): The stale entry, if any.
+
+        Returns:
+            Dict[str, str]: ``If-None-Match``/``If-Modified-Since`` headers, possibly empty.
+        """
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def hit(self, entry: CacheEntry) -> requests.Response:
+        """
+        Serves a fresh entry.
+
+        Args:
+            entry (CacheEntry): The fresh entry.
+
+        Returns:
+            requests.Response: The cached response.
+        """
+        self.stats['hits'] += 1
+        self.stats['bytes_saved'] += entry.size
+        self._touch(entry.key)
+        return self.to_response(entry)
+
+    def revalidated(self, entry: CacheEntry, response: requests.Response) -> requests.Response:
+        """
+        Refreshes an entry after a 304 and serves the stored body.
+
+        Args:
+            entry (CacheEntry): The stale entry that was revalidated.
+            response (requests.Response): The 304 response.
+
+        Returns:
+            requests.Response: The cached response with refreshed headers.
+        """
+        self.stats['revalidated'] += 1
+        self.stats['bytes_saved'] += entry.size
+        entry.headers.update(
+            {name: value for name, value in response.headers.items() if name.lower() not in _BODY_HEADERS}
+        )
+        entry.expires_at = time.time() + self._ttl(entry.url, response.headers)
+        entry.etag = response.headers.get('ETag', entry.etag)
+        entry.last_modified = response.headers.get('Last-Modified', entry.last_modified)
+        with self._lock:
+            self._db.execute(
+                'UPDATE entries SET headers = ?, expires_at = ?, etag = ?, last_modified = ?, last_access = ? WHERE key = ?',
+                (json.dumps(entry.headers), entry.expires_at, entry.etag, entry.last_modified, time.time(), entry.key),
+            )
+            self._db.commit()
+        return self.to_response(entry)
+
+    def store(self, method: str, url: str, request_headers: Optional[Dict[str, str]], response: requests.Response) -> bool:
+        """
+        Stores a successful response, evicting old entries to stay under the byte budget.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            request_headers (Optional[Dict[str, str]]): Request headers used for the key.
+            response (requests.Response): The response to store.
+
+        Returns:
+            bool: True if the response was stored.
+        """
+        if response.status_code != 200 or self._no_store(response.headers):
+            return False
+        body = response.content
+        if len(body) > self.max_bytes:
+            return False
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        key = self.key_for(method, url, request_headers)
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _BODY_HEADERS}
+        now = time.time()
+
+        with self._lock:
+            blob_known = self._db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone()
+            if not blob_known or not os.path.exists(path):
+                self._write_object(path, body)
+            previous = self._db.execute('SELECT digest FROM entries WHERE key = ?', (key,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, response.status_code, json.dumps(headers), digest, len(body),
+                 now + self._ttl(url, response.headers), response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), now),
+            )
+            if not blob_known:
+                self.total_bytes += len(body)
+            if previous is not None and previous[0] != digest:
+                self._release_object(previous[0])
+            self._evict()
+            self._db.commit()
+        self.stats['stored'] += 1
+        return True
+
+    def to_response(self, entry: CacheEntry) -> requests.Response:
+        """
+        Rebuilds a ``requests.Response`` from an entry.
+
+        Args:
+            entry (CacheEntry): The cache entry.
+
+        Returns:
+            requests.Response: A response whose body is read from the object store.
+        """
+        response = requests.Response()
+        with open(self._object_path(entry.digest), 'rb') as file:
+            response._content = file.read()
+        response.status_code = entry.status_code
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.url = entry.url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def _ttl(self, url: str, headers) -> float:
+        """Resolves the freshness lifetime of a response."""
+        if self.respect_cache_control:
+            match = _MAX_AGE.search(headers.get('Cache-Control', ''))
+            if match:
+                return float(match.group(1))
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def _no_store(self, headers) -> bool:
+        return self.respect_cache_control and 'no-store' in headers.get('Cache-Control', '').lower()
+
+    def _touch(self, key: str) -> None:
+        """Records an access for LRU ordering."""
+        with self._lock:
+            self._db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+
+    def _evict(self) -> None:
+        """Drops least recently used entries until the byte budget is met; caller holds the lock."""
+        while self.total_bytes > self.max_bytes:
+            victims: List[Any] = self._db.execute(
+                'SELECT key, digest FROM entries ORDER BY last_access LIMIT 64'
+            ).fetchall()
+            if not victims:
+                break
+            for key, digest in victims:
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._release_object(digest)
+                self.stats['evicted'] += 1
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def _release_object(self, digest: str) -> None:
+        """Deletes a body once no entry references it; caller holds the lock."""
+        if self._db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+            return
+        path = self._object_path(digest)
+        try:
+            self.total_bytes -= os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self._objects, digest[:2], digest)
+
+    @staticmethod
+    def _write_object(path: str, body: bytes) -> None:
+        """Writes a body atomically."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(body)
+        os.replace(tmp_path, path)
@@ -0,0 +1,167 @@
+import json
+from typing import IO, Any, Iterator, Union
+
+try:
+    import orjson
+except ImportError:  # optional fast backend
+    orjson = None
+
+_WHITESPACE = ' \t\r\n'
+_DELIMITERS = _WHITESPACE + ',]}'
+_NUMBER_START = '-0123456789'
+_decoder = json.JSONDecoder()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parses one JSON document with orjson when installed, else the standard library.
+
+    Args:
+        data (Union[str, bytes]): The document.
+
+    Returns:
+        Any: The parsed value.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_compact(data: Any) -> bytes:
+    """
+    Serialises a value without indentation or spaces, as UTF-8 bytes.
+
+    orjson is used when installed; values it does not support (e.g. non-string
+    keys) fall back to the standard library.
+
+    Args:
+        data (Any): The value to serialise.
+
+    Returns:
+        bytes: The encoded document.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def iter_json_lines(file: IO[str]) -> Iterator[Any]:
+    """
+    Yields the records of a JSON Lines stream, skipping blank lines.
+
+    Args:
+        file (IO[str]): A text stream.
+
+    Yields:
+        Any: One parsed record per line.
+    """
+    for line in file:
+        if line.strip():
+            yield loads(line)
+
+
+def iter_json_array(file: IO[str], chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yields the items of a top-level JSON array one at a time.
+
+    The file is read in chunks and items are decoded with ``raw_decode`` from a
+    buffer that only holds the item being parsed, so memory is bounded by the
+    largest item rather than the file. A top-level value that is not an array,
+    or several concatenated documents, are yielded as a sequence of values.
+
+    Args:
+        file (IO[str]): A text stream.
+        chunk_size (int): Characters read at a time.
+
+    Yields:
+        Any: The array items.
+
+    Raises:
+        json.JSONDecodeError: If the stream is not valid JSON.
+    """
+    reader = _ChunkReader(file, chunk_size)
+    if not reader.skip_whitespace():
+        return
+    if reader.peek() != '[':
+        while reader.skip_whitespace():
+            yield reader.decode()
+        return
+    reader.advance(1)
+    if not reader.skip_whitespace():
+        raise json.JSONDecodeError('Unterminated array', reader.buffer, reader.pos)
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.decode()
+        if not reader.skip_whitespace():
+            raise json.JSONDecodeError('Unterminated array', reader.buffer, reader.pos)
+        separator = reader.peek()
+        reader.advance(1)
+        if separator == ']':
+            return
+        if separator != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", reader.buffer, reader.pos - 1)
+        reader.skip_whitespace()
+
+
+class _ChunkReader:
+    """Sliding text buffer over a stream for incremental ``raw_decode``."""
+
+    def __init__(self, file: IO[str], chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int) -> bool:
+        """Appends up to ``size`` characters, dropping what was already consumed."""
+        if self.eof:
+            return False
+        chunk = self.file.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self) -> bool:
+        """Moves past whitespace; returns False at the end of the stream."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return True
+            if not self.fill(self.chunk_size):
+                return False
+
+    def peek(self) -> str:
+        return self.buffer[self.pos]
+
+    def advance(self, count: int) -> None:
+        self.pos += count
+
+    def decode(self) -> Any:
+        """Decodes the value at the cursor, reading more while it is incomplete."""
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill(size):
+                    raise
+                size *= 2  # large item: grow reads so re-parsing stays linear overall
+                continue
+            # a number cut by the chunk boundary ("12" of "123", "1." of "1.5") still decodes,
+            # so only accept it once a delimiter follows
+            truncated = end == len(self.buffer) or (
+                self.buffer[self.pos] in _NUMBER_START and self.buffer[end] not in _DELIMITERS
+            )
+            if truncated and not self.eof and self.fill(size):
+                continue
+            self.pos = end
+            return value
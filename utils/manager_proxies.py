@@ -1,14 +1,86 @@
+import heapq
+import logging
 import random
+import threading
+from functools import partial
 from .filemanager import FileManager
+from .proxy_sources import ProxySource
+from .proxy_scoring import ProxyScore, ProxyScorer, WeightedSampler
+from .proxy_state import STATUS_ACTIVE, STATUS_FAILED, STATUS_UNTOUCHED, SharedProxyState
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyPoolExhaustedError(RuntimeError):
+    """Raised when every proxy in the pool has been marked as failed."""
+
 
 class ProxyManager:
     """
     Manages proxies, keeping active proxies in use and deactivating failed ones.
+
+    Proxies live in ``proxy_list`` (one slot per proxy, in file order). Two
+    indexes keep every operation constant time: ``server``/request URL to slot
+    lookups for marking, and a dense array of active proxies for selection.
+
+    With ``strategy='weighted'`` each proxy also carries a ``ProxyScore``:
+    selection favours fast, healthy proxies and failures put a proxy on an
+    exponentially growing cooldown instead of retiring it for good.
+
+    With a ``Metrics`` instance every reported outcome updates the pool gauges.
+
+    The manager is safe to share between threads: the indexes and the sampler
+    sit behind one short lock, while score updates are serialised per slot by
+    striped locks, so concurrent marks of different proxies rarely contend.
+    With ``shared_state_path`` the health of every proxy is also kept in a
+    ``SharedProxyState`` file, and each selection first applies the marks
+    made by the other processes using the same file.
+
+    The proxy file may use any format ``parse_proxy_line`` accepts; bad lines
+    are skipped and listed in ``bad_lines``, and a file without a single
+    usable proxy raises ``ValueError``. ``reload`` (or ``watch`` in the
+    background) merges a changed file into the running pool: known proxies
+    keep their slot, status and score, new ones are appended and removed ones
+    retired, in small batches so selection never waits long on the lock.
     """
-    def __init__(self, proxy_file_path='Webshare 100 proxies.txt') -> None:
+    STRATEGIES = ('uniform', 'weighted')
+    LOCK_STRIPES = 64
+    RELOAD_BATCH = 1024
+
+    def __init__(self, proxy_file_path='Webshare 100 proxies.txt', strategy='uniform', scorer=None,
+                 metrics=None, shared_state_path=None) -> None:
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f'Unknown proxy selection strategy {strategy!r}, expected one of {self.STRATEGIES}')
         self.filemanager = FileManager()
         self.proxy_file_path = proxy_file_path
+        self.strategy = strategy
+        self.source = ProxySource(proxy_file_path, self.filemanager)
         self.proxy_list = self._load_proxy_list()
+        if not self.proxy_list:
+            raise ValueError(self._empty_message())
+        self._server_index = {}
+        self._url_index = {}
+        self._active_proxies = []
+        self._active_pos = {}
+        self.scorer = scorer or ProxyScorer()
+        self.scores = []
+        self._sampler = None
+        self._cooldowns = []
+        self.metrics = metrics
+        self._lock = threading.RLock()
+        self._stripes = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._retired = {}
+        self._reload_lock = threading.Lock()
+        self._watch_stop = None
+        self._build_index()
+        self.shared_state = None
+        self._shared_cursor = 0
+        if shared_state_path is not None:
+            self.shared_state = SharedProxyState(shared_state_path, [proxy['server'] for proxy in self.proxy_list])
+            self._sync_shared(full=True)
+        if metrics is not None:
+            metrics.record_proxy(self)
         self.current_proxy = self._format_proxy_for_playwright(random.choice(self.proxy_list))
 
     def get_proxy(self):
@@ -17,52 +89,371 @@ class ProxyManager:
 
     def generate_proxy(self):
         """Generates a new active proxy formatted for requests."""
-        while True:
-            proxy = random.choice(self.proxy_list)
-            if self._is_proxy_active(proxy):
-                self.current_proxy = proxy
-                return self._format_proxy_for_requests(proxy)
+        with self._lock:
+            if self.shared_state is not None:
+                self._sync_shared()
+            if self._sampler is not None:
+                self._release_cooldowns()
+            if not self._active_proxies:
+                raise ProxyPoolExhaustedError(self._exhausted_message())
+            if self._sampler is not None:
+                proxy = self.proxy_list[self._sampler.sample()]
+            else:
+                proxy = random.choice(self._active_proxies)
+            self.current_proxy = proxy
+        return self._format_proxy_for_requests(proxy)
 
-    def mark_proxy_as_successful(self, proxy):
-        """Marks the given proxy as successful."""
-        pos = self._find_proxy_position('server', proxy['server'])
-        if pos is not None:
-            self.proxy_list[pos]['Status'] = 1
+    def mark_proxy_as_successful(self, proxy, latency=None):
+        """Marks the given proxy as successful, optionally recording its latency in seconds."""
+        pos = self._resolve_slot(proxy)
+        if pos is None:
+            pass
+        elif self.shared_state is not None:
+            self.shared_state.update(pos, partial(self._record_success, latency=latency))
+            self._sync_shared()
+        else:
+            with self._stripes[pos % self.LOCK_STRIPES]:
+                self.proxy_list[pos]['Status'] = 1
+                if self._sampler is None and pos in self._active_pos:
+                    pass  # already selectable: no index change, no global lock
+                else:
+                    weight = None
+                    if self._sampler is not None:
+                        score = self.scores[pos]
+                        self.scorer.record_success(score, latency)
+                        weight = self.scorer.weight(score)
+                    with self._lock:
+                        self._activate(pos)
+                        if weight is not None:
+                            self._sampler.set(pos, weight)
+        if self.metrics is not None:
+            self.metrics.record_proxy(self, proxy, success=True)
 
     def mark_proxy_as_failed(self, proxy):
         """Marks the given proxy as failed."""
-        pos = self._find_proxy_position('server', proxy['server'])
-        if pos is not None:
-            self.proxy_list[pos]['Status'] = 0
-            self.current_proxy['Status'] = 0
+        pos = self._resolve_slot(proxy)
+        if pos is None:
+            pass
+        elif self.shared_state is not None:
+            self.shared_state.update(pos, self._record_failure)
+            self._sync_shared()
+        else:
+            with self._stripes[pos % self.LOCK_STRIPES]:
+                self.proxy_list[pos]['Status'] = 0
+                if self._sampler is None and pos not in self._active_pos:
+                    pass  # already retired
+                else:
+                    until = self.scorer.record_failure(self.scores[pos]) if self._sampler is not None else None
+                    with self._lock:
+                        self._deactivate(pos)
+                        if until is not None:
+                            self._sampler.set(pos, 0.0)
+                            heapq.heappush(self._cooldowns, (until, pos))
+        if self.metrics is not None:
+            self.metrics.record_proxy(self, proxy, success=False)
+
+    @property
+    def bad_lines(self):
+        """Lines of the proxy file skipped at the last load, as ``BadProxyLine`` tuples."""
+        return self.source.bad_lines
+
+    def reload(self, force=False):
+        """
+        Merges the proxy file into the pool if it changed since it was last read.
+
+        Proxies still listed keep their slot, status and score (changed
+        credentials are updated in place); new ones are added as untouched
+        proxies and the ones no longer listed are retired. A retired proxy
+        that comes back gets its old health back.
+
+        Args:
+            force (bool): Reload even if the file looks unchanged.
+
+        Returns:
+            Optional[dict]: Counts of ``added``, ``removed``, ``updated`` and ``bad_lines``, or None
+            when the file did not change.
+        """
+        if self.shared_state is not None:
+            raise ValueError('Reloading the proxy list is not supported with shared_state_path')
+        with self._reload_lock:
+            if not force and not self.source.changed():
+                return None
+            proxies = self.source.load()
+            listed = {proxy['server'] for proxy in proxies}
+            removed = [pos for server, pos in list(self._server_index.items()) if server not in listed]
+            added, revived, updated = [], [], []
+            for proxy in proxies:
+                pos = self._server_index.get(proxy['server'])
+                if pos is None:
+                    pos = self._retired.get(proxy['server'])
+                    if pos is None:
+                        added.append(proxy)
+                    else:
+                        revived.append((pos, proxy))
+                elif (proxy['username'], proxy['password']) != (self.proxy_list[pos].get('username'),
+                                                                self.proxy_list[pos].get('password')):
+                    updated.append((pos, proxy))
+            for start in range(0, len(removed), self.RELOAD_BATCH):
+                with self._lock:
+                    for pos in removed[start:start + self.RELOAD_BATCH]:
+                        self._retire(pos)
+            for start in range(0, len(updated), self.RELOAD_BATCH):
+                with self._lock:
+                    for pos, proxy in updated[start:start + self.RELOAD_BATCH]:
+                        self._update_credentials(pos, proxy)
+            for start in range(0, len(revived), self.RELOAD_BATCH):
+                with self._lock:
+                    for pos, proxy in revived[start:start + self.RELOAD_BATCH]:
+                        self._update_credentials(pos, proxy)
+                        self._revive(pos)
+            if added:
+                with self._lock:
+                    first = len(self.proxy_list)
+                    for offset, proxy in enumerate(added):
+                        proxy['pos'] = first + offset
+                    if self._sampler is not None:
+                        self.scores.extend(ProxyScore() for _ in added)
+                        self._sampler.extend(len(added))
+                    # appended before they are indexed: visible to nobody until _revive
+                    self.proxy_list.extend(added)
+                for start in range(0, len(added), self.RELOAD_BATCH):
+                    with self._lock:
+                        for proxy in added[start:start + self.RELOAD_BATCH]:
+                            self._revive(proxy['pos'])
+        if self.metrics is not None:
+            self.metrics.record_proxy(self)
+        summary = {'added': len(added) + len(revived), 'removed': len(removed), 'updated': len(updated),
+                   'bad_lines': len(self.source.bad_lines)}
+        logger.info('Reloaded %s: %s', self.proxy_file_path, summary)
+        return summary
+
+    def watch(self, interval=5.0):
+        """
+        Reloads the proxy file in a background thread whenever it changes.
+
+        A change is applied once the file has looked the same for two
+        consecutive polls, so a list still being written is not loaded half-way.
+
+        Args:
+            interval (float): Seconds between polls.
+        """
+        if self._watch_stop is not None:
+            return
+        stop = self._watch_stop = threading.Event()
+
+        def run():
+            pending = None
+            while not stop.wait(interval):
+                if not self.source.changed():
+                    pending = None
+                    continue
+                signature = self.source.signature()
+                if signature != pending:
+                    pending = signature
+                    continue
+                try:
+                    self.reload()
+                except Exception:
+                    logger.exception('Could not reload %s', self.proxy_file_path)
+                pending = None
+
+        threading.Thread(target=run, name='proxy-reload', daemon=True).start()
+
+    def stop_watching(self):
+        """Stops the background reload thread."""
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+
+    def close(self):
+        """Stops watching the proxy file and closes the shared state file, if any."""
+        self.stop_watching()
+        if self.shared_state is not None:
+            self.shared_state.close()
+            self.shared_state = None
+
+    def active_count(self):
+        """Returns how many proxies are currently available for selection."""
+        return len(self._active_proxies)
 
     def _load_proxy_list(self):
         """Loads the proxy list from the file."""
-        proxies = self.filemanager.read_file(self.proxy_file_path).strip().split('\n')
-        proxy_list = []
-        for pos, proxy in enumerate(proxies):
-            ip, port, username, password = proxy.split(':')
-            proxy_dict = {
-                'pos': pos,
-                'server': f'http://{ip}:{port}',
-                'ip': ip,
-                'port': port,
-                'username': username,
-                'password': password
-            }
-            proxy_list.append(proxy_dict)
+        proxy_list = self.source.load()
+        for pos, proxy in enumerate(proxy_list):
+            proxy['pos'] = pos
         return proxy_list
 
+    def _build_index(self):
+        """Builds the server/URL lookup maps and the active slot set."""
+        self._server_index.clear()
+        self._url_index.clear()
+        self._active_proxies.clear()
+        self._active_pos.clear()
+        if self.strategy == 'weighted':
+            self.scores = [ProxyScore() for _ in self.proxy_list]
+            self._sampler = WeightedSampler(len(self.proxy_list))
+        for pos, proxy in enumerate(self.proxy_list):
+            self._server_index[proxy['server']] = pos
+            self._url_index[self._format_proxy_for_requests(proxy)['http']] = pos
+            if self._is_proxy_active(proxy):
+                self._activate(pos)
+                if self._sampler is not None:
+                    self._sampler.set(pos, self.scorer.weight(self.scores[pos]))
+
+    def _retire(self, pos):
+        """Removes a proxy that left the file from the indexes and the selection; keeps its health."""
+        proxy = self.proxy_list[pos]
+        self._server_index.pop(proxy['server'], None)
+        self._url_index.pop(self._format_proxy_for_requests(proxy)['http'], None)
+        self._retired[proxy['server']] = pos
+        self._deactivate(pos)
+        if self._sampler is not None:
+            self._sampler.set(pos, 0.0)
+
+    def _revive(self, pos):
+        """Indexes a new or returning proxy and makes it selectable unless it is failed or cooling down."""
+        proxy = self.proxy_list[pos]
+        self._retired.pop(proxy['server'], None)
+        self._server_index[proxy['server']] = pos
+        self._url_index[self._format_proxy_for_requests(proxy)['http']] = pos
+        if not self._is_proxy_active(proxy):
+            if self._sampler is not None and self.scores[pos].cooldown_until:
+                heapq.heappush(self._cooldowns, (self.scores[pos].cooldown_until, pos))
+            return
+        self._activate(pos)
+        if self._sampler is not None:
+            self._sampler.set(pos, self.scorer.weight(self.scores[pos]))
+
+    def _update_credentials(self, pos, proxy):
+        """Replaces the credentials of a known proxy, keeping the URL index in step."""
+        current = self.proxy_list[pos]
+        old_url = self._format_proxy_for_requests(current)['http']
+        current['username'], current['password'] = proxy['username'], proxy['password']
+        if self._url_index.pop(old_url, None) is not None:
+            self._url_index[self._format_proxy_for_requests(current)['http']] = pos
+
+    def _release_cooldowns(self):
+        """Puts proxies whose cooldown has expired back on probation."""
+        now = self.scorer.clock()
+        while self._cooldowns and self._cooldowns[0][0] <= now:
+            until, pos = heapq.heappop(self._cooldowns)
+            score = self.scores[pos]
+            if score.cooldown_until != until or pos in self._active_pos:
+                continue  # stale entry: the proxy failed again or was marked successful meanwhile
+            if self.proxy_list[pos]['server'] in self._retired:
+                continue  # removed from the file; _revive reschedules it if it comes back
+            self.proxy_list[pos].pop('Status', None)
+            self._activate(pos)
+            self._sampler.set(pos, self.scorer.weight(score))
+
+    def _record_success(self, status, score, latency=None):
+        """Shared-state update for a success; returns the new record status."""
+        if self._sampler is not None:
+            self.scorer.record_success(score, latency)
+        return STATUS_ACTIVE
+
+    def _record_failure(self, status, score):
+        """Shared-state update for a failure; returns the new record status."""
+        if self._sampler is not None:
+            self.scorer.record_failure(score)
+        return STATUS_FAILED
+
+    def _sync_shared(self, full=False):
+        """Applies the records other processes (and threads) changed since the last sync."""
+        if not full and self.shared_state.counter == self._shared_cursor:
+            return
+        with self._lock:
+            cursor, slots = self.shared_state.changes_since(self._shared_cursor)
+            if full or slots is None:
+                cursor, slots = self.shared_state.counter, range(len(self.proxy_list))
+            self._shared_cursor = cursor
+            now = self.scorer.clock()
+            for pos in slots:
+                self._apply_shared(pos, now)
+
+    def _apply_shared(self, pos, now):
+        """Copies one shared record into the local status, indexes and sampler."""
+        status, score = self.shared_state.read(pos)
+        proxy = self.proxy_list[pos]
+        if self._sampler is None:
+            if status == STATUS_UNTOUCHED:
+                proxy.pop('Status', None)
+            else:
+                proxy['Status'] = status
+            if status == STATUS_FAILED:
+                self._deactivate(pos)
+            else:
+                self._activate(pos)
+            return
+        self.scores[pos] = score
+        if status == STATUS_FAILED and score.cooldown_until > now:
+            proxy['Status'] = 0
+            self._deactivate(pos)
+            self._sampler.set(pos, 0.0)
+            heapq.heappush(self._cooldowns, (score.cooldown_until, pos))
+            return
+        if status == STATUS_ACTIVE:
+            proxy['Status'] = 1
+        else:
+            proxy.pop('Status', None)  # untouched, or a cooldown that is already over: probation
+        self._activate(pos)
+        self._sampler.set(pos, self.scorer.weight(score))
+
+    def _exhausted_message(self):
+        """Describes why no proxy can be selected."""
+        message = f'All {len(self.proxy_list)} proxies from {self.proxy_file_path!r} are marked as failed'
+        if self._cooldowns:
+            wait = max(self._cooldowns[0][0] - self.scorer.clock(), 0.0)
+            message += f'; the next one leaves cooldown in {wait:.1f}s'
+        return message
+
+    def _empty_message(self):
+        """Describes why the proxy file gave no proxy."""
+        message = f'No usable proxy in {self.proxy_file_path!r}'
+        if self.bad_lines:
+            first = self.bad_lines[0]
+            message += (f'; {len(self.bad_lines)} line(s) skipped, first at line {first.line_number} '
+                        f'({first.line!r}): {first.reason}')
+        return message
+
+    def _activate(self, pos):
+        """Adds a slot to the active set."""
+        if pos not in self._active_pos:
+            self._active_pos[pos] = len(self._active_proxies)
+            self._active_proxies.append(self.proxy_list[pos])
+
+    def _deactivate(self, pos):
+        """Removes a slot from the active set by swapping it with the last one."""
+        index = self._active_pos.pop(pos, None)
+        if index is None:
+            return
+        last = self._active_proxies.pop()
+        if last['pos'] != pos:
+            self._active_proxies[index] = last
+            self._active_pos[last['pos']] = index
+
+    def _resolve_slot(self, proxy):
+        """Finds the slot of a proxy given in Playwright, list or requests format."""
+        if 'server' in proxy:
+            return self._server_index.get(proxy['server'])
+        if 'http' in proxy:
+            return self._url_index.get(proxy['http'])
+        return None
+
     def _is_proxy_active(self, proxy):
         """Checks if the proxy is active."""
         return proxy.get('Status', 1) != 0
 
     def _find_proxy_position(self, key, value):
         """Finds the position of a proxy in the list by key and value."""
+        if key == 'server':
+            return self._server_index.get(value)
         return next((pos for pos, item in enumerate(self.proxy_list) if item.get(key) == value), None)
 
     def _format_proxy_for_playwright(self, proxy):
         """Formats the proxy for Playwright."""
+        if proxy.get('username') is None:
+            return {'server': proxy['server']}
         return {
             'server': proxy['server'],
             'username': proxy['username'],
@@ -71,11 +462,15 @@ class ProxyManager:
 
     def _format_proxy_for_requests(self, proxy):
         """Formats the proxy for requests."""
+        scheme = proxy.get('scheme', 'http')
         ip = proxy['ip']
         port = proxy['port']
-        username = proxy['username']
-        password = proxy['password']
-        proxy_url = f'http://{username}:{password}@{ip}:{port}'
+        username = proxy.get('username')
+        password = proxy.get('password')
+        if username is None:
+            proxy_url = f'{scheme}://{ip}:{port}'
+        else:
+            proxy_url = f'{scheme}://{username}:{password}@{ip}:{port}'
         return {
             'http': proxy_url,
             'https': proxy_url
@@ -0,0 +1,346 @@
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Latency buckets in seconds, from fast cache hits to slow proxied downloads.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+Listener = Callable[[str, Dict[str, Any]], None]
+
+_HELP = {
+    'request_duration_seconds': ('histogram', 'HTTP request latency per host.'),
+    'proxy_request_duration_seconds': ('histogram', 'HTTP request latency per proxy.'),
+    'responses_total': ('counter', 'HTTP responses per host and status code.'),
+    'request_errors_total': ('counter', 'Requests that raised before a response, per host and exception type.'),
+    'response_bytes_total': ('counter', 'Response body bytes per host.'),
+    'retries_total': ('counter', 'Requests retried by the RequestHandler, per blamed party.'),
+    'circuit_opened_total': ('counter', 'Circuit breakers opened, per kind (host or proxy).'),
+    'http_sessions': ('gauge', 'Keep-alive sessions held by the RequestHandler pool.'),
+    'proxy_marks_total': ('counter', 'Proxy outcomes reported to the ProxyManager.'),
+    'proxy_pool_size': ('gauge', 'Proxies loaded in the ProxyManager.'),
+    'proxy_pool_active': ('gauge', 'Proxies currently available for selection.'),
+    'proxy_pool_inactive': ('gauge', 'Proxies marked as failed or cooling down.'),
+    'file_writes_total': ('counter', 'Files written by the FileManager, per kind.'),
+    'file_write_bytes_total': ('counter', 'Bytes written by the FileManager, per kind.'),
+    'file_write_duration_seconds': ('histogram', 'Time spent writing or queueing a file, per kind.'),
+    'file_duplicates_total': ('counter', 'Saves replaced by a pointer to an identical or similar file, per match.'),
+    'file_dedup_bytes_saved_total': ('counter', 'Bytes not written because the content was a duplicate.'),
+}
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus layout.
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Returns ``(le, count)`` pairs, ending with ``+Inf``."""
+        pairs, total = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append(('+Inf' if bound == float('inf') else _format_value(bound), total))
+        return pairs
+
+
+class Metrics:
+    """
+    In-process registry of counters, gauges and histograms shared by the
+    ``RequestHandler``, ``ProxyManager`` and ``FileManager``.
+
+    Components only record when a ``Metrics`` instance is passed to them, so
+    an uninstrumented run pays a single ``is None`` check per call. Values
+    are exported in the Prometheus text format with ``to_prometheus`` or as
+    JSON with ``snapshot``/``write_snapshot``; ``start_snapshots`` writes the
+    JSON file periodically from a background thread. Listeners added with
+    ``add_listener`` receive every recorded event, e.g. for tracing.
+    """
+
+    def __init__(self, namespace: str = 'scraper', buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """
+        Args:
+            namespace (str): Prefix of every exported metric name.
+            buckets (Sequence[float]): Upper bounds of the histogram buckets, ascending.
+        """
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.started_at = time.time()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_stop = threading.Event()
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        """Adds ``value`` to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Sets a gauge to ``value``."""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Records ``value`` in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        Registers a callback receiving ``(event, fields)`` for every recorded event.
+
+        Args:
+            listener (Listener): Called synchronously on the recording thread; keep it cheap.
+        """
+        self._listeners.append(listener)
+
+    def record_request(self, url: str, proxies: Optional[dict], response: Any, error: Optional[BaseException],
+                       elapsed: float) -> None:
+        """
+        Records one HTTP request.
+
+        Args:
+            url (str): The requested URL.
+            proxies (Optional[dict]): The proxy used, in requests format.
+            response (Any): The response, None when the request raised.
+            error (Optional[BaseException]): The exception raised, if any.
+            elapsed (float): Seconds spent sending the request.
+        """
+        host = urlsplit(url).hostname or ''
+        proxy = proxy_label(proxies)
+        self.observe('request_duration_seconds', elapsed, host=host)
+        if proxy:
+            self.observe('proxy_request_duration_seconds', elapsed, proxy=proxy)
+        fields = {'url': url, 'host': host, 'proxy': proxy, 'elapsed': elapsed}
+        if response is None:
+            fields['error'] = type(error).__name__
+            self.inc('request_errors_total', host=host, error=fields['error'])
+        else:
+            fields['status'] = response.status_code
+            fields['bytes'] = _response_size(response)
+            self.inc('responses_total', host=host, status=response.status_code)
+            self.inc('response_bytes_total', fields['bytes'], host=host)
+        self._emit('request', fields)
+
+    def record_proxy(self, manager: Any, proxy: Optional[dict] = None, success: Optional[bool] = None) -> None:
+        """
+        Updates the proxy pool gauges, counting the outcome that triggered the update.
+
+        Args:
+            manager (Any): The ``ProxyManager``.
+            proxy (Optional[dict]): The proxy whose outcome was reported.
+            success (Optional[bool]): The reported outcome, None for a plain gauge refresh.
+        """
+        total = len(manager.proxy_list)
+        active = manager.active_count()
+        self.set_gauge('proxy_pool_size', total)
+        self.set_gauge('proxy_pool_active', active)
+        self.set_gauge('proxy_pool_inactive', total - active)
+        if success is not None:
+            self.inc('proxy_marks_total', result='success' if success else 'failure')
+            self._emit('proxy', {'proxy': proxy_label(proxy), 'success': success, 'active': active, 'total': total})
+
+    def record_write(self, kind: str, size: int, elapsed: float) -> None:
+        """
+        Records one file written (or queued to a background writer) by the FileManager.
+
+        Args:
+            kind (str): The kind of file, e.g. ``'json'`` or ``'html'``.
+            size (int): Bytes written.
+            elapsed (float): Seconds spent in the save call.
+        """
+        self.inc('file_writes_total', kind=kind)
+        self.inc('file_write_bytes_total', size, kind=kind)
+        self.observe('file_write_duration_seconds', elapsed, kind=kind)
+        self._emit('write', {'kind': kind, 'bytes': size, 'elapsed': elapsed})
+
+    def record_duplicate(self, kind: str, match: str, size: int) -> None:
+        """
+        Records one save skipped by the FileManager because the content was already stored.
+
+        Args:
+            kind (str): The kind of file, e.g. ``'html'``.
+            match (str): ``'exact'`` or ``'near'``.
+            size (int): Bytes of the skipped content.
+        """
+        self.inc('file_duplicates_total', kind=kind, match=match)
+        self.inc('file_dedup_bytes_saved_total', size, kind=kind)
+        self._emit('duplicate', {'kind': kind, 'match': match, 'bytes': size})
+
+    def to_prometheus(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for kind, metrics in (('counter', self._counters), ('gauge', self._gauges)):
+                for name, series in sorted(metrics.items()):
+                    full_name = self._header(lines, name, kind)
+                    for key, value in sorted(series.items()):
+                        lines.append(f'{full_name}{_render_labels(key)} {_format_value(value)}')
+            for name, series in sorted(self._histograms.items()):
+                full_name = self._header(lines, name, 'histogram')
+                for key, histogram in sorted(series.items()):
+                    for le, count in histogram.cumulative():
+                        lines.append(f'{full_name}_bucket{_render_labels(key + (("le", le),))} {count}')
+                    lines.append(f'{full_name}_sum{_render_labels(key)} {_format_value(histogram.sum)}')
+                    lines.append(f'{full_name}_count{_render_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns every metric as JSON-serialisable data.
+
+        Returns:
+            Dict[str, Any]: ``counters`` and ``gauges`` as lists of ``{labels, value}``,
+            ``histograms`` with count, sum and per-bucket counts, plus timestamps.
+        """
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'uptime': time.time() - self.started_at,
+                'counters': {name: _series(series) for name, series in self._counters.items()},
+                'gauges': {name: _series(series) for name, series in self._gauges.items()},
+                'histograms': {
+                    name: [
+                        {'labels': dict(key), 'count': h.count, 'sum': h.sum, 'buckets': dict(h.cumulative())}
+                        for key, h in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def write_snapshot(self, path: str) -> None:
+        """
+        Writes ``snapshot()`` to a JSON file atomically.
+
+        Args:
+            path (str): Destination file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(tmp_path, path)
+
+    def start_snapshots(self, path: str, interval: float = 60.0) -> None:
+        """
+        Writes a JSON snapshot to ``path`` every ``interval`` seconds until ``stop_snapshots``.
+
+        Args:
+            path (str): Destination file, rewritten on every tick.
+            interval (float): Seconds between snapshots.
+        """
+        if self._snapshot_thread is not None:
+            raise RuntimeError('snapshots are already running')
+        self._snapshot_stop.clear()
+
+        def run() -> None:
+            while not self._snapshot_stop.wait(interval):
+                self.write_snapshot(path)
+            self.write_snapshot(path)
+
+        self._snapshot_thread = threading.Thread(target=run, name='Metrics-snapshots', daemon=True)
+        self._snapshot_thread.start()
+
+    def stop_snapshots(self) -> None:
+        """Stops the snapshot thread after writing a final snapshot."""
+        if self._snapshot_thread is None:
+            return
+        self._snapshot_stop.set()
+        self._snapshot_thread.join()
+        self._snapshot_thread = None
+
+    def _header(self, lines: List[str], name: str, kind: str) -> str:
+        full_name = f'{self.namespace}_{name}' if self.namespace else name
+        help_text = _HELP.get(name, (kind, name.replace('_', ' ')))[1]
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {kind}')
+        return full_name
+
+    def _emit(self, event: str, fields: Dict[str, Any]) -> None:
+        for listener in self._listeners:
+            listener(event, fields)
+
+
+def proxy_label(proxies: Optional[dict]) -> str:
+    """
+    Returns ``host:port`` of a proxy without its credentials.
+
+    Args:
+        proxies (Optional[dict]): A proxy in requests (``http``) or Playwright (``server``) format.
+
+    Returns:
+        str: The label, empty when no proxy is given.
+    """
+    if not proxies:
+        return ''
+    url = proxies.get('http') or proxies.get('server') or ''
+    parts = urlsplit(url)
+    return f'{parts.hostname}:{parts.port}' if parts.port else (parts.hostname or '')
+
+
+def _response_size(response: Any) -> int:
+    """Body size without forcing a streamed response to be read."""
+    content = getattr(response, '_content', None)
+    if isinstance(content, bytes):
+        return len(content)
+    try:
+        return int(response.headers.get('Content-Length', 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _render_labels(key: LabelKey) -> str:
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _series(series: Dict[LabelKey, float]) -> List[Dict[str, Any]]:
+    return [{'labels': dict(key), 'value': value} for key, value in series.items()]
@@ -0,0 +1,205 @@
+import importlib.util
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .sinks import CsvSink, JsonlSink, RowSink
+
+Page = Tuple[str, Union[str, bytes]]
+Row = Union[dict, Sequence[Any]]
+ExtractFunction = Callable[[str, Any], Union[Row, List[Row], None]]
+
+
+@dataclass
+class ParseStats:
+    """
+    Counters of a parse run.
+
+    Attributes:
+        pages (int): Pages parsed.
+        rows (int): Rows produced by the extract function.
+        errors (int): Pages whose extraction raised.
+        elapsed (float): Seconds since the run started.
+    """
+    pages: int = 0
+    rows: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def resolve_parser(parser: str = 'auto') -> str:
+    """
+    Picks the BeautifulSoup parser backend.
+
+    Args:
+        parser (str): ``'auto'`` for lxml when installed and html.parser otherwise, or an explicit backend name.
+
+    Returns:
+        str: The backend name to pass to BeautifulSoup.
+    """
+    if parser != 'auto':
+        return parser
+    return 'lxml' if importlib.util.find_spec('lxml') is not None else 'html.parser'
+
+
+def _parse_chunk(extract: ExtractFunction, parser: str, chunk: List[Page]) -> Tuple[List[Row], int, int]:
+    """Parses a chunk of pages in a worker process and returns (rows, pages, errors)."""
+    from bs4 import BeautifulSoup
+
+    rows: List[Row] = []
+    errors = 0
+    for name, content in chunk:
+        try:
+            result = extract(name, BeautifulSoup(content, parser))
+        except Exception:
+            errors += 1
+            continue
+        if result is None:
+            continue
+        if isinstance(result, list):
+            rows.extend(result)
+        else:
+            rows.append(result)
+    return rows, len(chunk), errors
+
+
+class ParsePipeline:
+    """
+    Parses stored pages on a process pool and streams extracted rows back.
+
+    Pages are sent to workers in chunks of ``chunk_size``; at most
+    ``max_in_flight`` chunks are outstanding, which bounds memory no matter how
+    large the input is. The extract function receives ``(name, soup)`` and returns
+    a row (dict or sequence), a list of rows, or None; it must be picklable, i.e.
+    defined at module level.
+    """
+
+    def __init__(
+        self,
+        extract: ExtractFunction,
+        workers: Optional[int] = None,
+        parser: str = 'auto',
+        chunk_size: int = 32,
+        max_in_flight: Optional[int] = None,
+        progress_callback: Optional[Callable[[ParseStats], None]] = None,
+        progress_interval: float = 5.0,
+    ) -> None:
+        """
+        Args:
+            extract (ExtractFunction): Function run on every parsed page.
+            workers (Optional[int]): Worker processes, defaults to the CPU count; 1 parses in-process.
+            parser (str): BeautifulSoup backend, ``'auto'`` prefers lxml when installed.
+            chunk_size (int): Pages sent to a worker at a time.
+            max_in_flight (Optional[int]): Chunks outstanding at once, defaults to twice the worker count.
+            progress_callback (Optional[Callable[[ParseStats], None]]): Called at most every ``progress_interval`` seconds.
+            progress_interval (float): Minimum seconds between progress callbacks.
+        """
+        self.extract = extract
+        self.workers = workers or os.cpu_count() or 1
+        self.parser = resolve_parser(parser)
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.stats = ParseStats()
+
+    def iter_rows(self, pages: Iterable[Page]) -> Iterator[Row]:
+        """
+        Parses pages and yields extracted rows as chunks complete.
+
+        Args:
+            pages (Iterable[Page]): ``(name, content)`` pairs, e.g. from ``FileManager.iter_html_from_path``.
+
+        Yields:
+            Row: Extracted rows, in chunk completion order.
+        """
+        self.stats = ParseStats()
+        started = time.perf_counter()
+        last_report = started
+        chunks = self._chunks(pages)
+
+        if self.workers == 1:
+            for chunk in chunks:
+                yield from self._collect(_parse_chunk(self.extract, self.parser, chunk), started)
+                last_report = self._report(started, last_report)
+            self.stats.elapsed = time.perf_counter() - started
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            try:
+                for chunk in chunks:
+                    pending.add(executor.submit(_parse_chunk, self.extract, self.parser, chunk))
+                    if len(pending) >= self.max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield from self._collect(future.result(), started)
+                        last_report = self._report(started, last_report)
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from self._collect(future.result(), started)
+                    last_report = self._report(started, last_report)
+            finally:
+                for future in pending:
+                    future.cancel()
+        self.stats.elapsed = time.perf_counter() - started
+
+    def run(self, pages: Iterable[Page], output: Union[str, RowSink], columns: Optional[List[str]] = None,
+            **sink_options) -> ParseStats:
+        """
+        Parses pages and writes the rows to a CSV or JSON Lines sink as they arrive.
+
+        Args:
+            pages (Iterable[Page]): ``(name, content)`` pairs.
+            output (Union[str, RowSink]): An open sink, which is left open, or a path; paths ending in
+                ``.jsonl`` (or ``.jsonl.gz``) write JSON Lines, anything else CSV.
+            columns (Optional[List[str]]): CSV header; defaults to the keys of the first dict row.
+            **sink_options: Buffering, rotation and compression options for a sink opened from a path.
+
+        Returns:
+            ParseStats: Counters of the run.
+        """
+        if isinstance(output, RowSink):
+            output.write_rows(self.iter_rows(pages))
+            output.flush()
+            return self.stats
+        if output.endswith(('.jsonl', '.jsonl.gz')):
+            sink: RowSink = JsonlSink(output, **sink_options)
+        else:
+            sink = CsvSink(output, columns=columns, **sink_options)
+        with sink:
+            sink.write_rows(self.iter_rows(pages))
+        return self.stats
+
+    def _chunks(self, pages: Iterable[Page]) -> Iterator[List[Page]]:
+        chunk: List[Page] = []
+        for page in pages:
+            chunk.append(page)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _collect(self, result: Tuple[List[Row], int, int], started: float) -> List[Row]:
+        rows, pages, errors = result
+        self.stats.pages += pages
+        self.stats.rows += len(rows)
+        self.stats.errors += errors
+        self.stats.elapsed = time.perf_counter() - started
+        return rows
+
+    def _report(self, started: float, last_report: float) -> float:
+        now = time.perf_counter()
+        if self.progress_callback is None or now - last_report < self.progress_interval:
+            return last_report
+        self.stats.elapsed = now - started
+        self.progress_callback(self.stats)
+        return now
@@ -0,0 +1,237 @@
+import asyncio
+import base64
+import ssl
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+@dataclass
+class ProxyCheckResult:
+    """
+    Outcome of probing one proxy.
+
+    Attributes:
+        proxy (Dict[str, Any]): The proxy entry that was probed (a ``ProxyManager.proxy_list`` item).
+        ok (bool): Whether the check URL answered with an expected status through the proxy.
+        status_code (Optional[int]): HTTP status returned by the check URL, if any.
+        connect_latency (Optional[float]): Seconds to open the TCP connection to the proxy.
+        ttfb (Optional[float]): Seconds from connecting until the first response byte.
+        error (Optional[str]): Short description of the failure, None on success.
+        skipped (bool): The proxy was not probed because the checker does not speak its scheme.
+    """
+    proxy: Dict[str, Any]
+    ok: bool
+    status_code: Optional[int] = None
+    connect_latency: Optional[float] = None
+    ttfb: Optional[float] = None
+    error: Optional[str] = None
+    skipped: bool = False
+
+
+class ProxyHealthChecker:
+    """
+    Probes proxies concurrently with asyncio and seeds a ``ProxyManager`` with the results.
+
+    Plain ``http://`` check URLs are requested in absolute form through the proxy;
+    ``https://`` URLs (or any URL when ``tunnel`` is True) go through a CONNECT tunnel.
+    Only plain HTTP proxies are probed; proxies with another scheme (SOCKS, TLS
+    to the proxy) are reported as skipped and left untouched by ``seed``.
+    """
+    SCHEMES = ('http',)
+
+    def __init__(
+        self,
+        check_url: str = 'http://httpbin.org/ip',
+        concurrency: int = 500,
+        timeout: float = 10.0,
+        expected_status: Iterable[int] = (200,),
+        tunnel: bool = False,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        """
+        Args:
+            check_url (str): URL fetched through every proxy.
+            concurrency (int): Maximum number of probes in flight.
+            timeout (float): Per-probe timeout in seconds, covering connect and first byte.
+            expected_status (Iterable[int]): Status codes that count as healthy.
+            tunnel (bool): Always use CONNECT, even for plain HTTP check URLs.
+            ssl_context (Optional[ssl.SSLContext]): Context for HTTPS check URLs.
+        """
+        self.check_url = check_url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.expected_status = frozenset(expected_status)
+        self.tunnel = tunnel
+        self.ssl_context = ssl_context
+
+        parts = urlsplit(check_url)
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self._path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+
+    def run(self, proxies: Iterable[Dict[str, Any]]) -> List[ProxyCheckResult]:
+        """
+        Synchronously probes all proxies.
+
+        Args:
+            proxies (Iterable[Dict[str, Any]]): Proxy entries with ``ip``, ``port``, ``username`` and ``password``.
+
+        Returns:
+            List[ProxyCheckResult]: One result per proxy, in input order.
+        """
+        return asyncio.run(self.check_all(proxies))
+
+    def check_manager(self, proxy_manager) -> List[ProxyCheckResult]:
+        """
+        Probes every proxy of a ``ProxyManager`` and seeds its statuses.
+
+        Args:
+            proxy_manager (ProxyManager): The manager whose pool is checked.
+
+        Returns:
+            List[ProxyCheckResult]: One result per proxy, in pool order.
+        """
+        results = self.run(proxy_manager.proxy_list)
+        self.seed(proxy_manager, results)
+        return results
+
+    @staticmethod
+    def seed(proxy_manager, results: Iterable[ProxyCheckResult]) -> None:
+        """
+        Marks each probed proxy as successful (with its TTFB as latency) or failed, leaving skipped ones alone.
+
+        Args:
+            proxy_manager (ProxyManager): The manager to update.
+            results (Iterable[ProxyCheckResult]): Probe results.
+        """
+        for result in results:
+            if result.skipped:
+                continue
+            if result.ok:
+                proxy_manager.mark_proxy_as_successful(result.proxy, latency=result.ttfb)
+            else:
+                proxy_manager.mark_proxy_as_failed(result.proxy)
+
+    async def check_all(self, proxies: Iterable[Dict[str, Any]]) -> List[ProxyCheckResult]:
+        """
+        Probes all proxies with at most ``concurrency`` probes in flight.
+
+        Args:
+            proxies (Iterable[Dict[str, Any]]): Proxy entries to probe.
+
+        Returns:
+            List[ProxyCheckResult]: One result per proxy, in input order.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(proxy):
+            async with semaphore:
+                return await self.check_proxy(proxy)
+
+        return await asyncio.gather(*(bounded(proxy) for proxy in proxies))
+
+    async def check_proxy(self, proxy: Dict[str, Any]) -> ProxyCheckResult:
+        """
+        Probes a single proxy, never raising.
+
+        Args:
+            proxy (Dict[str, Any]): Proxy entry to probe.
+
+        Returns:
+            ProxyCheckResult: The probe outcome.
+        """
+        result = ProxyCheckResult(proxy=proxy, ok=False)
+        scheme = proxy.get('scheme') or 'http'
+        if scheme not in self.SCHEMES:
+            result.skipped = True
+            result.error = f'unsupported proxy scheme {scheme!r}'
+            return result
+        writers: List[asyncio.StreamWriter] = []
+        try:
+            await asyncio.wait_for(self._probe(proxy, result, writers), self.timeout)
+        except asyncio.TimeoutError:
+            result.error = 'timeout'
+        except (OSError, ssl.SSLError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as exc:
+            result.error = f'{type(exc).__name__}: {exc}'
+        finally:
+            for writer in writers:
+                writer.close()
+        return result
+
+    async def _probe(
+        self, proxy: Dict[str, Any], result: ProxyCheckResult, writers: List[asyncio.StreamWriter]
+    ) -> None:
+        """Runs the probe, filling ``result`` as it goes and registering open writers for cleanup."""
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection(proxy['ip'], int(proxy['port']))
+        writers.append(writer)
+        result.connect_latency = time.perf_counter() - start
+
+        auth = self._proxy_authorization(proxy)
+        if self.tunnel or self._scheme == 'https':
+            authority = f'{self._host}:{self._port}'
+            writer.write(
+                f'CONNECT {authority} HTTP/1.1\r\nHost: {authority}\r\n{auth}\r\n'.encode('latin-1')
+            )
+            await writer.drain()
+            status, _ = await self._read_head(reader)
+            if status != 200:
+                result.status_code = status
+                result.error = f'CONNECT refused with status {status}'
+                return
+            if self._scheme == 'https':
+                reader, writer = await self._start_tls(reader, writer)
+                writers.append(writer)
+            target, auth = self._path, ''
+        else:
+            target = self.check_url
+
+        writer.write(
+            f'GET {target} HTTP/1.1\r\nHost: {self._host}\r\n{auth}'
+            f'User-Agent: WebScrapingUtils-healthcheck\r\nConnection: close\r\n\r\n'.encode('latin-1')
+        )
+        await writer.drain()
+        status, ttfb = await self._read_head(reader, start)
+        result.status_code = status
+        result.ttfb = ttfb
+        result.ok = status in self.expected_status
+        if not result.ok:
+            result.error = f'unexpected status {status}'
+
+    async def _start_tls(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Upgrades a CONNECT tunnel to TLS towards the check host."""
+        context = self.ssl_context or ssl.create_default_context()
+        if hasattr(writer, 'start_tls'):  # Python 3.11+
+            await writer.start_tls(context, server_hostname=self._host)
+            return reader, writer
+        loop = asyncio.get_running_loop()
+        protocol = writer.transport.get_protocol()
+        transport = await loop.start_tls(writer.transport, protocol, context, server_hostname=self._host)
+        return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader, start: Optional[float] = None) -> Tuple[int, Optional[float]]:
+        """Reads a response head and returns its status code and time to first byte."""
+        first = await reader.read(1)
+        if not first:
+            raise ConnectionResetError('proxy closed the connection without responding')
+        ttfb = time.perf_counter() - start if start is not None else None
+        head = first + await reader.readuntil(b'\r\n\r\n')
+        status_line = head.split(b'\r\n', 1)[0].split()
+        if len(status_line) < 2 or not status_line[1].isdigit():
+            raise ValueError(f'malformed status line {head[:64]!r}')
+        return int(status_line[1]), ttfb
+
+    @staticmethod
+    def _proxy_authorization(proxy: Dict[str, Any]) -> str:
+        """Builds the Proxy-Authorization header line, empty when the proxy has no credentials."""
+        username = proxy.get('username')
+        if not username:
+            return ''
+        token = base64.b64encode(f"{username}:{proxy.get('password', '')}".encode()).decode('ascii')
+        return f'Proxy-Authorization: Basic {token}\r\n'
@@ -0,0 +1,241 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class LeaseTimeoutError(TimeoutError):
+    """Raised when no proxy with free capacity became available in time."""
+
+
+@dataclass
+class ProxyLease:
+    """
+    A proxy held by one worker until released or expired.
+
+    Attributes:
+        id (int): Lease identifier, unique per ``LeaseManager``.
+        proxy (Dict[str, str]): The proxy formatted for requests.
+        slot (int): Slot of the proxy in ``ProxyManager.proxy_list``.
+        key (Optional[str]): Stickiness key (session, domain...) the lease was taken for.
+        expires_at (float): Clock value after which the lease is released automatically.
+        rebound (bool): True when ``key`` was bound to another proxy that is no longer usable.
+    """
+    id: int
+    proxy: Dict[str, str]
+    slot: int
+    key: Optional[str]
+    expires_at: float
+    rebound: bool = False
+    released: bool = False
+
+
+class LeaseManager:
+    """
+    Hands out proxies of a ``ProxyManager`` as time-limited leases.
+
+    Each proxy serves at most ``max_concurrent`` leases at once, so parallel
+    workers spread over the pool instead of piling onto whatever
+    ``generate_proxy`` returned. Candidates still come from the manager (so
+    its strategy, cooldowns and shared state apply) and the least loaded of
+    two draws is taken, which keeps load even without scanning the pool.
+
+    Leases taken with a ``key`` stick to the proxy first given to that key
+    for as long as it stays active, which keeps IP-bound logins alive.
+    Leases not released within their TTL are reclaimed automatically.
+    """
+    CHOICES = 2
+    MAX_DRAWS = 16
+
+    def __init__(self, manager, max_concurrent: int = 1, ttl: float = 60.0, sticky_ttl: float = 1800.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            manager (ProxyManager): The proxy pool.
+            max_concurrent (int): Leases a single proxy may serve at once.
+            ttl (float): Default lease duration in seconds.
+            sticky_ttl (float): Seconds a key stays bound to its proxy after its last lease.
+            clock (Callable[[], float]): Monotonic time source.
+        """
+        if max_concurrent < 1:
+            raise ValueError('max_concurrent must be at least 1')
+        self.manager = manager
+        self.max_concurrent = max_concurrent
+        self.ttl = ttl
+        self.sticky_ttl = sticky_ttl
+        self.clock = clock
+        self._condition = threading.Condition()
+        self._ids = itertools.count(1)
+        self._leases: Dict[int, ProxyLease] = {}
+        self._expiries: List[Tuple[float, int]] = []
+        self._load: Dict[int, int] = {}
+        self._sticky: 'OrderedDict[str, Tuple[int, float]]' = OrderedDict()
+
+    def acquire(self, key: Optional[str] = None, ttl: Optional[float] = None,
+                timeout: Optional[float] = None) -> ProxyLease:
+        """
+        Leases a proxy, waiting for capacity when every candidate is busy.
+
+        Args:
+            key (Optional[str]): Stickiness key; leases with the same key get the same proxy.
+            ttl (Optional[float]): Lease duration, ``ttl`` of the manager by default.
+            timeout (Optional[float]): Seconds to wait for capacity; None waits forever.
+
+        Returns:
+            ProxyLease: The lease.
+
+        Raises:
+            LeaseTimeoutError: No capacity became available within ``timeout``.
+            ProxyPoolExhaustedError: Every proxy is marked as failed.
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._condition:
+            while True:
+                now = self.clock()
+                self._expire(now)
+                slot, rebound = self._pick(key, now)
+                if slot is not None:
+                    return self._grant(slot, key, now, self.ttl if ttl is None else ttl, rebound)
+                if deadline is not None and now >= deadline:
+                    raise LeaseTimeoutError(
+                        f'No proxy with free capacity within {timeout}s ({len(self._leases)} leases held)'
+                    )
+                wait = None if deadline is None else deadline - now
+                if self._expiries:
+                    # wake up when the next lease expires and frees its proxy
+                    wait = self._expiries[0][0] - now if wait is None else min(wait, self._expiries[0][0] - now)
+                self._condition.wait(wait)
+
+    def release(self, lease: ProxyLease, success: Optional[bool] = None, latency: Optional[float] = None) -> bool:
+        """
+        Returns a proxy to the pool, optionally reporting how it performed.
+
+        Args:
+            lease (ProxyLease): The lease.
+            success (Optional[bool]): Outcome passed on to the ``ProxyManager``; None reports nothing.
+            latency (Optional[float]): Latency in seconds, recorded with a success.
+
+        Returns:
+            bool: False when the lease had already been released or had expired.
+        """
+        with self._condition:
+            released = self._drop(lease)
+        if success is True:
+            self.manager.mark_proxy_as_successful(lease.proxy, latency=latency)
+        elif success is False:
+            self.manager.mark_proxy_as_failed(lease.proxy)
+        return released
+
+    def renew(self, lease: ProxyLease, ttl: Optional[float] = None) -> bool:
+        """
+        Extends a lease that is still held.
+
+        Args:
+            lease (ProxyLease): The lease.
+            ttl (Optional[float]): New duration from now, ``ttl`` of the manager by default.
+
+        Returns:
+            bool: False when the lease had already been released or had expired.
+        """
+        with self._condition:
+            now = self.clock()
+            self._expire(now)
+            if lease.released:
+                return False
+            lease.expires_at = now + (self.ttl if ttl is None else ttl)
+            heapq.heappush(self._expiries, (lease.expires_at, lease.id))
+            return True
+
+    @contextmanager
+    def lease(self, key: Optional[str] = None, ttl: Optional[float] = None,
+              timeout: Optional[float] = None) -> Iterator[ProxyLease]:
+        """Context manager around ``acquire`` that releases the lease on exit."""
+        lease = self.acquire(key, ttl, timeout)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    def load(self, slot: int) -> int:
+        """Returns how many leases the proxy in ``slot`` is serving."""
+        with self._condition:
+            return self._load.get(slot, 0)
+
+    def held(self) -> int:
+        """Returns how many leases are held."""
+        with self._condition:
+            self._expire(self.clock())
+            return len(self._leases)
+
+    def _pick(self, key: Optional[str], now: float) -> Tuple[Optional[int], bool]:
+        """Chooses a slot with free capacity, or returns None when the caller must wait."""
+        rebound = False
+        if key is not None:
+            bound = self._sticky.get(key)
+            if bound is not None and bound[1] + self.sticky_ttl < now:
+                del self._sticky[key]
+                bound = None
+            if bound is not None:
+                slot = bound[0]
+                if slot in self.manager._active_pos:
+                    return (slot if self._load.get(slot, 0) < self.max_concurrent else None), False
+                rebound = True
+        best = None
+        found = 0
+        for _ in range(self.MAX_DRAWS):
+            slot = self.manager._resolve_slot(self.manager.generate_proxy())
+            load = self._load.get(slot, 0)
+            if load >= self.max_concurrent:
+                continue
+            if best is None or load < self._load.get(best, 0):
+                best = slot
+            found += 1
+            if found == self.CHOICES or load == 0:
+                break
+        if best is None:
+            # every draw was saturated: look for spare capacity anywhere in the pool
+            best = next((proxy['pos'] for proxy in list(self.manager._active_proxies)
+                         if self._load.get(proxy['pos'], 0) < self.max_concurrent), None)
+        return best, rebound
+
+    def _grant(self, slot: int, key: Optional[str], now: float, ttl: float, rebound: bool) -> ProxyLease:
+        proxy = self.manager._format_proxy_for_requests(self.manager.proxy_list[slot])
+        lease = ProxyLease(next(self._ids), proxy, slot, key, now + ttl, rebound)
+        self._leases[lease.id] = lease
+        self._load[slot] = self._load.get(slot, 0) + 1
+        heapq.heappush(self._expiries, (lease.expires_at, lease.id))
+        if key is not None:
+            self._sticky[key] = (slot, now)
+            self._sticky.move_to_end(key)
+            while self._sticky and next(iter(self._sticky.values()))[1] + self.sticky_ttl < now:
+                self._sticky.popitem(last=False)
+        return lease
+
+    def _drop(self, lease: ProxyLease) -> bool:
+        """Frees the capacity held by a lease; the caller holds the condition."""
+        if lease.released:
+            return False
+        lease.released = True
+        del self._leases[lease.id]
+        load = self._load[lease.slot] - 1
+        if load:
+            self._load[lease.slot] = load
+        else:
+            del self._load[lease.slot]
+        if lease.key is not None and lease.key in self._sticky:
+            self._sticky[lease.key] = (self._sticky[lease.key][0], self.clock())
+            self._sticky.move_to_end(lease.key)
+        self._condition.notify_all()
+        return True
+
+    def _expire(self, now: float) -> None:
+        """Reclaims leases whose TTL elapsed."""
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, lease_id = heapq.heappop(self._expiries)
+            lease = self._leases.get(lease_id)
+            if lease is not None and lease.expires_at == expires_at:
+                self._drop(lease)
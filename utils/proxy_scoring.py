@@ -0,0 +1,199 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+
+@dataclass
+class ProxyScore:
+    """
+    Health statistics tracked for a single proxy.
+
+    Attributes:
+        latency (Optional[float]): EWMA of request latency in seconds, None until measured.
+        success_rate (float): EWMA of outcomes, 1.0 for success and 0.0 for failure.
+        failures (int): Consecutive failures, used to grow the cooldown.
+        cooldown_until (float): Clock value until which the proxy must not be used.
+    """
+    latency: Optional[float] = None
+    success_rate: float = 1.0
+    failures: int = 0
+    cooldown_until: float = 0.0
+
+
+class ProxyScorer:
+    """
+    Updates proxy scores and turns them into sampling weights and cooldowns.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        base_cooldown: float = 30.0,
+        max_cooldown: float = 1800.0,
+        default_latency: float = 1.0,
+        min_success_rate: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            alpha (float): EWMA smoothing factor, higher values favour recent samples.
+            base_cooldown (float): Cooldown in seconds after the first failure.
+            max_cooldown (float): Upper bound for the exponential backoff.
+            default_latency (float): Latency assumed for proxies never measured.
+            min_success_rate (float): Floor applied to the success rate when weighting,
+                so a recovered proxy still gets some traffic.
+            clock (Callable[[], float]): Monotonic time source.
+        """
+        self.alpha = alpha
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.default_latency = default_latency
+        self.min_success_rate = min_success_rate
+        self.clock = clock
+
+    def record_success(self, score: ProxyScore, latency: Optional[float] = None) -> None:
+        """
+        Folds a successful request into the score.
+
+        Args:
+            score (ProxyScore): The score to update.
+            latency (Optional[float]): Observed latency in seconds, if known.
+        """
+        score.success_rate += self.alpha * (1.0 - score.success_rate)
+        score.failures = 0
+        score.cooldown_until = 0.0
+        if latency is not None:
+            if score.latency is None:
+                score.latency = latency
+            else:
+                score.latency += self.alpha * (latency - score.latency)
+
+    def record_failure(self, score: ProxyScore) -> float:
+        """
+        Folds a failed request into the score and starts an exponential-backoff cooldown.
+
+        Args:
+            score (ProxyScore): The score to update.
+
+        Returns:
+            float: Clock value at which the proxy may be used again.
+        """
+        score.success_rate -= self.alpha * score.success_rate
+        score.failures += 1
+        cooldown = min(self.base_cooldown * 2 ** (score.failures - 1), self.max_cooldown)
+        score.cooldown_until = self.clock() + cooldown
+        return score.cooldown_until
+
+    def weight(self, score: ProxyScore) -> float:
+        """
+        Returns the sampling weight of a proxy: healthy and fast proxies weigh more.
+
+        Args:
+            score (ProxyScore): The proxy score.
+
+        Returns:
+            float: A positive weight.
+        """
+        latency = score.latency if score.latency is not None else self.default_latency
+        return max(score.success_rate, self.min_success_rate) / max(latency, 1e-3)
+
+
+class WeightedSampler:
+    """
+    Fenwick tree over slot weights giving O(log n) updates and weighted sampling.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._weights: List[float] = [0.0] * size
+        self._tree: List[float] = [0.0] * (size + 1)
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def get(self, slot: int) -> float:
+        """Returns the current weight of a slot."""
+        return self._weights[slot]
+
+    def set(self, slot: int, weight: float) -> None:
+        """
+        Sets the weight of a slot; a weight of zero excludes it from sampling.
+
+        Args:
+            slot (int): Slot index.
+            weight (float): New non-negative weight.
+        """
+        delta = weight - self._weights[slot]
+        if delta == 0:
+            return
+        self._weights[slot] = weight
+        self.total += delta
+        i = slot + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def extend(self, count: int) -> None:
+        """
+        Appends ``count`` slots of weight zero without rebuilding the tree.
+
+        Args:
+            count (int): Slots to add.
+        """
+        size = len(self._weights)
+        self._weights.extend([0.0] * count)
+        for i in range(size + 1, size + count + 1):
+            # node i covers slots (i - lowbit(i), i]; only the ones before ``size`` carry weight
+            low = i - (i & -i)
+            self._tree.append(self._prefix(size) - self._prefix(low) if low < size else 0.0)
+
+    def _prefix(self, count: int) -> float:
+        """Returns the total weight of the first ``count`` slots."""
+        total = 0.0
+        while count:
+            total += self._tree[count]
+            count -= count & -count
+        return total
+
+    def sample(self, rng: Optional[Callable[[], float]] = None) -> Optional[int]:
+        """
+        Picks a slot with probability proportional to its weight.
+
+        Args:
+            rng (Optional[Callable[[], float]]): Uniform [0, 1) random source, defaults to ``random.random``.
+
+        Returns:
+            Optional[int]: The chosen slot, or None when every weight is zero.
+        """
+        if self.total <= 1e-12:
+            return None
+        slot = self._find((rng or random.random)() * self.total)
+        if self._weights[slot] <= 0:
+            # Float drift in the tree can land on an empty slot; rebuild and retry.
+            self._rebuild()
+            if self.total <= 1e-12:
+                return None
+            slot = self._find((rng or random.random)() * self.total)
+        return slot
+
+    def _find(self, target: float) -> int:
+        """Returns the first slot whose prefix sum exceeds the target."""
+        pos = 0
+        step = 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return min(pos, len(self._weights) - 1)
+
+    def _rebuild(self) -> None:
+        """Recomputes the tree from the raw weights."""
+        weights = self._weights
+        self._weights = [0.0] * len(weights)
+        self._tree = [0.0] * (len(weights) + 1)
+        self.total = 0.0
+        for slot, weight in enumerate(weights):
+            self.set(slot, weight)
@@ -0,0 +1,241 @@
+import fcntl
+import math
+import mmap
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .proxy_scoring import ProxyScore
+
+_MAGIC = b'PXST'
+_VERSION = 1
+# magic, version, proxy count, fingerprint of the proxy list, change counter
+_HEADER = struct.Struct('<4sIIIQ')
+_HEADER_SIZE = 64
+_COUNTER_OFFSET = 16
+_COUNTER = struct.Struct('<Q')
+_RING_SIZE = 4096
+_RING_ENTRY = struct.Struct('<I')
+# seq, status, consecutive failures, padding, latency (NaN = unknown), success rate, cooldown until
+_RECORD = struct.Struct('<IiIIddd')
+_SEQ = struct.Struct('<I')
+_STRIPES = 64
+
+# Record statuses; UNTOUCHED is a proxy never marked, which has no ``Status`` key in ``proxy_list``.
+STATUS_FAILED = 0
+STATUS_ACTIVE = 1
+STATUS_UNTOUCHED = -1
+
+
+class _OpenFile:
+    """
+    Descriptor and thread locks shared by every ``SharedProxyState`` of one file in this process.
+
+    ``fcntl`` record locks belong to the process: they do not exclude two
+    descriptors of the same process, and closing any descriptor of the file
+    releases all of them. Instances of one file in a process therefore lock
+    through the same descriptor and the same thread locks, and the descriptor
+    is closed only with the last instance.
+    """
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+        self.stripes = [threading.Lock() for _ in range(_STRIPES)]
+        self.log_lock = threading.Lock()
+        self.users = 0
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Holds every thread lock and the whole-file lock, e.g. while (re)initializing the table."""
+        for lock in self.stripes + [self.log_lock]:
+            lock.acquire()
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN)
+        finally:
+            for lock in self.stripes + [self.log_lock]:
+                lock.release()
+
+
+# Open state files of this process by resolved path.
+_open_files: Dict[str, _OpenFile] = {}
+_open_files_lock = threading.Lock()
+
+
+class SharedProxyState:
+    """
+    Proxy health table in a memory-mapped file shared by every process on a host.
+
+    Each proxy slot has a fixed-size record holding its status and score.
+    Writers lock just that record, both across threads (striped locks) and
+    across processes (``fcntl`` byte-range locks), and bump a sequence number
+    around the write so lock-free readers can detect and retry torn reads.
+    Every write is also appended to a ring of changed slots, which lets other
+    processes apply only what changed since they last looked instead of
+    rescanning the table.
+
+    Cooldown deadlines are stored as ``time.monotonic`` values, which are
+    comparable across processes on Linux.
+
+    ``fcntl`` locks only exclude other processes, so instances opened on the
+    same file within one process share their descriptor and thread locks.
+    Files are matched by resolved path: opening one file through two hard
+    links in the same process is not supported.
+    """
+
+    def __init__(self, path: str, servers: Sequence[str]) -> None:
+        """
+        Args:
+            path (str): State file, created if needed. Files written for a different
+                proxy list (or a different order) are reset.
+            servers (Sequence[str]): Proxy servers in slot order, used to fingerprint the list.
+        """
+        self.path = path
+        self.count = len(servers)
+        self.fingerprint = zlib.crc32('\n'.join(servers).encode('utf-8'))
+        self._records_offset = _HEADER_SIZE + _RING_SIZE * _RING_ENTRY.size
+        self._size = self._records_offset + self.count * _RECORD.size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._key = os.path.realpath(path)
+        with _open_files_lock:
+            shared = _open_files.get(self._key)
+            if shared is None:
+                shared = _open_files[self._key] = _OpenFile(os.open(path, os.O_RDWR | os.O_CREAT, 0o644))
+            shared.users += 1
+        self._shared = shared
+        self._fd = shared.fd
+        self._stripes = shared.stripes
+        self._log_lock = shared.log_lock
+        try:
+            with shared.exclusive():
+                if not self._is_compatible():
+                    self._initialize()
+                self._map = mmap.mmap(self._fd, self._size)
+        except BaseException:
+            self._release_file()
+            raise
+
+    def __enter__(self) -> 'SharedProxyState':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the table and closes the file once no other instance of this process uses it."""
+        self._map.close()
+        self._release_file()
+
+    def _release_file(self) -> None:
+        with _open_files_lock:
+            self._shared.users -= 1
+            if self._shared.users == 0:
+                del _open_files[self._key]
+                os.close(self._fd)
+
+    @property
+    def counter(self) -> int:
+        """Number of writes since the table was created."""
+        return _COUNTER.unpack_from(self._map, _COUNTER_OFFSET)[0]
+
+    def read(self, slot: int) -> Tuple[int, ProxyScore]:
+        """
+        Reads a record without locking, retrying while a write is in progress.
+
+        Args:
+            slot (int): Proxy slot.
+
+        Returns:
+            Tuple[int, ProxyScore]: Status (``STATUS_*``) and score.
+        """
+        offset = self._records_offset + slot * _RECORD.size
+        while True:
+            seq, status, failures, _, latency, success_rate, cooldown_until = _RECORD.unpack_from(self._map, offset)
+            if seq % 2 == 0 and _SEQ.unpack_from(self._map, offset)[0] == seq:
+                break
+        score = ProxyScore(None if math.isnan(latency) else latency, success_rate, failures, cooldown_until)
+        return status, score
+
+    def update(self, slot: int, mutate: Callable[[int, ProxyScore], int]) -> Tuple[int, ProxyScore]:
+        """
+        Read-modify-writes a record under its lock and logs the slot as changed.
+
+        Args:
+            slot (int): Proxy slot.
+            mutate (Callable[[int, ProxyScore], int]): Receives the current status and score,
+                updates the score in place and returns the new status.
+
+        Returns:
+            Tuple[int, ProxyScore]: The stored status and score.
+        """
+        offset = self._records_offset + slot * _RECORD.size
+        with self._stripes[slot % _STRIPES]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _RECORD.size, offset)
+            try:
+                seq, status, failures, _, latency, success_rate, cooldown_until = _RECORD.unpack_from(self._map, offset)
+                score = ProxyScore(None if math.isnan(latency) else latency, success_rate, failures, cooldown_until)
+                status = mutate(status, score)
+                _SEQ.pack_into(self._map, offset, seq + 1)
+                _RECORD.pack_into(self._map, offset, seq + 1, status, score.failures, 0,
+                                  math.nan if score.latency is None else score.latency, score.success_rate,
+                                  score.cooldown_until)
+                _SEQ.pack_into(self._map, offset, seq + 2)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _RECORD.size, offset)
+        with self._log_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _COUNTER.size, _COUNTER_OFFSET)
+            try:
+                counter = self.counter
+                _RING_ENTRY.pack_into(self._map, _HEADER_SIZE + (counter % _RING_SIZE) * _RING_ENTRY.size, slot)
+                _COUNTER.pack_into(self._map, _COUNTER_OFFSET, counter + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _COUNTER.size, _COUNTER_OFFSET)
+        return status, score
+
+    def changes_since(self, cursor: int) -> Tuple[int, Optional[List[int]]]:
+        """
+        Lists the slots written since ``cursor``.
+
+        Args:
+            cursor (int): A counter value returned by a previous call (or ``counter``).
+
+        Returns:
+            Tuple[int, Optional[List[int]]]: The new cursor and the changed slots, or None
+            when more writes happened than the ring holds and every slot must be re-read.
+        """
+        counter = self.counter
+        if counter == cursor:
+            return counter, []
+        if counter - cursor > _RING_SIZE:
+            return counter, None
+        slots = {
+            _RING_ENTRY.unpack_from(self._map, _HEADER_SIZE + (i % _RING_SIZE) * _RING_ENTRY.size)[0]
+            for i in range(cursor, counter)
+        }
+        # the ring may have wrapped while it was read
+        if self.counter - cursor > _RING_SIZE:
+            return self.counter, None
+        return counter, sorted(slots)
+
+    def _is_compatible(self) -> bool:
+        if os.fstat(self._fd).st_size != self._size:
+            return False
+        header = os.pread(self._fd, _HEADER.size, 0)
+        magic, version, count, fingerprint, _ = _HEADER.unpack(header)
+        return (magic, version, count, fingerprint) == (_MAGIC, _VERSION, self.count, self.fingerprint)
+
+    def _initialize(self) -> None:
+        """Writes an empty table: every proxy untouched with a fresh score."""
+        fresh = ProxyScore()
+        record = _RECORD.pack(0, STATUS_UNTOUCHED, fresh.failures, 0, math.nan, fresh.success_rate, fresh.cooldown_until)
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, self.count, self.fingerprint, 0).ljust(_HEADER_SIZE, b'\0')
+                  + bytes(_RING_SIZE * _RING_ENTRY.size) + record * self.count, 0)
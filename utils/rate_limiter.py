@@ -0,0 +1,241 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+# Statuses whose Retry-After header pauses the bucket that received them.
+RETRY_AFTER_STATUSES = frozenset({429, 503})
+
+RateSpec = Union[float, Tuple[float, float]]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that hands out reservations instead of blocking.
+
+    ``reserve`` takes a token immediately (the balance may go negative) and
+    returns how long the caller must wait before using it, so callers queue up
+    fairly and the same bucket serves threads (``time.sleep``) and asyncio
+    (``asyncio.sleep``).
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            rate (float): Tokens added per second.
+            burst (Optional[float]): Bucket capacity, defaults to ``max(1, rate)``.
+            clock (Callable[[], float]): Monotonic time source.
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Reserves tokens and returns the seconds to wait before using them.
+
+        Args:
+            tokens (float): Number of tokens to take.
+
+        Returns:
+            float: Seconds to wait, 0 when tokens were available.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens -= tokens
+            ready_at = self._updated + max(0.0, -self._tokens) / self.rate
+            return max(0.0, ready_at - now)
+
+    def pause_until(self, until: float) -> None:
+        """
+        Stops handing out tokens until the given clock value.
+
+        Args:
+            until (float): Clock value at which the bucket starts refilling again.
+        """
+        with self._lock:
+            self._refill(self.clock())
+            if until > self._updated:
+                self._updated = until
+                self._tokens = min(self._tokens, 0.0)
+
+    def _refill(self, now: float) -> None:
+        """Adds the tokens earned since the last update, capped at capacity."""
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+
+class RateLimiter:
+    """
+    Schedules outgoing requests with one token bucket per domain and, optionally,
+    one per (domain, proxy) pair, and honours ``Retry-After`` on 429/503.
+
+    Domain rates are looked up by host and then by parent domains, so a rate
+    configured for ``example.com`` also applies to ``www.example.com``.
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        default_burst: Optional[float] = None,
+        domain_rates: Optional[Dict[str, RateSpec]] = None,
+        per_proxy_rate: Optional[float] = None,
+        per_proxy_burst: Optional[float] = None,
+        max_retry_after: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            default_rate (float): Requests per second allowed for domains without their own rate.
+            default_burst (Optional[float]): Burst allowed for those domains.
+            domain_rates (Optional[Dict[str, RateSpec]]): Per-domain ``rate`` or ``(rate, burst)``.
+            per_proxy_rate (Optional[float]): Requests per second per (domain, proxy), disabled when None.
+            per_proxy_burst (Optional[float]): Burst for the per-proxy buckets.
+            max_retry_after (float): Upper bound in seconds for honoured Retry-After values.
+            clock (Callable[[], float]): Monotonic time source.
+        """
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.domain_rates = {domain.lower(): spec for domain, spec in (domain_rates or {}).items()}
+        self.per_proxy_rate = per_proxy_rate
+        self.per_proxy_burst = per_proxy_burst
+        self.max_retry_after = max_retry_after
+        self.clock = clock
+        self._buckets: Dict[Tuple[str, Optional[str]], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url: str, proxies: Optional[dict] = None) -> float:
+        """
+        Reserves a slot for a request and returns the seconds to wait before sending it.
+
+        Args:
+            url (str): The request URL.
+            proxies (Optional[dict]): The proxy used, in requests format.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        domain = self._domain(url)
+        wait = self._bucket(domain, None).reserve()
+        proxy_key = self._proxy_key(proxies)
+        if proxy_key is not None:
+            wait = max(wait, self._bucket(domain, proxy_key).reserve())
+        return wait
+
+    def acquire(self, url: str, proxies: Optional[dict] = None) -> None:
+        """
+        Blocks the calling thread until the request may be sent.
+
+        Args:
+            url (str): The request URL.
+            proxies (Optional[dict]): The proxy used, in requests format.
+        """
+        wait = self.reserve(url, proxies)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str, proxies: Optional[dict] = None) -> None:
+        """
+        Waits without blocking the event loop until the request may be sent.
+
+        Args:
+            url (str): The request URL.
+            proxies (Optional[dict]): The proxy used, in requests format.
+        """
+        import asyncio
+
+        wait = self.reserve(url, proxies)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def observe(self, url: str, response, proxies: Optional[dict] = None) -> Optional[float]:
+        """
+        Pauses the matching bucket when a response asks to back off.
+
+        The (domain, proxy) bucket is paused when per-proxy limits are enabled,
+        since the block usually targets the proxy's IP; otherwise the whole
+        domain is paused.
+
+        Args:
+            url (str): The request URL.
+            response (requests.Response): The response received.
+            proxies (Optional[dict]): The proxy used, in requests format.
+
+        Returns:
+            Optional[float]: The honoured delay in seconds, None when there was nothing to honour.
+        """
+        if response is None or response.status_code not in RETRY_AFTER_STATUSES:
+            return None
+        delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            return None
+        delay = min(delay, self.max_retry_after)
+        self._bucket(self._domain(url), self._proxy_key(proxies)).pause_until(self.clock() + delay)
+        return delay
+
+    def _bucket(self, domain: str, proxy_key: Optional[str]) -> TokenBucket:
+        """Returns the bucket for a domain or (domain, proxy) pair, creating it if needed."""
+        key = (domain, proxy_key)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    if proxy_key is None:
+                        rate, burst = self._domain_rate(domain)
+                    else:
+                        rate, burst = self.per_proxy_rate, self.per_proxy_burst
+                    bucket = self._buckets[key] = TokenBucket(rate, burst, clock=self.clock)
+        return bucket
+
+    def _domain_rate(self, domain: str) -> Tuple[float, Optional[float]]:
+        """Finds the configured rate for a domain or its closest parent."""
+        labels = domain.split('.')
+        for i in range(len(labels)):
+            spec = self.domain_rates.get('.'.join(labels[i:]))
+            if spec is not None:
+                return spec if isinstance(spec, tuple) else (spec, None)
+        return self.default_rate, self.default_burst
+
+    def _proxy_key(self, proxies: Optional[dict]) -> Optional[str]:
+        """Returns the per-proxy bucket key, None when per-proxy limits are off."""
+        if self.per_proxy_rate is None or not proxies:
+            return None
+        return proxies.get('https') or proxies.get('http')
+
+    @staticmethod
+    def _domain(url: str) -> str:
+        return (urlsplit(url).hostname or '').lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header given in seconds or as an HTTP date.
+
+    Args:
+        value (Optional[str]): The header value.
+
+    Returns:
+        Optional[float]: Seconds to wait, None when the header is missing or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
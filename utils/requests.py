@@ -1,58 +1,438 @@
+import os
 import requests
+import threading
 import time
-import logging
-from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from typing import AsyncIterator, Iterable, Optional
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from .cookie_store import CookieStore
+from .downloader import DownloadError, RangeDownloader
+from .retry import BLAME_HOST, BLAME_PROXY, CircuitBreaker, CircuitOpenError
+
+# HTTP statuses that usually mean the proxy itself is refused or blocked.
+PROXY_BLOCKED_STATUSES = frozenset({403, 407, 429})
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of one URL fetched by ``RequestHandler.fetch_many``.
+
+    Attributes:
+        url (str): The requested URL.
+        response (Optional[requests.Response]): The response, None when the request raised before one arrived.
+        error (Optional[Exception]): The exception raised, None on success.
+        proxies (Optional[dict]): The proxy used, in requests format.
+        elapsed (float): Seconds spent on the request.
+    """
+    url: str
+    response: Optional[requests.Response] = None
+    error: Optional[Exception] = None
+    proxies: Optional[dict] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 class RequestHandler:
-    
-    def __init__(self) -> None:
+    """
+    Sends HTTP requests, optionally through proxies from a ``ProxyManager``.
+
+    In pooled mode every proxy (or the direct connection) gets its own
+    keep-alive ``requests.Session``, so repeated requests through the same
+    proxy reuse connections instead of paying a TCP+TLS handshake each time.
+    At most ``max_pools`` sessions are kept; the least recently used one and
+    any idle for longer than ``pool_idle_timeout`` seconds are closed.
+
+    When a ``RateLimiter`` is given, every request waits for its domain (and
+    domain/proxy) token first and 429/503 ``Retry-After`` answers pause it.
+
+    When a ``ResponseCache`` is given, ``get`` serves fresh entries from disk
+    and revalidates stale ones with conditional requests.
+
+    ``get_with_cookies`` keeps cookies in a ``CookieStore`` (in memory unless
+    one is given) and only repeats the priming request when the cookies for
+    the domain are missing, expired or rejected.
+
+    When a ``Metrics`` instance is given, every request records its latency
+    per host and per proxy, its status code and its size.
+
+    When a ``RetryPolicy`` is given, ``get`` and ``fetch_many`` retry
+    retryable failures with jittered backoff, draw a new proxy when the
+    failure is the proxy's fault, and report outcomes to the ProxyManager.
+    Per-proxy and per-host circuit breakers fail fast while open; a proxy
+    whose circuit opens is marked as failed.
+    """
+
+    # Proxies drawn in a row before giving up because every circuit was open.
+    MAX_PROXY_DRAWS = 8
+
+    def __init__(self, proxy_manager=None, pooled=False, pool_connections=10, pool_maxsize=10,
+                 max_pools=32, pool_idle_timeout=300.0, rate_limiter=None, cache=None, cookie_store=None,
+                 metrics=None, retry_policy=None) -> None:
         self.headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/50.0.2661.102 Safari/537.36'}
+        self.proxy_manager = proxy_manager
+        self.pooled = pooled
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_pools = max_pools
+        self.pool_idle_timeout = pool_idle_timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.cookie_store = cookie_store if cookie_store is not None else CookieStore()
+        self.metrics = metrics
+        self.retry_policy = retry_policy
+        if retry_policy is not None:
+            self.proxy_breaker = CircuitBreaker(retry_policy.proxy_failure_threshold, retry_policy.recovery_time)
+            self.host_breaker = CircuitBreaker(retry_policy.host_failure_threshold, retry_policy.recovery_time)
+        self._sessions = OrderedDict()
+        self._sessions_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Closes every pooled session."""
+        with self._sessions_lock:
+            sessions = [session for session, _ in self._sessions.values()]
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
 
     def get(self, url):
-        response = requests.get(url, headers=self.headers)
+        if self.cache is not None:
+            return self._cached_get(url)
+        response = self._get_response(url)
         response.raise_for_status()  # Raises HTTPError for bad responses
         return response
 
+    def _get_response(self, url, **kwargs):
+        """Draws a proxy and sends the GET, through the retry engine when a policy is set."""
+        if self.retry_policy is None:
+            return self._request(url, self._next_proxies(), **kwargs)
+        return self._request_with_retry(url, self._next_proxies(), **kwargs)[0]
+
+    def _cached_get(self, url):
+        """GET through the response cache: fresh hit, 304 revalidation or a stored miss."""
+        entry = self.cache.lookup('GET', url, self.headers)
+        if entry is not None and entry.fresh:
+            return self.cache.hit(entry)
+        if entry is not None and not entry.revalidatable:
+            entry = None
+        response = self._get_response(url, headers=self.cache.conditional_headers(entry))
+        if entry is not None and response.status_code == 304:
+            return self.cache.revalidated(entry, response)
+        response.raise_for_status()  # Raises HTTPError for bad responses
+        self.cache.store('GET', url, self.headers, response)
+        return response
+
     def get_with_cookies(self, url):
-        response = requests.get(url, headers=self.headers)
+        proxies = self._next_proxies()
+        cookies = self.cookie_store.get(url, proxies)
+        if cookies is not None:
+            response = self._request(url, proxies, cookies=cookies)
+            if response.status_code not in self.cookie_store.rejected_statuses:
+                response.raise_for_status()  # Raises HTTPError for bad responses
+                self.cookie_store.update(url, response.cookies, proxies)
+                return response
+            self.cookie_store.invalidate(url, proxies)
+        response = self._request(url, proxies)
         response.raise_for_status()  # Raises HTTPError for bad responses
         cookies = response.cookies
-        response_final = requests.get(url, cookies=cookies, headers=self.headers)
+        self.cookie_store.set(url, cookies, proxies)
+        response_final = self._request(url, proxies, cookies=cookies)
         response_final.raise_for_status()  # Raises HTTPError for bad responses
         return response_final
 
-    def download_large_file_with_progress(self, url, destination_path):
-        chunk_size = 1024
-        downloaded_size = 0
-        start_time = time.time()
-        
+    def download_large_file_with_progress(self, url, destination_path, parts=4, checksum=None):
         try:
-            response = requests.get(url, headers=self.headers, stream=True, timeout=30)
-            response.raise_for_status()  # Raises HTTPError for bad responses
-
-            total_size = int(response.headers.get('Content-Length', 0))
-            with open(destination_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size):
-                    downloaded_size += len(chunk)
-                    file.write(chunk)
-                    self.__display_progress(downloaded_size, total_size, start_time)
-
+            downloader = RangeDownloader(self, parts=parts, progress_callback=self._print_progress)
+            downloader.download(url, destination_path, checksum=checksum)
+            total_size = os.path.getsize(destination_path)
             print(f"\nDownload completed: {destination_path} ({total_size / (1024 * 1024):.2f} MB)")
         except requests.exceptions.Timeout:
             print("Error: Connection timeout")
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, DownloadError) as e:
             print(f"Error: {e}")
 
-    def __display_progress(self, downloaded_size, total_size, start_time):
-        progress = downloaded_size / total_size * 100
-        elapsed_time = time.time() - start_time
-        download_speed = downloaded_size / elapsed_time
-        remaining_time = (total_size - downloaded_size) / download_speed if download_speed > 0 else 0
-        time_left=f"Time left: {remaining_time:.2f} seconds"
-        speed=f"Speed: {download_speed / 1024:.2f} KB/s"
-        mask=f"\rDownloaded: {progress:.2f}% | {speed} | {time_left}"
+    async def fetch_many(self, urls: Iterable[str], concurrency: int = 64, per_host: int = 8,
+                         max_pending: Optional[int] = None, timeout: float = 30) -> AsyncIterator[FetchResult]:
+        """
+        Fetches many URLs concurrently, yielding results in completion order.
+
+        Requests run on a dedicated thread pool (through the pooled sessions
+        when ``pooled`` is set) while the event loop enforces the caps. Each
+        request draws a proxy from the ProxyManager and reports the outcome
+        back with ``mark_proxy_as_successful``/``mark_proxy_as_failed``.
+
+        Args:
+            urls (Iterable[str]): URLs to fetch; consumed lazily.
+            concurrency (int): Maximum requests in flight overall.
+            per_host (int): Maximum requests in flight per host.
+            max_pending (Optional[int]): Maximum URLs scheduled but not finished,
+                defaults to four times ``concurrency``.
+            timeout (float): Per-request timeout in seconds.
+
+        Yields:
+            FetchResult: One result per URL; failures are reported, not raised.
+        """
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fetch_many')
+        global_limit = asyncio.Semaphore(concurrency)
+        host_limits = {}
+        max_pending = max_pending or concurrency * 4
+        url_iter = iter(urls)
+        pending = set()
+
+        async def fetch(url):
+            host = urlsplit(url).netloc
+            limit = host_limits.get(host)
+            if limit is None:
+                limit = host_limits[host] = [asyncio.Semaphore(per_host), 0]
+            limit[1] += 1
+            try:
+                async with limit[0]:
+                    result = FetchResult(url=url)
+                    try:
+                        result.proxies = self._next_proxies()
+                    except Exception as e:
+                        result.error = e
+                        return result
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.acquire_async(url, result.proxies)
+                    async with global_limit:
+                        return await self._fetch_one(loop, executor, result, timeout)
+            finally:
+                limit[1] -= 1
+                if not limit[1]:
+                    del host_limits[host]
+
+        try:
+            while True:
+                for url in url_iter:
+                    pending.add(asyncio.ensure_future(fetch(url)))
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _fetch_one(self, loop, executor, result, timeout) -> FetchResult:
+        """Fetches one URL on the executor and reports the outcome to the ProxyManager."""
+        url = result.url
+        start = time.perf_counter()
+        if self.retry_policy is not None:
+            try:
+                result.response, result.proxies = await loop.run_in_executor(
+                    executor, partial(self._request_with_retry, url, result.proxies, acquire=False, timeout=timeout)
+                )
+                result.response.raise_for_status()
+            except Exception as e:
+                result.error = e
+            result.elapsed = time.perf_counter() - start
+            return result
+        try:
+            result.response = await loop.run_in_executor(
+                executor, partial(self._send, url, result.proxies, timeout=timeout)
+            )
+            if self.rate_limiter is not None:
+                self.rate_limiter.observe(url, result.response, result.proxies)
+            result.response.raise_for_status()
+        except Exception as e:
+            result.error = e
+        result.elapsed = time.perf_counter() - start
+        if result.proxies is not None:
+            if self._is_proxy_failure(result):
+                self.proxy_manager.mark_proxy_as_failed(result.proxies)
+            else:
+                self.proxy_manager.mark_proxy_as_successful(result.proxies, latency=result.elapsed)
+        return result
+
+    @staticmethod
+    def _is_proxy_failure(result: FetchResult) -> bool:
+        """Tells whether a failed fetch should be blamed on its proxy."""
+        if result.error is None:
+            return False
+        if result.response is not None:
+            return result.response.status_code in PROXY_BLOCKED_STATUSES
+        return isinstance(result.error, requests.exceptions.RequestException)
+
+    def _next_proxies(self) -> Optional[dict]:
+        """Draws the proxy for the next request, or None when no ProxyManager is set."""
+        if self.proxy_manager is None:
+            return None
+        return self.proxy_manager.generate_proxy()
+
+    def _request_with_retry(self, url, proxies, acquire=True, **kwargs):
+        """
+        Sends a GET under ``retry_policy`` and returns ``(response, proxies)``.
+
+        The last response is returned even when it is a failure, so callers still
+        decide with ``raise_for_status``; the last exception is raised when no
+        attempt got a response. ``acquire=False`` skips the rate limiter on the
+        first attempt, for callers that already waited for it.
+        """
+        policy = self.retry_policy
+        host = urlsplit(url).hostname or ''
+        if policy.timeout is not None:
+            kwargs.setdefault('timeout', policy.timeout)
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            if not self.host_breaker.allow(host):
+                raise CircuitOpenError(f'Circuit open for host {host!r}, failing fast')
+            try:
+                proxies = self._admit_proxy(proxies)
+            except BaseException:
+                self.host_breaker.release(host)  # hand back a half-open probe slot granted by allow()
+                raise
+            response = error = None
+            start = time.perf_counter()
+            try:
+                response = self._request(url, proxies, acquire=acquire, **kwargs)
+            except Exception as e:
+                error = e
+            blame = policy.classify(response, error, proxies is not None)
+            self._record_attempt(host, proxies, blame, error, time.perf_counter() - start)
+            if blame is None or attempt >= policy.max_attempts:
+                break
+            delay = policy.backoff(attempt, response)
+            if policy.deadline is not None and time.monotonic() - started + delay >= policy.deadline:
+                break
+            if self.metrics is not None:
+                self.metrics.inc('retries_total', reason=blame)
+            policy.sleep(delay)
+            if blame == BLAME_PROXY and proxies is not None:
+                proxies = self._next_proxies()
+            attempt += 1
+            acquire = True
+        if response is None:
+            raise error
+        return response, proxies
+
+    def _admit_proxy(self, proxies):
+        """Replaces a proxy whose circuit is open with a fresh draw."""
+        for _ in range(self.MAX_PROXY_DRAWS):
+            if proxies is None or self.proxy_breaker.allow(proxies['http']):
+                return proxies
+            proxies = self._next_proxies()
+        raise CircuitOpenError(f'Circuits open for {self.MAX_PROXY_DRAWS} proxies drawn in a row')
+
+    def _record_attempt(self, host, proxies, blame, error, elapsed):
+        """Feeds an attempt's outcome to the circuit breakers and the ProxyManager."""
+        key = proxies['http'] if proxies else None
+        if blame is None and error is not None:
+            # neither party is at fault (e.g. an invalid URL): only free a half-open probe slot
+            self.host_breaker.release(host)
+            if key is not None:
+                self.proxy_breaker.release(key)
+            return
+        if blame == BLAME_PROXY:
+            # the host was not tested: free its probe slot, or a half-open circuit would never close
+            self.host_breaker.release(host)
+            if self.proxy_breaker.record_failure(key):
+                self.proxy_manager.mark_proxy_as_failed(proxies)
+                if self.metrics is not None:
+                    self.metrics.inc('circuit_opened_total', kind='proxy')
+            return
+        if blame == BLAME_HOST:
+            if self.host_breaker.record_failure(host) and self.metrics is not None:
+                self.metrics.inc('circuit_opened_total', kind='host')
+        else:
+            self.host_breaker.record_success(host)
+        if key is not None:
+            self.proxy_breaker.record_success(key)
+            self.proxy_manager.mark_proxy_as_successful(proxies, latency=elapsed)
+
+    def _request(self, url, proxies, acquire=True, **kwargs):
+        """Sends a GET once the rate limiter allows it and reports back-off requests to it."""
+        if self.rate_limiter is None:
+            return self._send(url, proxies, **kwargs)
+        if acquire:
+            self.rate_limiter.acquire(url, proxies)
+        response = self._send(url, proxies, **kwargs)
+        self.rate_limiter.observe(url, response, proxies)
+        return response
+
+    def _send(self, url, proxies, headers=None, **kwargs):
+        """Sends a GET through the pooled session for ``proxies`` or a one-off connection."""
+        if self.metrics is None:
+            return self._transport(url, proxies, headers, **kwargs)
+        start = time.perf_counter()
+        try:
+            response = self._transport(url, proxies, headers, **kwargs)
+        except Exception as e:
+            self.metrics.record_request(url, proxies, None, e, time.perf_counter() - start)
+            raise
+        self.metrics.record_request(url, proxies, response, None, time.perf_counter() - start)
+        return response
+
+    def _transport(self, url, proxies, headers=None, **kwargs):
+        """Performs the GET for ``_send``."""
+        if self.pooled:
+            if headers:
+                kwargs['headers'] = headers
+            return self._session_for(proxies).get(url, **kwargs)
+        if proxies is not None:
+            kwargs['proxies'] = proxies
+        return requests.get(url, headers={**self.headers, **headers} if headers else self.headers, **kwargs)
+
+    def _session_for(self, proxies) -> requests.Session:
+        """Returns the keep-alive session bound to ``proxies``, creating it if needed."""
+        key = proxies['http'] if proxies else None
+        now = time.monotonic()
+        evicted = []
+        with self._sessions_lock:
+            entry = self._sessions.pop(key, None)
+            while self._sessions:
+                oldest_key, (oldest, last_used) = next(iter(self._sessions.items()))
+                if now - last_used <= self.pool_idle_timeout and len(self._sessions) < self.max_pools:
+                    break
+                del self._sessions[oldest_key]
+                evicted.append(oldest)
+            session = entry[0] if entry is not None else self._create_session(proxies)
+            self._sessions[key] = (session, now)
+            pool_size = len(self._sessions)
+        if self.metrics is not None:
+            self.metrics.set_gauge('http_sessions', pool_size)
+        for stale in evicted:
+            stale.close()
+        return session
+
+    def _create_session(self, proxies) -> requests.Session:
+        """Creates a session with a tuned connection pool, bound to ``proxies``."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(self.headers)
+        if proxies:
+            session.proxies.update(proxies)
+        return session
+
+    @staticmethod
+    def _print_progress(progress):
+        speed=f"Speed: {progress.speed / 1024:.2f} KB/s"
+        if progress.total:
+            time_left=f"Time left: {progress.eta or 0:.2f} seconds"
+            mask=f"\rDownloaded: {progress.percent:.2f}% | {speed} | {time_left}"
+        else:
+            mask=f"\rDownloaded: {progress.downloaded / (1024 * 1024):.2f} MB | {speed}"
         print(mask, end='')
-        
\ No newline at end of file
@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Optional
+
+import requests
+
+from .rate_limiter import parse_retry_after
+
+# Blame assigned to a retryable failure: switch proxy, or back off from the host.
+BLAME_PROXY = 'proxy'
+BLAME_HOST = 'host'
+
+RETRYABLE_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the circuit of its host (or of every drawn proxy) is open."""
+
+
+@dataclass
+class RetryPolicy:
+    """
+    How ``RequestHandler`` retries failed requests.
+
+    Failures are classified by ``classify``: connection errors, timeouts and
+    proxy-blocked statuses are blamed on the proxy (the retry draws a new
+    one), 5xx and un-proxied 429s on the host. Waits use full-jitter
+    exponential backoff, never shorter than a ``Retry-After`` answer, and
+    ``deadline`` bounds the total time spent on one call.
+
+    Attributes:
+        max_attempts (int): Attempts per call, including the first.
+        backoff_base (float): Backoff scale in seconds; attempt ``n`` waits up to ``base * 2 ** (n - 1)``.
+        backoff_max (float): Cap of a single wait, also applied to ``Retry-After``.
+        deadline (Optional[float]): Seconds after which no new attempt is started.
+        timeout (Optional[float]): Per-attempt timeout passed to requests when the caller gives none.
+        retry_statuses (FrozenSet[int]): Statuses blamed on the host and retried.
+        proxy_statuses (FrozenSet[int]): Statuses blamed on the proxy when one is used.
+        proxy_failure_threshold (int): Consecutive proxy failures that open its circuit.
+        host_failure_threshold (int): Consecutive host failures that open its circuit.
+        recovery_time (float): Seconds a circuit stays open before a probe request is let through.
+        sleep (Callable[[float], None]): Sleep function, replaceable in tests.
+    """
+    max_attempts: int = 4
+    backoff_base: float = 0.25
+    backoff_max: float = 10.0
+    deadline: Optional[float] = 60.0
+    timeout: Optional[float] = 30.0
+    retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+    proxy_statuses: FrozenSet[int] = frozenset({403, 407, 429})
+    proxy_failure_threshold: int = 3
+    host_failure_threshold: int = 5
+    recovery_time: float = 30.0
+    sleep: Callable[[float], None] = field(default=time.sleep, repr=False)
+
+    def classify(self, response: Optional[requests.Response], error: Optional[BaseException],
+                 proxied: bool) -> Optional[str]:
+        """
+        Tells whether an attempt should be retried, and who is to blame.
+
+        Args:
+            response (Optional[requests.Response]): The response, None when the attempt raised.
+            error (Optional[BaseException]): The exception raised, if any.
+            proxied (bool): Whether the attempt went through a proxy.
+
+        Returns:
+            Optional[str]: ``BLAME_PROXY`` or ``BLAME_HOST`` for retryable failures, None otherwise.
+        """
+        if response is None:
+            if not isinstance(error, RETRYABLE_ERRORS):
+                return None
+            return BLAME_PROXY if proxied else BLAME_HOST
+        status = response.status_code
+        if proxied and status in self.proxy_statuses:
+            return BLAME_PROXY
+        if status in self.retry_statuses:
+            return BLAME_HOST
+        return None
+
+    def backoff(self, attempt: int, response: Optional[requests.Response] = None,
+                rng: Optional[Callable[[], float]] = None) -> float:
+        """
+        Seconds to wait before retry number ``attempt`` (1-based).
+
+        Args:
+            attempt (int): The retry about to be made.
+            response (Optional[requests.Response]): The failed response, for ``Retry-After``.
+            rng (Optional[Callable[[], float]]): Uniform [0, 1) random source, defaults to ``random.random``.
+
+        Returns:
+            float: The wait, at most ``backoff_max``.
+        """
+        delay = (rng or random.random)() * min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return min(delay, self.backoff_max)
+
+
+class CircuitBreaker:
+    """
+    Per-key circuit breaker (keys are hosts or proxies).
+
+    A circuit opens after ``threshold`` consecutive failures and rejects calls
+    for ``recovery_time`` seconds; then a single probe is let through
+    (half-open) and its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, threshold: int = 5, recovery_time: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Args:
+            threshold (int): Consecutive failures that open a circuit.
+            recovery_time (float): Seconds before an open circuit admits a probe.
+            clock (Callable[[], float]): Monotonic time source.
+        """
+        self.threshold = threshold
+        self.recovery_time = recovery_time
+        self.clock = clock
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        """
+        Tells whether a call for ``key`` may proceed.
+
+        Args:
+            key (str): Host or proxy.
+
+        Returns:
+            bool: False while the circuit is open, or half-open with a probe already in flight.
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(key)
+            if opened_at is None:
+                return True
+            if self.clock() - opened_at < self.recovery_time or self._probing.get(key):
+                return False
+            self._probing[key] = True
+            return True
+
+    def is_open(self, key: str) -> bool:
+        with self._lock:
+            return key in self._opened_at
+
+    def record_success(self, key: str) -> None:
+        """Closes the circuit of ``key`` and resets its failure count."""
+        with self._lock:
+            self._failures.pop(key, None)
+            self._opened_at.pop(key, None)
+            self._probing.pop(key, None)
+
+    def release(self, key: str) -> None:
+        """Ends a half-open probe whose outcome says nothing about ``key``, leaving the circuit open."""
+        with self._lock:
+            self._probing.pop(key, None)
+
+    def record_failure(self, key: str) -> bool:
+        """
+        Counts a failure for ``key``.
+
+        Args:
+            key (str): Host or proxy.
+
+        Returns:
+            bool: True when this failure opened (or re-opened) the circuit.
+        """
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if self._probing.pop(key, False) or (key not in self._opened_at and failures >= self.threshold):
+                self._opened_at[key] = self.clock()
+                return True
+            return False
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    headers = getattr(response, 'headers', None)
+    return parse_retry_after(headers.get('Retry-After')) if headers is not None else None
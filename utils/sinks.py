@@ -0,0 +1,216 @@
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import IO, Any, Iterable, List, Optional, Sequence, Union
+
+Row = Union[dict, Sequence[Any]]
+
+
+class RowSink(ABC):
+    """
+    Long-lived, buffered writer of rows to a file that stays open between appends.
+
+    Rows are buffered in memory and written in one call every ``buffer_rows``
+    rows or ``flush_interval`` seconds. Output goes to ``<file>.part`` and is
+    renamed to its final name only when the file is rotated or the sink is
+    closed, so a crash never leaves a file that looks complete. With rotation
+    enabled files are numbered ``name-00000.ext``, ``name-00001.ext``, ...
+    """
+
+    extension = ''
+
+    def __init__(
+        self,
+        path: str,
+        buffer_rows: int = 1000,
+        flush_interval: float = 5.0,
+        rotate_bytes: Optional[int] = None,
+        rotate_seconds: Optional[float] = None,
+        compress: bool = False,
+    ) -> None:
+        """
+        Args:
+            path (str): Output path; a missing extension is added, and ``.gz`` when compressing.
+            buffer_rows (int): Rows kept in memory before writing.
+            flush_interval (float): Maximum seconds a row waits in the buffer (checked on each write).
+            rotate_bytes (Optional[int]): Start a new file once this many uncompressed bytes were written.
+            rotate_seconds (Optional[float]): Start a new file after this many seconds.
+            compress (bool): gzip the output; every flush is a sync point readable after a crash.
+        """
+        base = path[:-3] if path.endswith('.gz') else path
+        if not base.endswith(self.extension):
+            base += self.extension
+        self.base_path = base[:-len(self.extension)] if self.extension else base
+        self.buffer_rows = buffer_rows
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress = compress or path.endswith('.gz')
+        self.rotating = rotate_bytes is not None or rotate_seconds is not None
+        self.finished_files: List[str] = []
+        self.rows_written = 0
+        self._buffer: List[Row] = []
+        self._lock = threading.RLock()
+        self._index = 0
+        self._file: Optional[IO[bytes]] = None
+        self._raw: Optional[IO[bytes]] = None
+        self._path = ''
+        self._bytes = 0
+        self._opened_at = 0.0
+        self._last_flush = time.monotonic()
+        self._closed = False
+        directory = os.path.dirname(self.base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self) -> 'RowSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @property
+    def current_path(self) -> str:
+        """Final path of the file currently being written."""
+        return self._path
+
+    def write(self, row: Row) -> None:
+        """
+        Buffers one row, writing the buffer out when it is full or old.
+
+        Args:
+            row (Row): A dict or a sequence of values.
+        """
+        with self._lock:
+            if self._closed:
+                raise ValueError('write to a closed sink')
+            self._buffer.append(row)
+            if len(self._buffer) >= self.buffer_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def write_rows(self, rows: Iterable[Row]) -> None:
+        """
+        Buffers many rows.
+
+        Args:
+            rows (Iterable[Row]): Rows to write.
+        """
+        for row in rows:
+            self.write(row)
+
+    def flush(self) -> None:
+        """Writes buffered rows and flushes them to the operating system."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return
+            if self._file is None or self._should_rotate():
+                self._rotate()
+            data = self._serialize(self._buffer).encode('utf-8')
+            self._file.write(data)
+            self._file.flush()
+            self._bytes += len(data)
+            self.rows_written += len(self._buffer)
+            self._buffer.clear()
+
+    def close(self) -> None:
+        """Writes remaining rows and finalises the current file."""
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            self._finish()
+            self._closed = True
+
+    @abstractmethod
+    def _serialize(self, rows: List[Row]) -> str:
+        """Renders buffered rows as the text appended to the file."""
+
+    def _header(self) -> str:
+        """Text written at the start of every file."""
+        return ''
+
+    def _should_rotate(self) -> bool:
+        if self.rotate_bytes is not None and self._bytes >= self.rotate_bytes:
+            return True
+        return self.rotate_seconds is not None and time.monotonic() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self) -> None:
+        self._finish()
+        suffix = f'-{self._index:05d}' if self.rotating else ''
+        self._index += 1
+        self._path = f'{self.base_path}{suffix}{self.extension}' + ('.gz' if self.compress else '')
+        self._raw = open(f'{self._path}.part', 'wb')
+        self._file = gzip.GzipFile(fileobj=self._raw, mode='wb') if self.compress else self._raw
+        self._bytes = 0
+        self._opened_at = time.monotonic()
+        header = self._header().encode('utf-8')
+        if header:
+            self._file.write(header)
+            self._bytes += len(header)
+
+    def _finish(self) -> None:
+        """Closes the current file and renames it to its final name."""
+        if self._file is None:
+            return
+        self._file.close()
+        if self._raw is not self._file:
+            self._raw.close()
+        os.replace(f'{self._path}.part', self._path)
+        self.finished_files.append(self._path)
+        self._file = self._raw = None
+
+
+class CsvSink(RowSink):
+    """
+    ``RowSink`` writing CSV; dict rows are written with a ``csv.DictWriter``.
+    """
+
+    extension = '.csv'
+
+    def __init__(self, path: str, columns: Optional[List[str]] = None, **kwargs) -> None:
+        """
+        Args:
+            path (str): Output path.
+            columns (Optional[List[str]]): Header repeated at the top of every file; for dict rows it
+                defaults to the keys of the first row.
+            **kwargs: Buffering, rotation and compression options of ``RowSink``.
+        """
+        super().__init__(path, **kwargs)
+        self.columns = list(columns) if columns else None
+
+    def _header(self) -> str:
+        if not self.columns:
+            return ''
+        out = io.StringIO()
+        csv.writer(out).writerow(self.columns)
+        return out.getvalue()
+
+    def _rotate(self) -> None:
+        if self.columns is None and self._buffer and isinstance(self._buffer[0], dict):
+            self.columns = list(self._buffer[0])
+        super()._rotate()
+
+    def _serialize(self, rows: List[Row]) -> str:
+        out = io.StringIO()
+        if isinstance(rows[0], dict):
+            csv.DictWriter(out, fieldnames=self.columns or list(rows[0]), extrasaction='ignore').writerows(rows)
+        else:
+            csv.writer(out).writerows(rows)
+        return out.getvalue()
+
+
+class JsonlSink(RowSink):
+    """
+    ``RowSink`` writing one JSON document per line.
+    """
+
+    extension = '.jsonl'
+
+    def _serialize(self, rows: List[Row]) -> str:
+        return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)